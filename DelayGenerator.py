@@ -29,13 +29,12 @@ import abc
 import random
 
 
-class DelayGenerator(object):
+class DelayGenerator(metaclass=abc.ABCMeta):
     """
     Convenience abstract base class for Delay instances.  This is not a python Generator, just a function
     that generates something.
 
     """
-    __metaclass__ = abc.ABCMeta
 
     def __init__(self):
         pass
@@ -48,6 +47,13 @@ class DelayGenerator(object):
         """
         pass
 
+    def min_delay(self):
+        """
+        A lower bound on the delays generated.  Used as the lookahead for parallel simulation.
+        :return: float (seconds)
+        """
+        return 0.0
+
 
 class ExponentialDelay(DelayGenerator):
     """
@@ -69,6 +75,9 @@ class ExponentialDelay(DelayGenerator):
     def next(self):
         return random.expovariate(1/self._beta) + self._min
 
+    def min_delay(self):
+        return self._min
+
 
 class UniformDelay(DelayGenerator):
     """
@@ -83,4 +92,7 @@ class UniformDelay(DelayGenerator):
     def next(self):
         return random.uniform(self._lower, self._upper)
 
+    def min_delay(self):
+        return self._lower
+
 
@@ -39,6 +39,10 @@ class Event(object):
 
     _event_id = 0
 
+    # kernel bookkeeping events (e.g. timing wheel sentinels) set this; the simulator runs them
+    # without counting, profiling or passing them to the event hook
+    internal = False
+
     @staticmethod
     def next_event_id():
         next_id = Event._event_id
@@ -68,6 +72,9 @@ class Event(object):
     def delay(self):
         return self._delay
 
+    def callback(self):
+        return self._callback
+
     def fire_callback(self):
         self._callback(self)
 
@@ -0,0 +1,278 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import sys
+
+
+class LogSink(object):
+    """
+    A destination for log lines.  Lines are buffered and written to the stream in blocks of
+    `buffer_lines`, so a chatty component does not pay for a write (and flush) per line.
+
+    The default sink writes every line immediately so log output interleaves correctly with
+    anything else printed to stdout.  Give a component its own sink to split its output:
+
+        Logger.set_sink(LogSink(open("channel.log", "w"), buffer_lines=4096), "channel")
+    """
+
+    def __init__(self, stream=None, buffer_lines=1):
+        """
+        :param stream: A file-like object.  If None, uses whatever `sys.stdout` is at flush time
+        :param buffer_lines: The number of lines to hold before writing to the stream
+        """
+        if buffer_lines < 1: raise ValueError("buffer_lines must be positive, got {}".format(buffer_lines))
+        self._stream = stream
+        self._buffer_lines = buffer_lines
+        self._buffer = []
+
+    def write(self, line):
+        self._buffer.append(line)
+        if len(self._buffer) >= self._buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+
+        stream = self._stream if self._stream is not None else sys.stdout
+        self._buffer.append("")
+        stream.write("\n".join(self._buffer))
+        del self._buffer[:]
+        stream.flush()
+
+
+class Logger(object):
+    """
+    A per-component (and optionally per-node) logger.  Loggers are fetched from a registry with
+    `Logger.get()` and levels are set by component and node with `Logger.set_level()`.
+
+    Messages are format strings with positional arguments and are only formatted if the level
+    is enabled.  On hot paths, guard the call with the matching `*_on` attribute so a disabled
+    logger costs a single attribute check:
+
+        self._log = Logger.get("mac", node_name)
+        ...
+        if self._log.trace_on:
+            self._log.trace("backoff {} slots", slots)
+
+    Each line is prefixed with the simulation time (once a `Simulator` exists), the component,
+    and the node.
+    """
+
+    ERROR = 40
+    INFO = 20
+    DEBUG = 10
+    TRACE = 5
+
+    _loggers = {}
+    _levels = {}
+    _sinks = {}
+    _default_level = INFO
+    _default_sink = LogSink()
+    _clock = None
+
+    @staticmethod
+    def get(component, node=None):
+        """
+        Returns the logger for the component and node, creating it if needed.
+
+        :param component: The component name (e.g. "simulator", "channel")
+        :param node: An optional node name
+        :return: A Logger
+        """
+        key = (component, node)
+        logger = Logger._loggers.get(key)
+        if logger is None:
+            logger = Logger(component, node)
+            Logger._loggers[key] = logger
+        return logger
+
+    @staticmethod
+    def set_level(level, component=None, node=None):
+        """
+        Set the logging level.  With neither component nor node, sets the default level.
+        The most specific setting wins: (component, node), then component, then node, then default.
+
+        :param level: One of Logger.ERROR, INFO, DEBUG, TRACE (or any integer)
+        :param component: Restrict to this component
+        :param node: Restrict to this node
+        :return: None
+        """
+        if component is None and node is None:
+            Logger._default_level = level
+        else:
+            Logger._levels[(component, node)] = level
+        Logger._configure_all()
+
+    @staticmethod
+    def set_sink(sink, component=None):
+        """
+        Set the output sink.  With no component, sets the default sink.
+
+        :param sink: A LogSink
+        :param component: Restrict to this component
+        :return: None
+        """
+        if component is None:
+            Logger._default_sink = sink
+        else:
+            Logger._sinks[component] = sink
+        Logger._configure_all()
+
+    @staticmethod
+    def set_clock(clock):
+        """
+        :param clock: A function returning the current time for the line prefix (may be None)
+        :return: None
+        """
+        Logger._clock = clock
+
+    @staticmethod
+    def clock():
+        """
+        :return: The clock set with `set_clock()`, or None
+        """
+        return Logger._clock
+
+    @staticmethod
+    def flush_all():
+        Logger._default_sink.flush()
+        for sink in Logger._sinks.values():
+            sink.flush()
+
+    @staticmethod
+    def reset():
+        """
+        Restore the default level and sink and remove all per-component settings.
+        Existing loggers stay valid and are reconfigured.
+
+        :return: None
+        """
+        Logger.flush_all()
+        Logger._levels.clear()
+        Logger._sinks.clear()
+        Logger._default_level = Logger.INFO
+        Logger._default_sink = LogSink()
+        Logger._configure_all()
+
+    @staticmethod
+    def save_settings():
+        """
+        :return: An opaque copy of the current levels and sinks, for `restore_settings()`
+        """
+        return dict(Logger._levels), dict(Logger._sinks), Logger._default_level, Logger._default_sink
+
+    @staticmethod
+    def restore_settings(settings):
+        """
+        Return to the levels and sinks returned by `save_settings()`.
+
+        :return: None
+        """
+        Logger.flush_all()
+        levels, sinks, Logger._default_level, Logger._default_sink = settings
+        Logger._levels = dict(levels)
+        Logger._sinks = dict(sinks)
+        Logger._configure_all()
+
+    @staticmethod
+    def _configure_all():
+        for logger in Logger._loggers.values():
+            logger._configure()
+
+    def __init__(self, component, node=None):
+        """
+        Use `Logger.get()` rather than the constructor so loggers are shared and follow `set_level()`.
+        """
+        self.component = component
+        self.node = node
+        if node is None:
+            self._tag = component
+        else:
+            self._tag = "{} {}".format(component, node)
+        self._configure()
+
+    def __repr__(self):
+        return "{{Logger: component {} node {} level {}}}".format(self.component, self.node, self.level)
+
+    def __reduce__(self):
+        # Loggers are registry singletons; copies and pickles resolve back to the registry entry
+        return Logger.get, (self.component, self.node)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _configure(self):
+        levels = Logger._levels
+        level = levels.get((self.component, self.node))
+        if level is None:
+            level = levels.get((self.component, None))
+        if level is None:
+            level = levels.get((None, self.node))
+        if level is None:
+            level = Logger._default_level
+
+        self.level = level
+        self.error_on = level <= Logger.ERROR
+        self.info_on = level <= Logger.INFO
+        self.debug_on = level <= Logger.DEBUG
+        self.trace_on = level <= Logger.TRACE
+        self._sink = Logger._sinks.get(self.component, Logger._default_sink)
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, fmt, *args):
+        if level >= self.level:
+            self._write(fmt, args)
+
+    def error(self, fmt, *args):
+        if self.error_on:
+            self._write(fmt, args)
+
+    def info(self, fmt, *args):
+        if self.info_on:
+            self._write(fmt, args)
+
+    def debug(self, fmt, *args):
+        if self.debug_on:
+            self._write(fmt, args)
+
+    def trace(self, fmt, *args):
+        if self.trace_on:
+            self._write(fmt, args)
+
+    def _write(self, fmt, args):
+        if args:
+            fmt = fmt.format(*args)
+        clock = Logger._clock
+        if clock is not None:
+            line = "{:>12.9f} {} {}".format(clock(), self._tag, fmt)
+        else:
+            line = "{} {}".format(self._tag, fmt)
+        self._sink.write(line)
@@ -29,12 +29,11 @@ import abc
 import random
 
 
-class LossGenerator(object):
+class LossGenerator(metaclass=abc.ABCMeta):
     """
     A Loss generator embodies some probability distribution and will return either True (loss indicated)
     or False (loss not indicated).
     """
-    __metaclass__ = abc.ABCMeta
 
     def __init__(self):
         pass
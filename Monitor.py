@@ -0,0 +1,192 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Live progress metrics for long runs
+
+import json
+import threading
+import time
+
+
+class Monitor(object):
+    """
+    Samples the simulator's progress counters every `interval` events: events executed,
+    invalidated events skipped, queue size and high-water mark, events per wall second and
+    simulated seconds per wall second (both over the last interval and overall).  Each sample is a
+    dict published to `callback` and kept as `latest()`, which a `MetricsServer` serves to a
+    dashboard.  Attach it with `Simulator.set_monitor()`; without one the event loop does no extra
+    work.
+
+    Example:
+        monitor = Monitor(interval=100000, callback=print)
+        sim.set_monitor(monitor)
+        server = MetricsServer(monitor, port=8642)
+    """
+
+    def __init__(self, interval=100000, callback=None, clock=time.monotonic):
+        """
+        :param interval: Events between samples
+        :param callback: Optional `callback(sample)` for each sample
+        :param clock: The wall clock
+        """
+        if interval < 1: raise ValueError("interval must be positive, got {}".format(interval))
+        self.clock = clock
+        self._interval = interval
+        self._callback = callback
+        self.next_sample = 0
+        self._start = None
+        self._previous = None
+        self._latest = None
+        self._count = 0
+
+    def latest(self):
+        """
+        :return: The most recent sample dict, or None
+        """
+        return self._latest
+
+    def sample_count(self):
+        return self._count
+
+    def reset(self):
+        self.next_sample = 0
+        self._start = None
+        self._previous = None
+        self._latest = None
+        self._count = 0
+
+    def sample(self, sim):
+        """
+        Take a sample now, publish it, and set the event count of the next one.
+
+        :param sim: The Simulator
+        :return: The sample dict
+        """
+        wall = self.clock()
+        events = sim.event_count()
+        sim_time = sim.time()
+        if self._start is None:
+            self._start = (wall, events, sim_time)
+        previous = self._previous if self._previous is not None else self._start
+
+        sample = {
+            "wall": wall - self._start[0],
+            "time": sim_time,
+            "events": events,
+            "invalidated": sim.invalid_count(),
+            "queue": sim.queue_size(),
+            "queue_peak": sim.queue_peak(),
+            "events_per_second": self._rate(events - previous[1], wall - previous[0]),
+            "time_ratio": self._rate(sim_time - previous[2], wall - previous[0]),
+            "mean_events_per_second": self._rate(events - self._start[1], wall - self._start[0]),
+            "mean_time_ratio": self._rate(sim_time - self._start[2], wall - self._start[0]),
+        }
+        self._previous = (wall, events, sim_time)
+        # replaced, never mutated, so a server thread can read it without a lock
+        self._latest = sample
+        self._count += 1
+        self.next_sample = events + self._interval
+        if self._callback is not None:
+            self._callback(sample)
+        return sample
+
+    @staticmethod
+    def _rate(amount, elapsed):
+        return amount / elapsed if elapsed > 0.0 else 0.0
+
+
+class MetricsServer(object):
+    """
+    Serves a Monitor's latest sample as JSON from a daemon thread, over HTTP on localhost
+    (`port`) or a Unix-domain socket (`path`, one JSON line per connection).  The simulation
+    thread never waits on a client.
+
+    Example:
+        server = MetricsServer(monitor, port=8642)    # curl http://127.0.0.1:8642/
+        ...
+        server.close()
+    """
+
+    def __init__(self, monitor, port=None, path=None, host="127.0.0.1"):
+        """
+        :param monitor: The Monitor to serve
+        :param port: TCP port for HTTP (0 picks a free one, see `address()`)
+        :param path: Filesystem path of a Unix-domain socket, instead of HTTP
+        :param host: The interface for HTTP
+        """
+        if (port is None) == (path is None): raise ValueError("give exactly one of port or path")
+        self._monitor = monitor
+        self._path = path
+        payload = self._payload
+
+        if path is not None:
+            import os
+            import socketserver
+
+            class Handler(socketserver.BaseRequestHandler):
+                def handle(self):
+                    self.request.sendall(payload())
+
+            if os.path.exists(path):
+                os.remove(path)
+            self._server = socketserver.UnixStreamServer(path, Handler)
+        else:
+            from http.server import BaseHTTPRequestHandler, HTTPServer
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = payload()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = HTTPServer((host, port), Handler)
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="netsimpy-metrics")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def address(self):
+        """
+        :return: The socket path, or the (host, port) being served
+        """
+        return self._path if self._path is not None else self._server.server_address
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        if self._path is not None:
+            import os
+            if os.path.exists(self._path):
+                os.remove(self._path)
+
+    def _payload(self):
+        return (json.dumps(self._monitor.latest(), sort_keys=True) + "\n").encode("utf-8")
@@ -0,0 +1,357 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Conservative parallel discrete event simulation (YAWNS windows) across worker processes
+
+import ctypes
+import multiprocessing
+import pickle
+import random
+import struct
+import traceback
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+
+_LENGTH = struct.Struct("<I")
+
+
+class RingBuffer(object):
+    """
+    A single-producer, single-consumer ring of length-prefixed byte strings in shared memory.
+    It must be created before the worker processes are forked.
+
+    There are no locks: the producer only writes during a synchronization window and the
+    consumer only reads between windows, and the window barrier orders the two.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 16: raise ValueError("capacity must be at least 16 bytes, got {}".format(capacity))
+        self._capacity = capacity
+        self._buffer = multiprocessing.RawArray(ctypes.c_char, capacity)
+        # total bytes ever written and read; the difference is the fill level
+        self._written = multiprocessing.RawValue(ctypes.c_uint64, 0)
+        self._read = multiprocessing.RawValue(ctypes.c_uint64, 0)
+
+    def __len__(self):
+        return self._written.value - self._read.value
+
+    def put(self, payload):
+        """
+        :param payload: bytes
+        :return: None
+        """
+        record = _LENGTH.pack(len(payload)) + payload
+        if len(record) > self._capacity - len(self):
+            raise RuntimeError("Ring buffer overflow ({} bytes free, need {}); increase ring_capacity".format(
+                self._capacity - len(self), len(record)))
+        self._copy_in(self._written.value, record)
+        self._written.value += len(record)
+
+    def get_all(self):
+        """
+        :return: A list of all payloads written since the last call, in order
+        """
+        payloads = []
+        position = self._read.value
+        end = self._written.value
+        while position < end:
+            length = _LENGTH.unpack(self._copy_out(position, _LENGTH.size))[0]
+            payloads.append(self._copy_out(position + _LENGTH.size, length))
+            position += _LENGTH.size + length
+        self._read.value = position
+        return payloads
+
+    def _copy_in(self, position, data):
+        start = position % self._capacity
+        first = min(len(data), self._capacity - start)
+        self._buffer[start:start + first] = data[:first]
+        if first < len(data):
+            self._buffer[0:len(data) - first] = data[first:]
+
+    def _copy_out(self, position, length):
+        start = position % self._capacity
+        first = min(length, self._capacity - start)
+        data = self._buffer[start:start + first]
+        if first < length:
+            data += self._buffer[0:length - first]
+        return data
+
+
+class LogicalProcess(object):
+    """
+    One partition of a parallel simulation.  The partition's `build_fn(lp)` creates its models,
+    registers the handlers that receive messages from other partitions, and schedules its
+    initial events on `Simulator.sim()`.
+
+    Cross-partition traffic must go through `send()`, with a delay of at least the lookahead.
+    For results to match the sequential run, models must draw random numbers from `lp.rng`
+    (or their own seeded streams), not the global `random` module.
+    """
+
+    def __init__(self, index, count, lookahead, seed, outboxes=None, inboxes=None):
+        self._index = index
+        self._count = count
+        self._lookahead = lookahead
+        self._outboxes = outboxes
+        self._inboxes = inboxes
+        self._handlers = {}
+        self._sent = 0
+        self._router = None
+        self.rng = random.Random((seed << 16) + index)
+
+    def __repr__(self):
+        return "{{LogicalProcess: index {} of {} lookahead {}}}".format(self._index, self._count, self._lookahead)
+
+    def index(self):
+        return self._index
+
+    def count(self):
+        return self._count
+
+    def lookahead(self):
+        return self._lookahead
+
+    def register_handler(self, name, callback):
+        """
+        :param name: The handler name used by senders
+        :param callback: A function `callback(event)`; the message is `event.data()`
+        :return: None
+        """
+        self._handlers[name] = callback
+
+    def send(self, partition, delay, handler, data):
+        """
+        Deliver `data` to the named handler in `partition` after `delay`.
+
+        :param partition: The destination partition index (may be this one)
+        :param delay: Seconds, at least the lookahead
+        :param handler: The handler name registered in the destination
+        :param data: A picklable payload
+        :return: None
+        """
+        if delay < self._lookahead: raise ValueError("delay {} is less than the lookahead {}".format(delay, self._lookahead))
+        time = Simulator.sim().time() + delay
+        self._sent += 1
+        if self._router is not None:
+            self._router(partition, time, handler, data)
+        elif partition == self._index:
+            self._deliver_one(time, handler, data)
+        else:
+            self._outboxes[partition].put(pickle.dumps((time, self._index, self._sent, handler, data),
+                                                       pickle.HIGHEST_PROTOCOL))
+
+    def _deliver_one(self, time, handler, data):
+        Simulator.sim().schedule_at(time, Event(0.0, self._handlers[handler], data))
+
+    def _deliver_inbound(self):
+        messages = []
+        for inbox in self._inboxes:
+            if inbox is not None:
+                messages.extend(pickle.loads(payload) for payload in inbox.get_all())
+        # a fixed order for simultaneous arrivals, independent of process timing
+        messages.sort(key=lambda m: m[:3])
+        for time, _, _, handler, data in messages:
+            self._deliver_one(time, handler, data)
+
+
+def _worker_main(index, count, lookahead, seed, build_fn, result_fn, rings, conn):
+    try:
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        sim = Simulator()
+        outboxes = [rings[index][j] for j in range(count)]
+        inboxes = [rings[j][index] for j in range(count)]
+        lp = LogicalProcess(index, count, lookahead, seed, outboxes, inboxes)
+        build_fn(lp)
+
+        while True:
+            command, argument = conn.recv()
+            if command == "sync":
+                lp._deliver_inbound()
+                conn.send(("ok", sim.next_event_time()))
+            elif command == "window":
+                sim.execute_until(argument)
+                conn.send(("ok", None))
+            elif command == "finish":
+                conn.send(("ok", result_fn(lp) if result_fn is not None else None))
+                break
+    except BaseException:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        Logger.flush_all()
+        conn.close()
+
+
+class ParallelSimulation(object):
+    """
+    Runs a model split into partitions, one worker process per partition, synchronized
+    conservatively with YAWNS windows.
+
+    Each round, every partition reports its next event time.  All events before the earliest of
+    these plus the lookahead are safe to execute, because any message still to be sent between
+    partitions is delayed by at least the lookahead.  Partitions execute that window in parallel,
+    then exchange the messages they sent through shared-memory ring buffers.  Use the minimum
+    link delay as the lookahead, e.g. `delay_generator.min_delay()`.
+
+    `run_sequential()` runs the same partitions in one Simulator in this process, for verification.
+    Results match the parallel run exactly when models use per-partition random streams
+    (`lp.rng`) and no two events are scheduled for exactly the same time in one partition from
+    different sources.
+
+    Example:
+        def build(lp):
+            node = PingNode(lp)
+            lp.register_handler("ping", node.receive)
+
+        sim = ParallelSimulation(4, build, lookahead=delay.min_delay(), result_fn=lambda lp: ...)
+        results = sim.run(end_time=10.0)
+    """
+
+    def __init__(self, partitions, build_fn, lookahead, result_fn=None, seed=0, ring_capacity=1 << 20):
+        """
+        :param partitions: The number of logical processes
+        :param build_fn: A function `build_fn(lp)` that creates the models of partition `lp.index()`
+        :param lookahead: The minimum delay of any cross-partition message (seconds, positive)
+        :param result_fn: A function `result_fn(lp)` returning a picklable result, called at the end
+        :param seed: Seeds the per-partition `lp.rng` streams
+        :param ring_capacity: Bytes per directed partition pair for messages sent in one window
+        """
+        if partitions < 1: raise ValueError("partitions must be positive, got {}".format(partitions))
+        if lookahead <= 0.0: raise ValueError("lookahead must be positive, got {}".format(lookahead))
+        self._partitions = partitions
+        self._build_fn = build_fn
+        self._lookahead = lookahead
+        self._result_fn = result_fn
+        self._seed = seed
+        self._ring_capacity = ring_capacity
+        self._windows = 0
+        self._log = Logger.get("parallel")
+
+    def windows(self):
+        """
+        :return: The number of synchronization windows in the last parallel run
+        """
+        return self._windows
+
+    def run(self, end_time=None):
+        """
+        :param end_time: Stop before this simulation time (None runs until every queue is empty)
+        :return: A list of the per-partition results, in partition order
+        """
+        count = self._partitions
+        rings = [[RingBuffer(self._ring_capacity) if i != j else None for j in range(count)] for i in range(count)]
+        Logger.flush_all()
+
+        workers = []
+        connections = []
+        for index in range(count):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_worker_main, args=(
+                index, count, self._lookahead, self._seed, self._build_fn, self._result_fn, rings, child_conn))
+            worker.daemon = True
+            worker.start()
+            child_conn.close()
+            workers.append(worker)
+            connections.append(parent_conn)
+
+        try:
+            self._windows = 0
+            while True:
+                times = [t for t in self._command(connections, "sync") if t is not None]
+                if not times:
+                    break
+                start = min(times)
+                if end_time is not None and start >= end_time:
+                    break
+                window_end = start + self._lookahead
+                if end_time is not None:
+                    window_end = min(window_end, end_time)
+                self._command(connections, "window", window_end)
+                self._windows += 1
+
+            results = self._command(connections, "finish")
+            self._log.info("parallel simulation stopping ({} partitions, {} windows)", count, self._windows)
+            return results
+        finally:
+            for worker in workers:
+                worker.join(1.0)
+                if worker.is_alive():
+                    worker.terminate()
+
+    def run_sequential(self, end_time=None):
+        """
+        Run all partitions in one Simulator in this process, with the same semantics as `run()`.
+
+        :param end_time: Stop before this simulation time (None runs until the queue is empty)
+        :return: A list of the per-partition results, in partition order
+        """
+        sim = Simulator.sim()
+        if sim is None:
+            sim = Simulator()
+
+        lps = [LogicalProcess(index, self._partitions, self._lookahead, self._seed)
+               for index in range(self._partitions)]
+
+        # messages sent while building are held until every partition has registered its handlers
+        pending = []
+
+        def route(partition, time, handler, data):
+            if pending is not None:
+                pending.append((partition, time, handler, data))
+            else:
+                lps[partition]._deliver_one(time, handler, data)
+
+        for lp in lps:
+            lp._router = route
+            self._build_fn(lp)
+        for partition, time, handler, data in pending:
+            lps[partition]._deliver_one(time, handler, data)
+        pending = None
+
+        if end_time is None:
+            sim.execute()
+        else:
+            sim.execute_until(end_time)
+        return [self._result_fn(lp) if self._result_fn is not None else None for lp in lps]
+
+    @staticmethod
+    def _command(connections, command, argument=None):
+        for conn in connections:
+            conn.send((command, argument))
+
+        results = []
+        errors = []
+        for index, conn in enumerate(connections):
+            try:
+                status, value = conn.recv()
+            except EOFError:
+                status, value = "error", "worker exited"
+            if status == "ok":
+                results.append(value)
+            else:
+                errors.append("partition {}: {}".format(index, value))
+        if errors: raise RuntimeError("\n".join(errors))
+        return results
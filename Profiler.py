@@ -0,0 +1,140 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Per-callback profiling for the event loop
+
+import time
+
+
+def callback_name(callback):
+    """
+    :return: The qualified name of a callback, e.g. "netsimpy.network.Channel.FifoChannel._timer_callback"
+    """
+    function = getattr(callback, "__func__", callback)
+    # callable objects such as partials have no qualified name
+    name = getattr(function, "__qualname__", None) or getattr(function, "__name__", repr(function))
+    module = getattr(function, "__module__", None)
+    return "{}.{}".format(module, name) if module else name
+
+
+class Profiler(object):
+    """
+    Records the call count and cumulative wall time of every event callback, keyed by the
+    callback's qualified name, and samples the queue size and event rate every `sample_interval`
+    events.  Attach it with `Simulator.set_profiler()`; the simulator logs `report()` at the end of
+    each `execute()`.  Without a profiler the event loop is unchanged.
+    """
+
+    def __init__(self, sample_interval=10000, clock=time.perf_counter):
+        """
+        :param sample_interval: Events between time-series samples
+        :param clock: The wall clock used for timing
+        """
+        if sample_interval < 1: raise ValueError("sample_interval must be positive, got {}".format(sample_interval))
+        self.clock = clock
+        self._sample_interval = sample_interval
+        self.next_sample = 0
+        self._calls = {}
+        self._samples = []
+        self._start = None
+
+    def record(self, callback, elapsed):
+        # keyed by the function, not the bound method, so all instances of a model share a row
+        key = getattr(callback, "__func__", callback)
+        entry = self._calls.get(key)
+        if entry is None:
+            self._calls[key] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def sample(self, sim):
+        """
+        Record a (wall time, simulation time, events executed, queue size) sample.
+
+        :param sim: The Simulator
+        :return: None
+        """
+        wall = self.clock()
+        if self._start is None:
+            self._start = wall
+        self._samples.append((wall - self._start, sim.time(), sim.event_count(), sim.queue_size()))
+        self.next_sample = sim.event_count() + self._sample_interval
+
+    def reset(self):
+        self._calls.clear()
+        del self._samples[:]
+        self._start = None
+        self.next_sample = 0
+
+    def callbacks(self):
+        """
+        :return: A list of (name, calls, total seconds), slowest first
+        """
+        totals = {}
+        for function, (calls, elapsed) in self._calls.items():
+            name = callback_name(function)
+            previous = totals.get(name, (0, 0.0))
+            totals[name] = (previous[0] + calls, previous[1] + elapsed)
+        return sorted(((name, calls, elapsed) for name, (calls, elapsed) in totals.items()),
+                      key=lambda row: row[2], reverse=True)
+
+    def samples(self):
+        """
+        :return: A list of (wall seconds, simulation time, events executed, queue size)
+        """
+        return list(self._samples)
+
+    def event_rates(self):
+        """
+        :return: A list of (wall seconds, events per wall second) between consecutive samples
+        """
+        rates = []
+        for previous, sample in zip(self._samples, self._samples[1:]):
+            elapsed = sample[0] - previous[0]
+            if elapsed > 0.0:
+                rates.append((sample[0], (sample[2] - previous[2]) / elapsed))
+        return rates
+
+    def report(self, limit=20):
+        """
+        :param limit: The number of callbacks to list
+        :return: A multi-line ranked report
+        """
+        rows = self.callbacks()
+        total_calls = sum(calls for _, calls, _ in rows)
+        total_time = sum(elapsed for _, _, elapsed in rows)
+        lines = ["profile: {} callbacks, {:.6f} s in callbacks".format(total_calls, total_time)]
+        if self._samples:
+            peak = max(sample[3] for sample in self._samples)
+            rates = [rate for _, rate in self.event_rates()]
+            lines.append("  {} samples, peak queue {}, event rate {}".format(
+                len(self._samples), peak,
+                "{:.0f}-{:.0f}/s".format(min(rates), max(rates)) if rates else "n/a"))
+        lines.append("  {:>10} {:>12} {:>12} {:>6}  {}".format("calls", "total s", "per call us", "%", "callback"))
+        for name, calls, elapsed in rows[:limit]:
+            lines.append("  {:>10} {:>12.6f} {:>12.3f} {:>6.1f}  {}".format(
+                calls, elapsed, 1E6 * elapsed / calls, 100.0 * elapsed / total_time if total_time else 0.0, name))
+        return "\n".join(lines)
@@ -0,0 +1,220 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Pacing event dispatch against the wall clock
+
+import collections
+import threading
+import time
+from netsimpy.Simulator import Simulator
+from netsimpy.Logger import Logger
+from netsimpy.stats import RunningStats
+
+
+class RealTimeExecutor(object):
+    """
+    Runs the simulator at wall-clock speed, or at a scaled rate (`scale=10.0` runs ten simulated
+    seconds per real second).  Between events it sleeps until the next event is due, waking early
+    only if an event is injected; it never busy-waits.
+
+    External code (socket readers, emulator harnesses) feeds events in with `inject()`, which is
+    thread-safe.  An injected event is scheduled `event.delay()` after the simulation time that
+    corresponds to "now" on the wall clock.
+
+    Use `run()` to block the calling thread, or `attach()` to run inside an asyncio event loop
+    so I/O callbacks on the loop can inject events.
+
+    If the model cannot keep up, events execute late.  Lateness (wall seconds behind schedule) is
+    accumulated in `lateness()`, and a line is logged to the "realtime" logger whenever it exceeds
+    `late_threshold`.
+    """
+
+    def __init__(self, sim=None, scale=1.0, late_threshold=0.001, clock=time.monotonic):
+        """
+        :param sim: The Simulator (default `Simulator.sim()`)
+        :param scale: Simulated seconds per wall-clock second (positive)
+        :param late_threshold: Wall seconds of lateness to report
+        :param clock: A monotonic wall clock function returning seconds
+        """
+        if scale <= 0.0: raise ValueError("scale must be positive, got {}".format(scale))
+        self._sim = sim if sim is not None else Simulator.sim()
+        self._scale = scale
+        self._late_threshold = late_threshold
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._injected = collections.deque()
+        self._stopped = False
+        self._lateness = RunningStats("lateness")
+        self._late_count = 0
+        self._wall_start = None
+        self._sim_start = None
+        self._end_time = None
+        self._idle_exit = True
+        self._loop = None
+        self._handle = None
+        self._done = None
+        self._log = Logger.get("realtime")
+
+    def lateness(self):
+        """
+        :return: RunningStats of the wall-clock lateness of each dispatch batch (seconds)
+        """
+        return self._lateness
+
+    def late_count(self):
+        """
+        :return: The number of dispatch batches later than `late_threshold`
+        """
+        return self._late_count
+
+    def sim_now(self):
+        """
+        :return: The simulation time corresponding to the current wall-clock time
+        """
+        return self._sim_start + (self._clock() - self._wall_start) * self._scale
+
+    def inject(self, event):
+        """
+        Thread-safe.  Schedule `event` at `sim_now() + event.delay()` and wake the executor.
+
+        :param event: An Event
+        :return: None
+        """
+        with self._condition:
+            self._injected.append(event)
+            self._condition.notify()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup)
+
+    def stop(self):
+        """
+        Thread-safe.  Stop the executor after the current dispatch.
+
+        :return: None
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup)
+
+    def run(self, duration=None, idle_exit=True):
+        """
+        Run in the calling thread until `duration` simulated seconds pass, `stop()` is called, or
+        (with `idle_exit`) the event queue is empty.
+
+        :param duration: Simulated seconds to run (None for no limit)
+        :param idle_exit: If False, wait for injected events when the queue is empty
+        :return: None
+        """
+        self._start(duration, idle_exit)
+        while True:
+            wait = self._dispatch()
+            if wait is False:
+                break
+            with self._condition:
+                if not self._injected and not self._stopped:
+                    self._condition.wait(wait)
+
+    def attach(self, loop=None, duration=None, idle_exit=True):
+        """
+        Run inside an asyncio event loop.  Dispatch is driven by `loop.call_later()`, so other
+        coroutines and I/O callbacks on the loop run between events.
+
+        :param loop: The asyncio loop (default: the running loop, so call from a coroutine)
+        :param duration: Simulated seconds to run (None for no limit)
+        :param idle_exit: If False, wait for injected events when the event queue is empty
+        :return: An asyncio Future that completes when the executor stops
+        """
+        import asyncio
+
+        self._loop = loop if loop is not None else asyncio.get_running_loop()
+        self._done = self._loop.create_future()
+        self._start(duration, idle_exit)
+        self._handle = self._loop.call_soon(self._async_step)
+        return self._done
+
+    def _start(self, duration, idle_exit):
+        self._stopped = False
+        self._idle_exit = idle_exit
+        self._wall_start = self._clock()
+        self._sim_start = self._sim.time()
+        self._end_time = self._sim_start + duration if duration is not None else None
+
+    def _wakeup(self):
+        if self._done is None or self._done.done():
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = self._loop.call_soon(self._async_step)
+
+    def _async_step(self):
+        self._handle = None
+        wait = self._dispatch()
+        if wait is False:
+            self._loop = None
+            if not self._done.done():
+                self._done.set_result(None)
+        elif wait is not None:
+            self._handle = self._loop.call_later(wait, self._async_step)
+
+    def _dispatch(self):
+        """
+        Execute everything that is due.
+
+        :return: False to stop, None to wait for an injected event, else the wall seconds to sleep
+        """
+        with self._condition:
+            injected = list(self._injected)
+            self._injected.clear()
+            stopped = self._stopped
+
+        now = self.sim_now()
+        if self._end_time is not None:
+            now = min(now, self._end_time)
+        for event in injected:
+            self._sim.schedule_at(max(now, self._sim.time()) + event.delay(), event)
+        if stopped:
+            return False
+
+        next_time = self._sim.next_event_time()
+        if next_time is not None and next_time < now:
+            late = (now - next_time) / self._scale
+            self._lateness.add(late)
+            if late > self._late_threshold:
+                self._late_count += 1
+                self._log.info("running {:.6f} seconds behind real time", late)
+            self._sim.execute_until(now)
+            next_time = self._sim.next_event_time()
+
+        if self._end_time is not None and now >= self._end_time:
+            return False
+        if next_time is None:
+            if self._idle_exit:
+                return False
+            return None
+        if self._end_time is not None:
+            next_time = min(next_time, self._end_time)
+        return max(0.0, (next_time - self.sim_now()) / self._scale)
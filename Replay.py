@@ -0,0 +1,271 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Deterministic replay: event-sequence hashes, run comparison and divergence bisection
+
+import hashlib
+import io
+import json
+import random
+from netsimpy.Simulator import Simulator
+from netsimpy.Logger import Logger, LogSink
+from netsimpy.Profiler import callback_name
+
+
+def event_key(sim, event):
+    """
+    The default identity of an executed event: its time and its callback's qualified name.
+    Event ids and data are left out because they shift with unrelated changes (or hold addresses).
+    """
+    return "{!r} {}".format(sim.time(), callback_name(event.callback()))
+
+
+class EventRecorder(object):
+    """
+    An event hook (see `Simulator.set_event_hook()`) that folds each executed event's key into
+    a running SHA-1 and records the digest every `interval` events, so a long run is summarized
+    by a few hashes.  Optionally it keeps the full keys of events numbered in `window`, and
+    captures a full TRACE log of events numbered in `trace_window`.
+    """
+
+    def __init__(self, interval=1000, key=event_key, window=None, trace_window=None):
+        """
+        :param interval: Events between recorded digests
+        :param key: `key(sim, event)` returning a string identifying the event
+        :param window: Optional (first, last) event numbers (1-based, inclusive) whose keys are kept
+        :param trace_window: Optional (first, last) event numbers to log at TRACE level
+        """
+        if interval < 1: raise ValueError("interval must be positive, got {}".format(interval))
+        self._interval = interval
+        self._key = key
+        self._window = window
+        self._trace_window = trace_window
+        self._sim = None
+        self._hash = hashlib.sha1()
+        self._count = 0
+        self._checkpoints = []
+        self._keys = []
+        self._saved_logging = None
+        self._trace_stream = None
+
+    def attach(self, sim):
+        self._sim = sim
+        sim.set_event_hook(self)
+
+    def __call__(self, event):
+        self._count += 1
+        key = self._key(self._sim, event)
+        self._hash.update(key.encode("utf-8"))
+        self._hash.update(b"\n")
+        if self._count % self._interval == 0:
+            self._checkpoints.append((self._count, self._sim.time(), self._hash.hexdigest()))
+
+        if self._window is not None and self._window[0] <= self._count <= self._window[1]:
+            self._keys.append((self._count, key))
+        if self._trace_window is not None:
+            if self._count == self._trace_window[0]:
+                self._start_trace()
+            elif self._count == self._trace_window[1] + 1:
+                self.finish()
+
+    def finish(self):
+        """
+        Record the final digest and stop any trace capture.  Called by `Replay` at the end of a run.
+        """
+        if not self._checkpoints or self._checkpoints[-1][0] != self._count:
+            self._checkpoints.append((self._count, self._sim.time() if self._sim else 0.0, self._hash.hexdigest()))
+        if self._saved_logging is not None:
+            Logger.restore_settings(self._saved_logging)
+            self._saved_logging = None
+
+    def _start_trace(self):
+        self._saved_logging = Logger.save_settings()
+        self._trace_stream = io.StringIO()
+        Logger.reset()
+        Logger.set_sink(LogSink(self._trace_stream, buffer_lines=1 << 16))
+        Logger.set_level(Logger.TRACE)
+
+    def event_count(self):
+        return self._count
+
+    def checkpoints(self):
+        """
+        :return: A list of (events executed, simulation time, hex digest of all events so far)
+        """
+        return list(self._checkpoints)
+
+    def keys(self):
+        """
+        :return: A list of (event number, key) for the events in the window
+        """
+        return list(self._keys)
+
+    def trace(self):
+        """
+        :return: The captured TRACE log text ("" if none)
+        """
+        Logger.flush_all()
+        return self._trace_stream.getvalue() if self._trace_stream is not None else ""
+
+    def to_dict(self):
+        return {"interval": self._interval, "checkpoints": self._checkpoints, "keys": self._keys}
+
+    def save(self, path):
+        """
+        Save the digests (and window keys) as JSON, e.g. to compare against after a code change.
+        """
+        with open(path, "w") as output:
+            json.dump(self.to_dict(), output)
+
+    @staticmethod
+    def load(path):
+        with open(path) as source:
+            state = json.load(source)
+        recorder = EventRecorder(state["interval"])
+        recorder._checkpoints = [tuple(checkpoint) for checkpoint in state["checkpoints"]]
+        recorder._keys = [tuple(key) for key in state["keys"]]
+        recorder._count = recorder._checkpoints[-1][0] if recorder._checkpoints else 0
+        return recorder
+
+
+def first_difference(a, b):
+    """
+    Compare the digests of two recordings made with the same interval.
+
+    :return: None if they agree, else (last event number known to agree, event number by which they differ)
+    """
+    agreed = 0
+    for (count_a, _, digest_a), (count_b, _, digest_b) in zip(a.checkpoints(), b.checkpoints()):
+        if count_a != count_b or digest_a != digest_b:
+            return agreed, min(count_a, count_b)
+        agreed = count_a
+    if a.event_count() != b.event_count():
+        return agreed, min(a.event_count(), b.event_count()) + 1
+    return None
+
+
+class Divergence(object):
+    """
+    The first event at which two runs differ, with the keys of both runs around it and the TRACE
+    log of each run leading up to it.
+    """
+
+    def __init__(self, event_number, keys_a, keys_b, trace_a, trace_b):
+        self.event_number = event_number
+        self.keys_a = keys_a
+        self.keys_b = keys_b
+        self.trace_a = trace_a
+        self.trace_b = trace_b
+
+    def __repr__(self):
+        key_a = dict(self.keys_a).get(self.event_number)
+        key_b = dict(self.keys_b).get(self.event_number)
+        return "{{Divergence: event {} a {!r} b {!r}}}".format(self.event_number, key_a, key_b)
+
+
+class Replay(object):
+    """
+    A reproducible run: `build(sim)` creates the models in a fresh Simulator after
+    `random.seed(seed)`, then the simulator runs to completion (or `max_events`).  Run it again with
+    different recorders to compare it against another Replay, e.g. the same scenario before and
+    after a code change.
+
+    Example:
+        before = Replay(build_old, seed)
+        after = Replay(build_new, seed)
+        divergence = Replay.bisect(before, after)
+        if divergence is not None:
+            print(divergence)
+            print(divergence.trace_b)
+    """
+
+    def __init__(self, build, seed, max_events=None):
+        """
+        :param build: `build(sim)` schedules the initial events
+        :param seed: The seed for `random`
+        :param max_events: Optional limit on the events executed
+        """
+        self._build = build
+        self._seed = seed
+        self._max_events = max_events
+
+    def run(self, recorder):
+        """
+        Run once from the start with `recorder` attached.
+
+        :return: The recorder
+        """
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        random.seed(self._seed)
+        sim = Simulator()
+        try:
+            recorder.attach(sim)
+            self._build(sim)
+            if self._max_events is None:
+                sim.execute()
+            else:
+                sim.execute_steps(self._max_events)
+        finally:
+            recorder.finish()
+            sim.release()
+        return recorder
+
+    def record(self, interval=1000, key=event_key):
+        """
+        :return: An EventRecorder with a digest every `interval` events
+        """
+        return self.run(EventRecorder(interval, key))
+
+    @staticmethod
+    def bisect(a, b, interval=1000, key=event_key, context=20):
+        """
+        Find the first event at which runs `a` and `b` differ.  The runs are hashed every
+        `interval` events to find the interval where they split, re-run keeping the keys of just
+        that interval to find the event, and re-run a third time with a TRACE log of the
+        `context` events up to and including it.
+
+        :return: A Divergence, or None if the runs are the same
+        """
+        difference = first_difference(a.record(interval, key), b.record(interval, key))
+        if difference is None:
+            return None
+
+        window = (difference[0] + 1, difference[1])
+        keys_a = a.run(EventRecorder(interval, key, window=window)).keys()
+        keys_b = b.run(EventRecorder(interval, key, window=window)).keys()
+        event_number = window[1]
+        for (number, key_a), (_, key_b) in zip(keys_a, keys_b):
+            if key_a != key_b:
+                event_number = number
+                break
+        else:
+            # one run ended first
+            event_number = min(len(keys_a), len(keys_b)) + window[0]
+
+        trace_window = (max(1, event_number - context), event_number)
+        trace_a = a.run(EventRecorder(interval, key, window=trace_window, trace_window=trace_window))
+        trace_b = b.run(EventRecorder(interval, key, window=trace_window, trace_window=trace_window))
+        return Divergence(event_number, trace_a.keys(), trace_b.keys(), trace_a.trace(), trace_b.trace())
@@ -0,0 +1,412 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Columnar storage of per-trial results: NumPy .npy chunks (or Parquet) read back through memory maps
+
+import binascii
+import json
+import os
+import shutil
+import tempfile
+
+FORMATS = ("npy", "parquet")
+
+
+class Schema(object):
+    """
+    The ordered columns of a result store, each a name and a NumPy dtype string (e.g. "<f8").
+    Only fixed-size dtypes are allowed, so every column can be memory-mapped.
+    """
+
+    def __init__(self, columns):
+        """
+        :param columns: A list of (name, dtype) pairs; dtype is anything `numpy.dtype()` accepts
+        """
+        import numpy
+
+        self._columns = []
+        for name, dtype in columns:
+            if not name or name.startswith(".") or "/" in name or os.sep in name:
+                raise ValueError("invalid column name {!r}".format(name))
+            dtype = numpy.dtype(dtype)
+            if dtype.hasobject: raise ValueError("column {} cannot hold Python objects".format(name))
+            self._columns.append((name, dtype.str))
+        names = self.names()
+        if len(set(names)) != len(names): raise ValueError("duplicate column names in {}".format(names))
+
+    def __repr__(self):
+        return "{{Schema: {}}}".format(", ".join("{} {}".format(name, dtype) for name, dtype in self._columns))
+
+    def __eq__(self, other):
+        return isinstance(other, Schema) and self._columns == other._columns
+
+    def __ne__(self, other):
+        return not self == other
+
+    @staticmethod
+    def infer(row):
+        """
+        A schema for rows like `row`, in sorted name order except that "seed" comes first.  Bools stay
+        bools and an integer "seed" is int64; every other number is float64, since a later row may hold
+        a float where the first held an int (e.g. a sweep over `[0, 0.5]`).
+
+        :param row: A dict {name: value}
+        """
+        import numpy
+
+        names = sorted(row, key=lambda name: (name != "seed", name))
+        columns = []
+        for name in names:
+            value = row[name]
+            if isinstance(value, (bool, numpy.bool_)):
+                dtype = numpy.bool_
+            elif name == "seed" and isinstance(value, (int, numpy.integer)):
+                dtype = numpy.int64
+            else:
+                dtype = numpy.float64
+            columns.append((name, dtype))
+        return Schema(columns)
+
+    def columns(self):
+        """
+        :return: A list of (name, dtype string)
+        """
+        return list(self._columns)
+
+    def names(self):
+        return [name for name, _ in self._columns]
+
+    def dtype(self, name):
+        for column, dtype in self._columns:
+            if column == name:
+                return dtype
+        raise KeyError("no column {}".format(name))
+
+    def to_dict(self):
+        return {"columns": [[name, dtype] for name, dtype in self._columns]}
+
+    @staticmethod
+    def from_dict(state):
+        return Schema([(name, dtype) for name, dtype in state["columns"]])
+
+
+class ResultWriter(object):
+    """
+    Buffers rows in memory and writes them to the store as one chunk every `batch_size` rows.
+
+    Each process (e.g. each worker of a pool) uses its own writer.  Chunk names include the process
+    id and a random token, and a chunk appears under its final name only once all of its columns are
+    written, so concurrent writers need no locking and readers never see a partial chunk.  Call
+    `close()` (or use `with`) to write the last partial batch.
+
+    A writer can be passed as `SequentialSampler(..., on_trial=writer)`: it is then called as
+    `writer(seed, metrics)` and records the seed, the metrics and the writer's constant `params`.
+    """
+
+    def __init__(self, store, params=None, batch_size=4096):
+        """
+        :param store: The ResultStore to write to
+        :param params: Optional dict {name: value} of constant columns added to every row (e.g. a sweep point)
+        :param batch_size: Rows per chunk
+        """
+        if batch_size < 1: raise ValueError("batch_size must be positive, got {}".format(batch_size))
+        self._store = store
+        self._params = dict(params) if params else {}
+        self._batch_size = batch_size
+        self._prefix = "{}-{}".format(os.getpid(), binascii.hexlify(os.urandom(4)).decode())
+        self._chunks = 0
+        self._buffer = None
+        self._dtypes = None
+        self._rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __call__(self, seed, metrics):
+        row = dict(metrics)
+        row["seed"] = seed
+        self.append(row)
+
+    def append(self, row):
+        """
+        Buffer one row, writing a chunk when the buffer is full.
+
+        :param row: A dict {column: value} with exactly the schema's columns (less the writer's params)
+        """
+        import numpy
+
+        if self._params:
+            row = dict(self._params, **row)
+        if self._buffer is None:
+            schema = self._store.schema()
+            if schema is None:
+                schema = self._store.set_schema(Schema.infer(row))
+            self._buffer = dict((name, []) for name in schema.names())
+            self._dtypes = dict((name, numpy.dtype(dtype)) for name, dtype in schema.columns())
+        if len(row) != len(self._buffer) or any(name not in self._buffer for name in row):
+            raise KeyError("row columns {} do not match the schema {}".format(sorted(row), sorted(self._buffer)))
+
+        # check each value now, so a float is never silently truncated into an integer column
+        for name, dtype in self._dtypes.items():
+            value = numpy.asarray(row[name])
+            if not numpy.can_cast(value.dtype, dtype, casting="safe"):
+                raise ValueError("column {} is {}, cannot store {!r}".format(name, dtype, row[name]))
+
+        for name, values in self._buffer.items():
+            values.append(row[name])
+        self._rows += 1
+        if self._rows >= self._batch_size:
+            self.flush()
+
+    def pending(self):
+        """
+        :return: The number of buffered rows not yet written
+        """
+        return self._rows
+
+    def flush(self):
+        """
+        Write the buffered rows as one chunk, if there are any.
+        """
+        if self._rows == 0:
+            return
+        name = "{}-{:06d}".format(self._prefix, self._chunks)
+        self._store._write_chunk(name, self._buffer)
+        self._chunks += 1
+        for values in self._buffer.values():
+            del values[:]
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+
+
+class ResultStore(object):
+    """
+    A directory of per-trial results in columnar form, for analysis over many trials without parsing logs.
+
+    Rows are written in chunks by `ResultWriter`s.  In the default "npy" format each chunk is a
+    directory with one `.npy` file per column, so reading a column touches only that column's files,
+    and `chunks()` returns them memory-mapped.  The "parquet" format writes one Parquet file per chunk
+    and needs pyarrow.  The schema and format are kept in `schema.json`, and are read from there when an
+    existing store is opened.
+
+    Example:
+        store = ResultStore("reboot_results")
+        with store.writer({"loss_rate": 0.6}) as writer:
+            SequentialSampler(trial, targets, on_trial=writer).run()
+
+        failed = store.column("failed")
+        seeds = store.read(["seed", "failed"])["seed"]
+    """
+
+    def __init__(self, directory, schema=None, format="npy"):
+        """
+        :param directory: The store directory, created if needed
+        :param schema: Optional Schema; without one it is taken from the existing store or inferred
+                       from the first row written.  Pass it when several processes write a new store.
+        :param format: "npy" or "parquet"; ignored when opening an existing store
+        """
+        if format not in FORMATS: raise ValueError("format must be one of {}, got {}".format(FORMATS, format))
+        self._directory = directory
+        self._format = format
+        self._schema = None
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._load_schema()
+        if schema is not None:
+            self.set_schema(schema)
+
+    def __repr__(self):
+        return "{{ResultStore: {} {} {} chunks {}}}".format(
+            self._directory, self._format, self._schema, len(self.chunk_names()))
+
+    def directory(self):
+        return self._directory
+
+    def format(self):
+        return self._format
+
+    def schema(self):
+        """
+        :return: The Schema, or None before the first row of a store created without one
+        """
+        if self._schema is None:
+            self._load_schema()
+        return self._schema
+
+    def set_schema(self, schema):
+        """
+        Record the schema of a new store.  An existing store's schema cannot be changed.
+
+        :return: The store's schema
+        """
+        current = self.schema()
+        if current is None:
+            self._write_json("schema.json", dict(schema.to_dict(), format=self._format))
+            self._load_schema()
+            current = self._schema
+        if current != schema:
+            raise ValueError("store {} has schema {}, not {}".format(self._directory, current, schema))
+        return current
+
+    def writer(self, params=None, batch_size=4096):
+        """
+        :return: A ResultWriter for this process (see `ResultWriter`)
+        """
+        return ResultWriter(self, params, batch_size)
+
+    def chunk_names(self):
+        """
+        :return: The names of the complete chunks, sorted
+        """
+        suffix = ".parquet" if self._format == "parquet" else ""
+        names = []
+        for entry in os.listdir(self._directory):
+            if entry.startswith("chunk-") and entry.endswith(suffix):
+                names.append(entry[len("chunk-"):len(entry) - len(suffix)])
+        return sorted(names)
+
+    def rows(self):
+        """
+        :return: The number of rows in all complete chunks
+        """
+        schema = self.schema()
+        if schema is None:
+            return 0
+        first = schema.names()[0]
+        return sum(len(chunk[first]) for chunk in self.chunks([first]))
+
+    def chunks(self, columns=None):
+        """
+        Iterate over the chunks without copying them.  With the "npy" format the arrays are read-only
+        memory maps, so only the pages that are used are read from disk.
+
+        :param columns: The column names to read (default all)
+        :return: An iterator of dicts {column: array}, one per chunk
+        """
+        import numpy
+
+        columns = self._columns(columns)
+        for name in self.chunk_names():
+            if self._format == "parquet":
+                import pyarrow.parquet
+
+                table = pyarrow.parquet.read_table(self._chunk_path(name), columns=columns, memory_map=True)
+                yield dict((column, table.column(column).to_numpy()) for column in columns)
+            else:
+                path = self._chunk_path(name)
+                yield dict((column, numpy.load(os.path.join(path, column + ".npy"), mmap_mode="r"))
+                           for column in columns)
+
+    def column(self, name):
+        """
+        :return: One column of every chunk as a single array
+        """
+        return self.read([name])[name]
+
+    def read(self, columns=None):
+        """
+        :param columns: The column names to read (default all)
+        :return: A dict {column: array} over all chunks, in chunk name order
+        """
+        import numpy
+
+        schema = self.schema()
+        columns = self._columns(columns)
+        parts = dict((column, []) for column in columns)
+        for chunk in self.chunks(columns):
+            for column in columns:
+                parts[column].append(chunk[column])
+        return dict((column, numpy.concatenate(parts[column]) if parts[column]
+                     else numpy.empty(0, dtype=schema.dtype(column))) for column in columns)
+
+    def clear(self):
+        """
+        Delete every chunk, keeping the schema.
+        """
+        for name in self.chunk_names():
+            path = self._chunk_path(name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def _columns(self, columns):
+        schema = self.schema()
+        if schema is None:
+            if columns: raise KeyError("store {} has no schema yet".format(self._directory))
+            return []
+        if columns is None:
+            return schema.names()
+        for column in columns:
+            schema.dtype(column)
+        return list(columns)
+
+    def _chunk_path(self, name):
+        suffix = ".parquet" if self._format == "parquet" else ""
+        return os.path.join(self._directory, "chunk-" + name + suffix)
+
+    def _load_schema(self):
+        path = os.path.join(self._directory, "schema.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self._schema = Schema.from_dict(state)
+            self._format = state["format"]
+
+    def _write_json(self, name, record):
+        # write then rename, so a reader never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=".", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(record, f, sort_keys=True, indent=1)
+        os.rename(tmp_path, os.path.join(self._directory, name))
+
+    def _write_chunk(self, name, values):
+        """
+        Write one chunk from a dict {column: list of values}, under a temporary name first.
+        """
+        import numpy
+
+        schema = self.schema()
+        arrays = [(column, numpy.asarray(values[column], dtype=dtype)) for column, dtype in schema.columns()]
+        if self._format == "parquet":
+            import pyarrow
+            import pyarrow.parquet
+
+            table = pyarrow.table(dict(arrays))
+            fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=".", suffix=".tmp")
+            os.close(fd)
+            pyarrow.parquet.write_table(table, tmp_path)
+        else:
+            tmp_path = tempfile.mkdtemp(dir=self._directory, prefix=".")
+            for column, array in arrays:
+                numpy.save(os.path.join(tmp_path, column + ".npy"), array)
+        os.rename(tmp_path, self._chunk_path(name))
@@ -0,0 +1,213 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import math
+import random
+from netsimpy.Simulator import Simulator
+from netsimpy.stats import RunningStats
+
+
+def run_replication(trial, seed):
+    """
+    Run one replication: seed the global RNG, call `trial(seed)`, and release the Simulator
+    singleton so the next replication can create its own.
+
+    :param trial: A function `trial(seed)` returning a dict {metric: float}
+    :param seed: The integer seed for this replication
+    :return: The dict returned by the trial
+    """
+    random.seed(seed)
+    try:
+        return trial(seed)
+    finally:
+        sim = Simulator.sim()
+        if sim is not None:
+            sim.release()
+
+
+def metric_half_width(stats, confidence):
+    """
+    The confidence interval half-width of a metric's mean.  A 0/1 (indicator) metric that has not
+    varied yet has zero sample variance, so it instead gets the exact (Clopper-Pearson) upper bound for
+    no events in n trials, about 3.7/n at 95%: a rare failure not seen yet is not taken as converged.
+
+    :param stats: The metric's RunningStats
+    :param confidence: The two-sided confidence level
+    :return: The half-width
+    """
+    count = stats.count()
+    if count > 0 and stats.min() == stats.max() and stats.min() in (0.0, 1.0):
+        return 1.0 - ((1.0 - confidence) / 2.0) ** (1.0 / count)
+    return stats.half_width(confidence)
+
+
+def _run_replication_star(args):
+    return run_replication(*args)
+
+
+class SamplingResult(object):
+    """
+    The outcome of a `SequentialSampler` run.
+    """
+
+    def __init__(self, stats, trials, first_seed, converged, confidence):
+        self.stats = stats
+        self.trials = trials
+        self.first_seed = first_seed
+        self.converged = converged
+        self.confidence = confidence
+
+    def __repr__(self):
+        return "{{SamplingResult: trials {} converged {} {}}}".format(
+            self.trials, self.converged,
+            ", ".join("{} {:.6g} +/- {:.3g}".format(name, self.mean(name), self.half_width(name))
+                      for name in sorted(self.stats)))
+
+    def seeds(self):
+        """
+        :return: The seeds used, in order
+        """
+        return range(self.first_seed, self.first_seed + self.trials)
+
+    def mean(self, metric):
+        return self.stats[metric].mean()
+
+    def half_width(self, metric):
+        return metric_half_width(self.stats[metric], self.confidence)
+
+
+class SequentialSampler(object):
+    """
+    Runs replications until the confidence interval half-width of every target metric falls
+    below its target, rather than a fixed number of trials.
+
+    Each replication calls `trial(seed)` with consecutive seeds starting at `first_seed`, after
+    seeding the global `random` module with that seed, and records the metrics it returns.
+    Replications run in batches.  After `min_trials`, the size of the next batch is predicted from
+    the current half-width (which shrinks as 1/sqrt(n)), so runs that are far from converging grow
+    quickly and runs that are close stop soon.  The run stops at `max_trials` whether or not it converged.
+
+    For indicator metrics (e.g. 1.0 for a failed trial) the sample variance is zero until the first
+    failure, so until then the half-width is the exact bound for no failures in n trials (see
+    `metric_half_width()`).  Still keep `min_trials` large enough to see a failure.  For rare
+    failures see `netsimpy.Splitting.MultilevelSplitting` instead.
+
+    Example:
+        def trial(seed):
+            ...
+            return {"latency": mean_latency, "failed": 0.0 if ok else 1.0}
+
+        result = SequentialSampler(trial, {"latency": 1e-6, "failed": 0.005}).run()
+    """
+
+    def __init__(self, trial, targets, confidence=0.95, relative=False, min_trials=30, max_trials=100000,
+                 batch_size=10, first_seed=0, pool=None, on_trial=None):
+        """
+        :param trial: A function `trial(seed)` returning a dict {metric: float}.  Must be picklable if `pool` is used.
+        :param targets: A dict {metric: half-width target}
+        :param confidence: The two-sided confidence level of the interval
+        :param relative: If True, targets are fractions of the absolute mean rather than absolute widths
+        :param min_trials: Never stop before this many trials
+        :param max_trials: Never run more than this many trials
+        :param batch_size: The smallest number of trials to run between convergence checks
+        :param first_seed: The seed of the first trial
+        :param pool: Optional object with a `map(fn, iterable)` method (e.g. `multiprocessing.Pool` or
+                     `concurrent.futures.ProcessPoolExecutor`)
+        :param on_trial: Optional callback `on_trial(seed, metrics)` called for each trial, in seed order
+        """
+        if not targets: raise ValueError("targets must not be empty")
+        if min_trials < 2: raise ValueError("min_trials must be at least 2, got {}".format(min_trials))
+        if max_trials < min_trials: raise ValueError("max_trials must be at least min_trials")
+        if batch_size < 1: raise ValueError("batch_size must be positive, got {}".format(batch_size))
+
+        self._trial = trial
+        self._targets = dict(targets)
+        self._confidence = confidence
+        self._relative = relative
+        self._min_trials = min_trials
+        self._max_trials = max_trials
+        self._batch_size = batch_size
+        self._first_seed = first_seed
+        self._pool = pool
+        self._on_trial = on_trial
+
+    def run(self):
+        """
+        :return: A SamplingResult
+        """
+        stats = {}
+        trials = 0
+        converged = False
+        batch = self._min_trials
+        while True:
+            batch = min(batch, self._max_trials - trials)
+            seeds = range(self._first_seed + trials, self._first_seed + trials + batch)
+            for seed, metrics in zip(seeds, self._run_batch(seeds)):
+                for name, value in metrics.items():
+                    if name not in stats:
+                        stats[name] = RunningStats(name)
+                    stats[name].add(value)
+                if self._on_trial is not None:
+                    self._on_trial(seed, metrics)
+            trials += batch
+
+            ratio = self._worst_ratio(stats)
+            converged = ratio <= 1.0
+            if converged or trials >= self._max_trials:
+                break
+
+            # half-width ~ 1/sqrt(n), so n * ratio^2 trials should converge; at most double per batch
+            if math.isinf(ratio):
+                needed = trials
+            else:
+                needed = int(math.ceil(trials * (ratio * ratio - 1.0)))
+            batch = max(self._batch_size, min(needed, trials))
+
+        return SamplingResult(stats, trials, self._first_seed, converged, self._confidence)
+
+    def _run_batch(self, seeds):
+        if self._pool is None:
+            return [run_replication(self._trial, seed) for seed in seeds]
+        # executors return an iterator rather than a list
+        return list(self._pool.map(_run_replication_star, [(self._trial, seed) for seed in seeds]))
+
+    def _worst_ratio(self, stats):
+        """
+        :return: The largest ratio of half-width to target over all target metrics (<= 1.0 means converged)
+        """
+        worst = 0.0
+        for name, target in self._targets.items():
+            if name not in stats: raise KeyError("trial did not return target metric {}".format(name))
+            half_width = metric_half_width(stats[name], self._confidence)
+            if self._relative:
+                target = target * abs(stats[name].mean())
+            if half_width == 0.0:
+                ratio = 0.0
+            elif target <= 0.0:
+                ratio = float("inf")
+            else:
+                ratio = half_width / target
+            worst = max(worst, ratio)
+        return worst
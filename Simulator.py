@@ -23,8 +23,37 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
+import copy
 import heapq
+import os
+import pickle
+import random
 import sys
+import traceback
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+
+
+class Checkpoint(object):
+    """
+    A snapshot of the simulator state taken by `Simulator.checkpoint()`.  It is private to the
+    simulator and can be restored any number of times.
+    """
+
+    def __init__(self, time, event_count, sequence, next_event_id, random_state, state, invalid_count=0,
+                 queue_peak=0):
+        self.time = time
+        self.event_count = event_count
+        self.invalid_count = invalid_count
+        self.queue_peak = queue_peak
+        self.sequence = sequence
+        self.next_event_id = next_event_id
+        self.random_state = random_state
+        self.state = state
+
+    def __repr__(self):
+        return "{{Checkpoint: time {} event_count {} queue {}}}".format(
+            self.time, self.event_count, len(self.state["queue"]))
 
 
 class Simulator:
@@ -33,9 +62,9 @@ class Simulator:
 
     Because the Simulator should be a singleton, you can fetch the simulator instance from
     the static method `Simulator.sim()`.  This avoids having to pass the singleton everywhere.
+
+    Tracing goes through the "simulator" `Logger`, e.g. `Logger.set_level(Logger.TRACE, "simulator")`.
     """
-    VERBOSE = False
-    EXTRA_VERBOSE = False
     _sim = None
 
     def __init__(self):
@@ -44,15 +73,40 @@ class Simulator:
 
         self._time = 0
         self._event_count = 0
+        self._invalid_count = 0
+        self._queue_peak = 0
         self._stop_after_count = None
         self._stop_after_time = None
+        self._stop_before_time = None
         self._priority_queue = []
+        self._sequence = 0
         self._running = False
+        self._collectors = {}
+        self._models = []
+        self._profiler = None
+        self._monitor = None
+        self._event_hook = None
+        self._timing_wheel = None
+        self._log = Logger.get("simulator")
+        Logger.set_clock(self.time)
 
     @staticmethod
     def sim():
         return Simulator._sim
 
+    def release(self):
+        """
+        Release the singleton so a new Simulator can be created, e.g. for the next replication.
+        Log lines stop carrying this simulator's time.
+
+        :return: None
+        """
+        if Simulator._sim is self:
+            Simulator._sim = None
+        if Logger.clock() == self.time:
+            # the clock holds this simulator alive and would stamp later lines with its final time
+            Logger.set_clock(None)
+
     def time(self):
         """
         The current simulation time
@@ -60,12 +114,330 @@ class Simulator:
         """
         return self._time
 
+    def event_count(self):
+        """
+        :return: The number of valid events executed
+        """
+        return self._event_count
+
+    def queue_size(self):
+        """
+        :return: The number of entries in the event queue, including invalidated events
+        """
+        return len(self._priority_queue)
+
+    def invalid_count(self):
+        """
+        :return: The number of invalidated events popped and skipped
+        """
+        return self._invalid_count
+
+    def queue_peak(self):
+        """
+        :return: The largest the event queue has been
+        """
+        return self._queue_peak
+
+    def set_profiler(self, profiler):
+        """
+        Time every event callback with `profiler` (see `netsimpy.Profiler`), or pass None to stop.
+        The report is logged at the end of each `execute()`.  Without a profiler the event loop
+        does no extra work.
+
+        :param profiler: A Profiler or None
+        :return: None
+        """
+        self._profiler = profiler
+
+    def set_monitor(self, monitor):
+        """
+        Publish progress metrics every so many events with `monitor` (see `netsimpy.Monitor`), or pass
+        None to stop.  Without a monitor the event loop does no extra work.
+
+        :param monitor: A Monitor or None
+        :return: None
+        """
+        self._monitor = monitor
+
+    def set_event_hook(self, hook):
+        """
+        Call `hook(event)` just before each valid event fires (e.g. `netsimpy.Replay.EventRecorder`),
+        or pass None to stop.  Internal events (`Event.internal`) are not passed to the hook.  Without
+        a hook the event loop does no extra work.
+
+        :param hook: A function of the event, or None
+        :return: None
+        """
+        self._event_hook = hook
+
     def schedule(self, event):
-        expiry = self._time + event.delay
-        heapq.heappush(self._priority_queue, (expiry, event))
+        expiry = self._time + event.delay()
+        # the sequence number breaks ties in FIFO order, so events are never compared
+        self._sequence += 1
+        heapq.heappush(self._priority_queue, (expiry, self._sequence, event))
+        if len(self._priority_queue) > self._queue_peak:
+            self._queue_peak = len(self._priority_queue)
+
+        if self._log.trace_on:
+            self._log.trace("schedule({})", event)
+
+    def schedule_at(self, time, event):
+        """
+        Schedule an event at an absolute time rather than after its delay.  Use this when the
+        expiry was computed elsewhere (e.g. received from another process), so it is not
+        perturbed by floating-point round trips through a relative delay.
+
+        :param time: Absolute simulation time, not before the current time
+        :param event: The event to schedule
+        :return: None
+        """
+        if time < self._time: raise ValueError("Cannot schedule in the past: {} < {}".format(time, self._time))
+        self._sequence += 1
+        heapq.heappush(self._priority_queue, (time, self._sequence, event))
+        if len(self._priority_queue) > self._queue_peak:
+            self._queue_peak = len(self._priority_queue)
+
+        if self._log.trace_on:
+            self._log.trace("schedule_at({:>12.9f}, {})", time, event)
+
+    def set_timing_wheel(self, wheel):
+        """
+        Use `wheel` (see `netsimpy.TimingWheel`) for events scheduled with `schedule_timer()`.
+
+        :param wheel: A TimingWheel or None
+        :return: None
+        """
+        self._timing_wheel = wheel
+
+    def schedule_timer(self, event):
+        """
+        Schedule a short protocol timer that will probably be cancelled.  With a timing wheel
+        it is held in an O(1) bucket until due, otherwise it is scheduled normally.
+        Cancel it with `cancel_timer()`.
+
+        :param event: The timer event
+        :return: None
+        """
+        if self._timing_wheel is None:
+            self.schedule(event)
+        else:
+            self._timing_wheel.schedule(event)
+
+    def cancel_timer(self, event):
+        """
+        Cancel a timer from `schedule_timer()`.  Equivalent to `event.invalidate()`, but also
+        removes the timer from the timing wheel.
+
+        :param event: The timer event
+        :return: None
+        """
+        if self._timing_wheel is None:
+            event.invalidate()
+        else:
+            self._timing_wheel.cancel(event)
+
+    def next_event_time(self):
+        """
+        Discards invalid events at the head of the queue, counting them as skipped.
+
+        :return: The time of the next valid event, or None if there are none
+        """
+        queue = self._priority_queue
+        while queue:
+            if queue[0][2].is_valid():
+                return queue[0][0]
+            heapq.heappop(queue)
+            self._invalid_count += 1
+        return None
+
+    def register_collector(self, collector):
+        """
+        Register a statistics collector (see `netsimpy.stats`) so it is reset by `reset_collectors()`
+        and returned by `collectors()`.
+
+        :param collector: A named Collector
+        :return: The collector
+        """
+        if collector.name is None: raise ValueError("collector must have a name")
+        if collector.name in self._collectors: raise ValueError("Duplicate collector name: {}".format(collector.name))
+        self._collectors[collector.name] = collector
+        return collector
+
+    def collectors(self):
+        """
+        :return: A dict {name: collector} of the registered collectors
+        """
+        return dict(self._collectors)
+
+    def reset_collectors(self):
+        """
+        Reset all registered collectors, e.g. at the end of a warm-up period.
+
+        :return: None
+        """
+        for collector in self._collectors.values():
+            collector.reset()
+
+    def register(self, model):
+        """
+        Register a model object (node, channel, ...) so it is included in checkpoints.  Objects
+        reachable from registered models or from queued events are copied with them.
+
+        :param model: Any deep-copyable object
+        :return: The model
+        """
+        self._models.append(model)
+        return model
+
+    def models(self):
+        """
+        :return: The registered models, in registration order
+        """
+        return list(self._models)
+
+    def checkpoint(self):
+        """
+        Snapshot the event queue, clock, counters (events, invalidated events, queue peak), the global
+        `random` state, and deep copies of the registered models and collectors.  Events, models and collectors are copied together, so
+        references between them (e.g. an event's callback bound to a node) are preserved.  References
+        to this Simulator and to Loggers are shared, not copied.
+
+        Example, forking branches from a warmed-up state:
+
+            sim.execute_steps(warmup_events)
+            checkpoint = sim.checkpoint()
+            for branch in range(10):
+                alice, bob = sim.restore(checkpoint)
+                alice.reboot_after(...)
+                sim.execute()
+
+        :return: A Checkpoint
+        """
+        if self._running: raise RuntimeError("Cannot checkpoint while running")
+        return Checkpoint(self._time, self._event_count, self._sequence, Event._event_id, random.getstate(),
+                          self._copy_state({
+                              "queue": self._priority_queue,
+                              "models": self._models,
+                              "collectors": self._collectors,
+                              "timing_wheel": self._timing_wheel,
+                          }), self._invalid_count, self._queue_peak)
+
+    def restore(self, checkpoint):
+        """
+        Return the simulator to the state in `checkpoint`.  The checkpoint is copied, not consumed,
+        so it may be restored again.  The restored models are new objects; use the returned list
+        (or `models()`) rather than references held from before.
+
+        :param checkpoint: A Checkpoint from this simulator
+        :return: The restored models, in registration order
+        """
+        if self._running: raise RuntimeError("Cannot restore while running")
+        state = self._copy_state(checkpoint.state)
+        self._priority_queue = state["queue"]
+        self._models = state["models"]
+        self._collectors = state["collectors"]
+        self._timing_wheel = state["timing_wheel"]
+        self._time = checkpoint.time
+        self._event_count = checkpoint.event_count
+        self._invalid_count = checkpoint.invalid_count
+        self._queue_peak = checkpoint.queue_peak
+        self._sequence = checkpoint.sequence
+        Event._event_id = checkpoint.next_event_id
+        random.setstate(checkpoint.random_state)
+        return list(self._models)
+
+    def branch(self, n, mutate_fn, result_fn=None, seed=None, max_processes=None):
+        """
+        Fork `n` child processes from the current state.  Each child inherits this process image
+        copy-on-write, so nothing is serialized and memory is shared until written.  Child `i` calls
+        `mutate_fn(sim, i)` to apply its perturbation (which node reboots, which loss rate...), runs
+        the simulation to completion with `execute()`, then sends `result_fn(sim, i)` back over a pipe.
+        The parent's state is not changed.
+
+        Children inherit the parent's `random` state, so without reseeding every branch draws the
+        same numbers.  Pass `seed` to seed child i with `seed + i`, or reseed in `mutate_fn`.
+
+        Only available on platforms with `os.fork()`.  Results must be picklable.
+
+        :param n: The number of branches
+        :param mutate_fn: A function `mutate_fn(sim, i)` called in child i before it runs
+        :param result_fn: A function `result_fn(sim, i)` called in child i after it runs (default returns None)
+        :param seed: If not None, child i calls `random.seed(seed + i)` before `mutate_fn`
+        :param max_processes: The most children alive at once (default n)
+        :return: A list of the n results, in branch order
+        """
+        if not hasattr(os, "fork"): raise RuntimeError("branch() requires os.fork()")
+        if self._running: raise RuntimeError("Cannot branch while running")
+        if max_processes is None:
+            max_processes = n
+        if max_processes < 1: raise ValueError("max_processes must be positive, got {}".format(max_processes))
+
+        # don't let children inherit (and repeat) buffered output
+        Logger.flush_all()
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        results = [None] * n
+        errors = []
+        pending = []
+        for i in range(n):
+            if len(pending) >= max_processes:
+                self._join_branch(pending.pop(0), results, errors)
+            pending.append(self._fork_branch(i, mutate_fn, result_fn, seed))
+        while pending:
+            self._join_branch(pending.pop(0), results, errors)
+
+        if errors: raise RuntimeError("\n".join(errors))
+        return results
+
+    def _fork_branch(self, i, mutate_fn, result_fn, seed):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid != 0:
+            os.close(write_fd)
+            return i, pid, read_fd
+
+        # child: never return into the caller's stack
+        status = 0
+        try:
+            os.close(read_fd)
+            try:
+                if seed is not None:
+                    random.seed(seed + i)
+                mutate_fn(self, i)
+                self.execute()
+                result = result_fn(self, i) if result_fn is not None else None
+                payload = pickle.dumps((True, result), pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                payload = pickle.dumps((False, traceback.format_exc()), pickle.HIGHEST_PROTOCOL)
+            with os.fdopen(write_fd, "wb") as f:
+                f.write(payload)
+            Logger.flush_all()
+            sys.stdout.flush()
+        except BaseException:
+            status = 1
+        finally:
+            os._exit(status)
 
-        if Simulator.EXTRA_VERBOSE:
-            print "{:>12.9f} schedule({})".format(self._time, event)
+    @staticmethod
+    def _join_branch(pending, results, errors):
+        i, pid, read_fd = pending
+        with os.fdopen(read_fd, "rb") as f:
+            payload = f.read()
+        os.waitpid(pid, 0)
+
+        if not payload:
+            errors.append("branch {} exited without a result".format(i))
+            return
+        ok, result = pickle.loads(payload)
+        if ok:
+            results[i] = result
+        else:
+            errors.append("branch {} failed:\n{}".format(i, result))
+
+    def _copy_state(self, state):
+        # the memo makes references to this simulator resolve to itself instead of a copy
+        return copy.deepcopy(state, {id(self): self})
 
     def execute(self):
         self._clear_breaks()
@@ -85,67 +457,148 @@ class Simulator:
 
     def execute_duration(self, duration):
         """
+        Execute the events up to and including the current time plus `duration`.
 
         :param duration: Relative time to run in seconds (float)
         :return:
         """
         self._clear_breaks()
         self._stop_after_time = self._time + duration
+        self._execute()
+
+    def execute_until(self, end_time):
+        """
+        Execute the events strictly before `end_time`.  The clock is left at the last executed event.
+        Because this is typically called once per synchronization window, it does not log the
+        end-of-run line.
+
+        :param end_time: Absolute simulation time (float)
+        :return:
+        """
+        self._clear_breaks()
+        self._stop_before_time = end_time
+        self._execute(report=False)
+
+    def stop(self):
+        """
+        Break the current run after the event being executed, e.g. from an event callback or an event
+        hook.  The run function returns normally and the remaining events stay in the queue.
+
+        :return: None
+        """
+        self._stop_after_count = self._event_count
 
     def _clear_breaks(self):
         self._stop_after_count = None
         self._stop_after_time = None
+        self._stop_before_time = None
 
     def _check_break(self):
         result = False
 
         if self._stop_after_count is not None:
-            if self._event_count > self._stop_after_count:
+            if self._event_count >= self._stop_after_count:
                 result = True
 
         if self._stop_after_time is not None:
-            if self._time > self._stop_after_time:
+            if self._priority_queue[0][0] > self._stop_after_time:
+                result = True
+
+        if self._stop_before_time is not None:
+            if self._priority_queue[0][0] >= self._stop_before_time:
                 result = True
 
         return result
 
-    def _execute(self):
+    def _execute(self, report=True):
         if self._running: raise RuntimeError("Cannot call a run function while already running")
         self._running = True
 
+        # choose the per-event function once, so an unused profiler, monitor or hook costs nothing per event
+        if self._profiler is not None:
+            run_event = self._run_event_profiled
+        elif self._monitor is not None or self._event_hook is not None:
+            run_event = self._run_event_observed
+        else:
+            run_event = self._run_event
+
         try:
             while len(self._priority_queue) > 0:
                 # check for termination conditions
                 if self._check_break():
                     break
 
-                t, event = heapq.heappop(self._priority_queue)
+                t, _, event = heapq.heappop(self._priority_queue)
 
                 self._step_time(t)
 
-                if event.valid():
-                    self._run_event(event)
+                if event.is_valid():
+                    if event.internal:
+                        event.fire_callback()
+                    else:
+                        run_event(event)
+                else:
+                    self._invalid_count += 1
 
         except Exception as e:
             sys.stdout.flush()
-            print "Exception in Simulation execute loop"
-            print e
+            self._log.error("Exception in Simulation execute loop: {}", e)
+            Logger.flush_all()
             raise
 
-        print "{:>12.9f} simulation stopping ({} still in queue, {} total events executed)".format(
-            self._time, len(self._priority_queue), self._event_count)
+        finally:
+            self._running = False
 
-        self._running = False
+        if self._monitor is not None:
+            # a final sample, so the published metrics cover the whole run
+            self._monitor.sample(self)
+
+        if report:
+            self._log.info("simulation stopping ({} still in queue, {} total events executed, "
+                           "{} invalidated skipped, peak queue {})",
+                           len(self._priority_queue), self._event_count, self._invalid_count, self._queue_peak)
+            if self._profiler is not None:
+                self._log.info("{}", self._profiler.report())
+        Logger.flush_all()
 
     def _step_time(self, t):
-        if Simulator.EXTRA_VERBOSE:
-            print "{:>12.9f} Stepping simulation time to {:>12.9f}".format(self._time, t)
+        if self._log.trace_on:
+            self._log.trace("Stepping simulation time to {:>12.9f}", t)
 
         self._time = t
 
     def _run_event(self, event):
-        if Simulator.EXTRA_VERBOSE:
-            print "{:>12.9f} Executing event {}".format(self._time, event)
+        if self._log.trace_on:
+            self._log.trace("Executing event {}", event)
+
+        self._event_count += 1
+        event.fire_callback()
+
+    def _run_event_observed(self, event):
+        if self._log.trace_on:
+            self._log.trace("Executing event {}", event)
+
+        self._event_count += 1
+        if self._monitor is not None and self._event_count >= self._monitor.next_sample:
+            self._monitor.sample(self)
+        if self._event_hook is not None:
+            self._event_hook(event)
+        event.fire_callback()
+
+    def _run_event_profiled(self, event):
+        if self._log.trace_on:
+            self._log.trace("Executing event {}", event)
 
         self._event_count += 1
+        profiler = self._profiler
+        if self._event_count >= profiler.next_sample:
+            profiler.sample(self)
+        if self._monitor is not None and self._event_count >= self._monitor.next_sample:
+            self._monitor.sample(self)
+        if self._event_hook is not None:
+            self._event_hook(event)
+
+        clock = profiler.clock
+        start = clock()
         event.fire_callback()
+        profiler.record(event.callback(), clock() - start)
@@ -0,0 +1,242 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Rare-event estimation by multilevel splitting on simulator checkpoints
+
+import random
+from netsimpy.Simulator import Simulator
+from netsimpy.stats import RunningStats
+
+
+class SplittingResult(object):
+    """
+    The outcome of a `MultilevelSplitting` run.
+    """
+
+    def __init__(self, stats, trials, first_seed, splits, started, crossings, events, confidence):
+        self.stats = stats
+        self.trials = trials
+        self.first_seed = first_seed
+        self.splits = splits
+        self.started = started
+        self.crossings = crossings
+        self.events = events
+        self.confidence = confidence
+
+    def __repr__(self):
+        return "{{SplittingResult: trials {} events {} probability {:.6g} +/- {:.3g} levels {}}}".format(
+            self.trials, self.events, self.probability(), self.half_width(),
+            ", ".join("{}/{}".format(c, s) for c, s in zip(self.crossings, self.started)))
+
+    def probability(self):
+        """
+        :return: The unbiased estimate of the probability that a trial reaches the last level
+        """
+        return self.stats.mean()
+
+    def half_width(self):
+        """
+        :return: The confidence interval half-width of `probability()`, over independent trials
+        """
+        return self.stats.half_width(self.confidence)
+
+    def relative_error(self):
+        """
+        :return: half_width() / probability() (infinite if no trial reached the last level)
+        """
+        p = self.probability()
+        return self.half_width() / p if p > 0.0 else float("inf")
+
+    def level_probabilities(self):
+        """
+        The estimated probability of reaching each level given the previous one.  Their product is
+        `probability()`.  Splitting works best when these are all about 1/splits.
+
+        :return: A list with one entry per level
+        """
+        return [float(c) / s if s > 0 else float("nan") for c, s in zip(self.crossings, self.started)]
+
+
+class MultilevelSplitting(object):
+    """
+    Estimates the probability of a rare event, such as a node ending up NOT OK, with far fewer
+    events than plain Monte Carlo.
+
+    An `importance(sim)` function measures how close the current state is to the rare event, and
+    `levels` are increasing thresholds of it, the last one being the rare event itself.  Each trial
+    builds a fresh simulation and runs it until the importance first reaches the next level or the
+    trial ends (no more events, `end_time` or `max_events`).  At a level crossing the driver takes a
+    `Simulator.checkpoint()` and continues the trajectory as `splits` clones, each restored from the
+    checkpoint with a different seed for the global `random` module.  The clones then race towards
+    the next level in turn.  Every trajectory that reaches the last level counts 1 / (product of the
+    splits on its way), so the mean over trials is an unbiased estimate of the probability (fixed
+    splitting).  Trials are independent, so the interval comes from the per-trial estimates.
+
+    Models must be registered with `Simulator.register()` so checkpoints include them, and
+    `importance` should reach them through `sim.models()`, since restored models are new objects.
+    Randomness must come from the global `random` module, or from generators that `reseed(sim, seed)`
+    replaces in each clone; otherwise the clones repeat each other.  The driver uses the
+    Simulator's event hook to watch the importance after every event.
+
+    Choose levels so that each is reached from the previous one with probability near 1/splits;
+    `SplittingResult.level_probabilities()` shows how a pilot run did.
+
+    Example:
+        def build(sim):
+            alice = sim.register(Node(sim, "ALICE", ...))
+            bob = sim.register(Node(sim, "BOB  ", ...))
+            alice.reboot_after(10.0, 2.0)
+
+        def importance(sim):
+            alice, bob = sim.models()
+            return alice.missed_keepalives + bob.missed_keepalives
+
+        result = MultilevelSplitting(build, importance, levels=[2, 4, 6, 8], splits=5, max_events=2000).run(200)
+    """
+
+    def __init__(self, build, importance, levels, splits=10, end_time=None, max_events=None,
+                 first_seed=0, reseed=None, confidence=0.95):
+        """
+        :param build: A function `build(sim)` that creates and registers the models of one trial
+        :param importance: A function `importance(sim)` returning a number; larger is closer to the rare event
+        :param levels: Increasing importance thresholds; reaching the last one is the rare event
+        :param splits: Clones per crossing, an int or a list with one entry per level except the last
+        :param end_time: Optional simulation time at which a trajectory ends (exclusive)
+        :param max_events: Optional event count at which a trajectory ends
+        :param first_seed: The seed of the first trial
+        :param reseed: Optional `reseed(sim, seed)` called after each clone is restored
+        :param confidence: The two-sided confidence level of the interval
+        """
+        levels = list(levels)
+        if not levels: raise ValueError("levels must not be empty")
+        if any(b <= a for a, b in zip(levels, levels[1:])): raise ValueError("levels must be increasing")
+        if isinstance(splits, int):
+            splits = [splits] * (len(levels) - 1)
+        splits = list(splits)
+        if len(splits) != len(levels) - 1:
+            raise ValueError("need {} splits, got {}".format(len(levels) - 1, len(splits)))
+        if any(s < 1 for s in splits): raise ValueError("splits must be positive")
+
+        self._build = build
+        self._importance = importance
+        self._levels = levels
+        self._splits = splits
+        self._end_time = float("inf") if end_time is None else end_time
+        self._max_events = max_events
+        self._first_seed = first_seed
+        self._reseed = reseed
+        self._confidence = confidence
+
+        # the trial's simulator, the level the current trajectory is heading for, and whether it got there
+        self._sim = None
+        self._target = None
+        self._crossed = False
+
+    def run(self, trials):
+        """
+        :param trials: The number of independent trials (initial trajectories)
+        :return: A SplittingResult
+        """
+        stats = RunningStats("probability")
+        started = [0] * len(self._levels)
+        crossings = [0] * len(self._levels)
+        events = 0
+
+        weight = 1.0
+        for s in self._splits:
+            weight /= s
+
+        for trial in range(trials):
+            seed = self._first_seed + trial
+            random.seed(seed)
+            clone_rng = random.Random((seed << 16) + 1)
+            sim = self._sim = Simulator()
+            try:
+                self._build(sim)
+                sim.set_event_hook(self._check)
+                hits, trial_events = self._explore(sim, 0, clone_rng, started, crossings)
+            finally:
+                sim.release()
+                self._sim = None
+            stats.add(hits * weight)
+            events += trial_events
+
+        return SplittingResult(stats, trials, self._first_seed, list(self._splits), started, crossings,
+                               events, self._confidence)
+
+    def _explore(self, sim, level, clone_rng, started, crossings):
+        """
+        Run the current trajectory until it reaches `level` or ends, then split it.
+
+        :return: (last-level hits below this trajectory, events executed)
+        """
+        started[level] += 1
+        start_count = sim.event_count()
+        if not self._reached(sim, level):
+            self._run(sim, level)
+        events = sim.event_count() - start_count
+        if not self._crossed:
+            return 0, events
+
+        crossings[level] += 1
+        if level == len(self._levels) - 1:
+            return 1, events
+
+        hits = 0
+        checkpoint = sim.checkpoint()
+        for _ in range(self._splits[level]):
+            sim.restore(checkpoint)
+            seed = clone_rng.getrandbits(64)
+            random.seed(seed)
+            if self._reseed is not None:
+                self._reseed(sim, seed)
+            clone_hits, clone_events = self._explore(sim, level + 1, clone_rng, started, crossings)
+            hits += clone_hits
+            events += clone_events
+        return hits, events
+
+    def _reached(self, sim, level):
+        self._crossed = self._importance(sim) >= self._levels[level]
+        return self._crossed
+
+    def _run(self, sim, level):
+        self._target = self._levels[level]
+        if self._max_events is None or sim.event_count() < self._max_events:
+            sim.execute_until(self._end_time)
+        # the hook sees the state before each event, so look once more after the last one
+        if not self._crossed:
+            self._reached(sim, level)
+
+    def _check(self, event):
+        """
+        The event hook: stop the run once the importance reaches the target level or the trajectory
+        has used its event budget.
+        """
+        sim = self._sim
+        if self._importance(sim) >= self._target:
+            self._crossed = True
+            sim.stop()
+        elif self._max_events is not None and sim.event_count() >= self._max_events:
+            sim.stop()
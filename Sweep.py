@@ -0,0 +1,212 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import functools
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import netsimpy
+from netsimpy.SequentialSampler import SequentialSampler, SamplingResult
+from netsimpy.stats import RunningStats
+from netsimpy.Logger import Logger
+
+
+def expand_grid(grid):
+    """
+    Expand a parameter grid into its points.  Parameters are varied in sorted name order, with the
+    last name varying fastest.
+
+    :param grid: A dict {name: list of values}
+    :return: A list of dicts {name: value}
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+def trial_name(trial):
+    """
+    A stable identity for a trial function, for cache keys: its module and qualified name, together
+    with the arguments of a `functools.partial`.  Lambdas, nested functions and callable objects have
+    no stable name.
+
+    :param trial: The trial function
+    :return: A JSON-serializable description, or None if the trial has no stable name
+    """
+    if isinstance(trial, functools.partial):
+        function = trial_name(trial.func)
+        if function is None:
+            return None
+        return {"function": function, "args": list(trial.args), "keywords": dict(trial.keywords or {})}
+    module = getattr(trial, "__module__", None)
+    qualname = getattr(trial, "__qualname__", None)
+    if module is None or qualname is None or "<" in qualname:
+        # "<lambda>" and "f.<locals>.g" are shared by unrelated functions
+        return None
+    return "{}.{}".format(module, qualname)
+
+
+class Sweep(object):
+    """
+    Runs a `SequentialSampler` at every point of a parameter grid, caching each point's result on disk.
+
+    The trial is called as `trial(seed, **params)`.  A point's cache key is a hash of its parameters,
+    the trial's identity (see `trial_name()`, or `name`), the sampler settings (which determine the
+    seed range) and the library version, so re-running a sweep after adding grid points only computes
+    the new points, and changing the trial, seeds, targets or library version recomputes everything.
+    Parameter values must be JSON-serializable.
+
+    With a `results` ResultStore, every trial of a computed point is also stored as a row holding the
+    point's parameters, the seed and the metrics.  Cached points are not stored again.
+
+    Example:
+        sweep = Sweep(run_trial, {"loss_rate": [0.1, 0.3, 0.6], "mean_delay": [20e-6, 50e-6]},
+                      targets={"failed": 0.005}, cache_dir="sweep_cache")
+        for params, result in sweep.run():
+            print(params, result.mean("failed"))
+    """
+
+    def __init__(self, trial, grid, targets, cache_dir=None, results=None, name=None, **sampler_args):
+        """
+        :param trial: A function `trial(seed, **params)` returning a dict {metric: float}
+        :param grid: A dict {name: list of values}
+        :param targets: The half-width targets passed to each SequentialSampler
+        :param cache_dir: Directory for cached results (None disables caching)
+        :param results: Optional ResultStore for the per-trial rows (parameters must then be numbers)
+        :param name: The trial's identity in cache keys; required with `cache_dir` when `trial_name()`
+                     finds none (e.g. a lambda).  Change it when the trial changes.
+        :param sampler_args: Other SequentialSampler keyword arguments (confidence, max_trials, first_seed, pool...)
+        """
+        if name is None:
+            name = trial_name(trial)
+        if cache_dir is not None:
+            # the name only matters in cache keys
+            if name is None: raise ValueError("trial {!r} has no stable qualified name; pass name=".format(trial))
+            try:
+                json.dumps(name)
+            except TypeError:
+                raise ValueError("trial arguments must be JSON-serializable, or pass name=")
+
+        self._trial = trial
+        self._name = name
+        self._points = expand_grid(grid)
+        self._targets = dict(targets)
+        self._cache_dir = cache_dir
+        self._results = results
+        self._sampler_args = sampler_args
+        self._log = Logger.get("sweep")
+
+        if cache_dir is not None and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    def points(self):
+        return list(self._points)
+
+    def run(self):
+        """
+        :return: A list of (params, SamplingResult) in grid order
+        """
+        results = []
+        for params in self._points:
+            key = self.cache_key(params)
+            result = self._load(key)
+            if result is None:
+                self._log.info("running point {}", params)
+                trial = functools.partial(self._trial, **params)
+                result = self._sample(trial, params)
+                self._store(key, params, result)
+            else:
+                self._log.info("cached point {}", params)
+            results.append((params, result))
+        return results
+
+    def _sample(self, trial, params):
+        if self._results is None:
+            return SequentialSampler(trial, self._targets, **self._sampler_args).run()
+
+        sampler_args = dict(self._sampler_args)
+        on_trial = sampler_args.get("on_trial")
+        with self._results.writer(params) as writer:
+            def record(seed, metrics):
+                writer(seed, metrics)
+                if on_trial is not None:
+                    on_trial(seed, metrics)
+
+            sampler_args["on_trial"] = record
+            return SequentialSampler(trial, self._targets, **sampler_args).run()
+
+    def cache_key(self, params):
+        """
+        :param params: A grid point
+        :return: The hex digest identifying the point's result
+        """
+        settings = dict((name, value) for name, value in self._sampler_args.items()
+                        if name not in ("pool", "on_trial"))
+        description = {
+            "params": params,
+            "trial": self._name,
+            "targets": self._targets,
+            "sampler": settings,
+            "version": netsimpy.__version__,
+        }
+        encoded = json.dumps(description, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, key + ".json")
+
+    def _load(self, key):
+        if self._cache_dir is None:
+            return None
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as f:
+            record = json.load(f)
+        stats = dict((name, RunningStats.from_dict(state)) for name, state in record["stats"].items())
+        return SamplingResult(stats, record["trials"], record["first_seed"], record["converged"],
+                              record["confidence"])
+
+    def _store(self, key, params, result):
+        if self._cache_dir is None:
+            return
+
+        record = {
+            "params": params,
+            "trials": result.trials,
+            "first_seed": result.first_seed,
+            "converged": result.converged,
+            "confidence": result.confidence,
+            "stats": dict((name, stats.to_dict()) for name, stats in result.stats.items()),
+            "version": netsimpy.__version__,
+        }
+        # write then rename, so an interrupted sweep never leaves a partial cache entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(record, f, sort_keys=True, indent=1)
+        os.rename(tmp_path, self._path(key))
@@ -0,0 +1,130 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Simulator kernel and random generator throughput
+
+import functools
+import random
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.TimingWheel import TimingWheel
+from netsimpy.DelayGenerator import ExponentialDelay, UniformDelay
+from netsimpy.LossGenerator import UniformLoss, MarkovLoss
+
+_EVENTS = 200000
+_SAMPLES = 200000
+
+
+def _new_simulator():
+    if Simulator.sim() is not None:
+        Simulator.sim().release()
+    return Simulator()
+
+
+def hold(queue_size, events=_EVENTS):
+    """
+    The classic "hold" model: the queue is kept at `queue_size` by having every event schedule
+    one successor with a random delay.
+
+    :return: events executed
+    """
+    sim = _new_simulator()
+    expovariate = random.expovariate
+
+    def callback(event):
+        sim.schedule(Event(expovariate(1.0), callback, None))
+
+    for _ in range(queue_size):
+        sim.schedule(Event(expovariate(1.0), callback, None))
+    sim.execute_steps(events)
+    sim.release()
+    return events
+
+
+def schedule_cancel(cancel_fraction, use_wheel=False, timeout=1.0, events=_EVENTS):
+    """
+    Every event schedules a successor and a timer of about `timeout` seconds; a fraction of timers
+    are cancelled before they fire, as protocol retransmission timers usually are.  With long
+    timeouts the heap fills with cancelled timers waiting to be popped, which the wheel never holds.
+
+    :return: callbacks executed (wheel sentinels and cancelled timers are not counted)
+    """
+    sim = _new_simulator()
+    if use_wheel:
+        sim.set_timing_wheel(TimingWheel(sim, resolution=0.01))
+    rng = random.Random(1)
+    pending = []
+    executed = [0]
+
+    def timer(event):
+        executed[0] += 1
+
+    def callback(event):
+        executed[0] += 1
+        sim.schedule(Event(rng.expovariate(1.0), callback, None))
+        t = Event(rng.uniform(0.5 * timeout, 1.5 * timeout), timer, None)
+        sim.schedule_timer(t)
+        pending.append(t)
+        if rng.random() < cancel_fraction:
+            sim.cancel_timer(pending.pop(rng.randrange(len(pending))))
+        elif len(pending) > 1000:
+            del pending[0]
+
+    for _ in range(1000):
+        sim.schedule(Event(rng.expovariate(1.0), callback, None))
+    sim.execute_steps(events)
+    sim.release()
+    return executed[0]
+
+
+def generator(factory, samples=_SAMPLES):
+    """
+    :return: samples drawn
+    """
+    gen = factory()
+    next_sample = gen.next
+    for _ in range(samples):
+        next_sample()
+    return samples
+
+
+BENCHMARKS = {}
+for _size in [100, 10000, 100000]:
+    BENCHMARKS["hold_queue_{}".format(_size)] = ("events/s", functools.partial(hold, _size))
+for _fraction in [0.0, 0.5, 0.9]:
+    BENCHMARKS["schedule_cancel_{:.0f}pct".format(_fraction * 100)] = (
+        "events/s", functools.partial(schedule_cancel, _fraction))
+    BENCHMARKS["timing_wheel_cancel_{:.0f}pct".format(_fraction * 100)] = (
+        "events/s", functools.partial(schedule_cancel, _fraction, True))
+# long keepalive-style timers, nearly all cancelled: the regime the wheel is for
+for _fraction in [0.9, 0.99]:
+    BENCHMARKS["schedule_cancel_long_{:.0f}pct".format(_fraction * 100)] = (
+        "events/s", functools.partial(schedule_cancel, _fraction, timeout=30.0))
+    BENCHMARKS["timing_wheel_cancel_long_{:.0f}pct".format(_fraction * 100)] = (
+        "events/s", functools.partial(schedule_cancel, _fraction, True, timeout=30.0))
+BENCHMARKS["exponential_delay"] = ("samples/s", functools.partial(generator, lambda: ExponentialDelay(1e-6, 2e-5)))
+BENCHMARKS["uniform_delay"] = ("samples/s", functools.partial(generator, lambda: UniformDelay(0.0, 1.0)))
+BENCHMARKS["uniform_loss"] = ("samples/s", functools.partial(generator, lambda: UniformLoss(0.6)))
+BENCHMARKS["markov_loss"] = ("samples/s", functools.partial(generator, lambda: MarkovLoss(0.1, 0.5)))
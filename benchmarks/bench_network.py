@@ -0,0 +1,78 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Network model throughput
+
+import functools
+from netsimpy.Simulator import Simulator
+from netsimpy.network.Message import Message
+from netsimpy.network.Channel import FifoChannel
+from netsimpy.network.PhyLayer import SimplexSingleRate
+
+_OPERATIONS = 100000
+
+
+def message_push_pop(depth, operations=_OPERATIONS):
+    """
+    Push `depth` headers onto a message and pop them off again.
+
+    :return: header operations
+    """
+    headers = [Message(payload="header", virtual_length=8) for _ in range(depth)]
+    rounds = operations // (2 * depth)
+    for _ in range(rounds):
+        message = Message(payload="payload", virtual_length=1000)
+        for header in headers:
+            message.push_header(header)
+        while message.pop_header() is not None:
+            pass
+    return rounds * 2 * depth
+
+
+def broadcast(stations, operations=_OPERATIONS):
+    """
+    Push channel-state indications to `stations` PHYs waiting on carrier sense.
+
+    :return: deliveries
+    """
+    if Simulator.sim() is not None:
+        Simulator.sim().release()
+    sim = Simulator()
+    channel = FifoChannel()
+    for _ in range(stations):
+        channel.set_carrier_sense(SimplexSingleRate(channel, 1E6), True)
+
+    rounds = operations // stations
+    for i in range(rounds):
+        channel._broadcast_channel_state(i % 2 == 0)
+    sim.release()
+    return rounds * stations
+
+
+BENCHMARKS = {}
+for _depth in [1, 4]:
+    BENCHMARKS["message_push_pop_{}".format(_depth)] = ("headers/s", functools.partial(message_push_pop, _depth))
+for _stations in [10, 100, 1000]:
+    BENCHMARKS["broadcast_{}_stations".format(_stations)] = ("deliveries/s", functools.partial(broadcast, _stations))
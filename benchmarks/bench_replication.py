@@ -0,0 +1,122 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# End-to-end replications of a two-node sync-and-reboot scenario
+
+import functools
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.DelayGenerator import ExponentialDelay
+from netsimpy.LossGenerator import UniformLoss
+from netsimpy.SequentialSampler import SequentialSampler
+
+_RETRANSMIT = 1E-4
+_DATA_INTERVAL = 1E-4
+
+
+class SyncNode(object):
+    """
+    A stand-in for the examples' protocol node: it retransmits a hello until the peer
+    acknowledges, then sends data periodically.  `reboot_after()` drops its state for a while,
+    after which it must sync again.
+    """
+
+    def __init__(self, sim, name, delay, loss):
+        self._sim = sim
+        self.name = name
+        self._delay = delay
+        self._loss = loss
+        self._peer = None
+        self._timer = None
+        self._up = True
+        self.synced = False
+        self.received = 0
+
+    def set_peer(self, peer):
+        self._peer = peer
+        self._set_timer()
+
+    def reboot_after(self, delay, downtime):
+        self._sim.schedule(Event(delay, self._reboot, downtime))
+
+    def _reboot(self, event):
+        self._up = False
+        self.synced = False
+        if self._timer is not None:
+            self._timer.invalidate()
+        self._sim.schedule(Event(event.data(), self._boot, None))
+
+    def _boot(self, event):
+        self._up = True
+        self._set_timer()
+
+    def _set_timer(self):
+        self._timer = Event(_DATA_INTERVAL if self.synced else _RETRANSMIT, self._timeout, None)
+        self._sim.schedule(self._timer)
+
+    def _timeout(self, event):
+        self._send("data" if self.synced else "hello")
+        self._set_timer()
+
+    def _send(self, kind):
+        if not self._loss.next():
+            self._sim.schedule(Event(self._delay.next(), self._peer._receive, kind))
+
+    def _receive(self, event):
+        if not self._up:
+            return
+        kind = event.data()
+        if kind == "hello":
+            self._send("ack")
+        elif kind == "ack":
+            self.synced = True
+        else:
+            self.received += 1
+
+
+def reboot_trial(seed, events=2000):
+    sim = Simulator()
+    delay = ExponentialDelay(1E-6, 2E-5)
+    loss = UniformLoss(0.6)
+    alice = SyncNode(sim, "ALICE", delay, loss)
+    bob = SyncNode(sim, "BOB", delay, loss)
+    alice.set_peer(bob)
+    bob.set_peer(alice)
+    alice.reboot_after(0.05, 0.01)
+    sim.execute_steps(events)
+    return {"failed": 0.0 if alice.synced and bob.synced else 1.0}
+
+
+def replications(trials):
+    """
+    :return: replications run
+    """
+    SequentialSampler(reboot_trial, {"failed": 0.0}, min_trials=trials, max_trials=trials).run()
+    return trials
+
+
+BENCHMARKS = {
+    "reboot_replications": ("replications/s", functools.partial(replications, 50)),
+}
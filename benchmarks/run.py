@@ -0,0 +1,139 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+"""
+Runs the benchmark suite and writes the results as JSON.
+
+    python -m netsimpy.benchmarks.run --output results.json
+    python -m netsimpy.benchmarks.run --compare baseline.json --threshold 0.10
+
+Each benchmark reports a rate (operations per second, best of `--repeat` runs).  With `--compare`,
+any benchmark whose rate dropped by more than the threshold relative to the baseline is flagged
+and the exit status is 1.
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import platform
+import sys
+import time
+from netsimpy.Logger import Logger
+import netsimpy
+
+MODULES = ["bench_kernel", "bench_network", "bench_replication"]
+
+
+def load_benchmarks(name_filter=None):
+    """
+    :param name_filter: Only include benchmarks whose full name contains this string
+    :return: A sorted list of (name, unit, fn)
+    """
+    benchmarks = []
+    for module_name in MODULES:
+        module = importlib.import_module("netsimpy.benchmarks." + module_name)
+        for name, (unit, fn) in module.BENCHMARKS.items():
+            full_name = "{}.{}".format(module_name, name)
+            if name_filter is None or name_filter in full_name:
+                benchmarks.append((full_name, unit, fn))
+    return sorted(benchmarks)
+
+
+def measure(fn, repeat):
+    """
+    :return: The best rate over `repeat` runs (operations per second)
+    """
+    best = 0.0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        operations = fn()
+        elapsed = time.perf_counter() - start
+        best = max(best, operations / elapsed)
+    return best
+
+
+def run(name_filter=None, repeat=3):
+    results = {}
+    for name, unit, fn in load_benchmarks(name_filter):
+        rate = measure(fn, repeat)
+        results[name] = {"rate": rate, "unit": unit}
+        sys.stderr.write("{:<50} {:>14,.0f} {}\n".format(name, rate, unit))
+    return {
+        "version": netsimpy.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "benchmarks": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    :return: A list of (name, baseline rate, rate, change) for benchmarks slower by more than threshold
+    """
+    regressions = []
+    for name, result in sorted(results["benchmarks"].items()):
+        if name not in baseline["benchmarks"]:
+            continue
+        old = baseline["benchmarks"][name]["rate"]
+        change = (result["rate"] - old) / old
+        if change < -threshold:
+            regressions.append((name, old, result["rate"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="netsimpy benchmarks")
+    parser.add_argument("--output", help="write JSON results to this file (default stdout)")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (fraction)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, best is reported")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this string")
+    args = parser.parse_args(argv)
+
+    Logger.set_level(Logger.ERROR)
+    results = run(args.filter, args.repeat)
+
+    encoded = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded + "\n")
+    else:
+        sys.stdout.write(encoded + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, old, new, change in regressions:
+            sys.stderr.write("REGRESSION {}: {:,.0f} -> {:,.0f} ({:+.1%})\n".format(name, old, new, change))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
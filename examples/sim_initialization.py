@@ -25,35 +25,34 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
-import random
 import os
 import binascii
-from simulator.simulator import Simulator
+from netsimpy.Simulator import Simulator
+from netsimpy.DelayGenerator import ExponentialDelay
+from netsimpy.network.Channel_old import Channel
 from simulator.node import Node
-from simulator.delay import ExponentialDelay
-from simulator.channel import Channel
+from netsimpy.Logger import Logger
+from netsimpy.SequentialSampler import SequentialSampler
 
-repeat_count = 1000
+# Run trials until the 95% confidence interval on each failure rate is within +/- half_width,
+# at least min_trials (so rare failures have a chance to show up) and up to max_trials.
+min_trials = 500
+max_trials = 1000
+half_width = 0.01
 
-for trial in range(0, repeat_count):
-    # Set one manually...
-    #seed = "\x61\xcb\x82\x90"
+loss_rate = 0.60       # loss rate (0.0 to 1.0)
+min_delay = 0.000001   # 1 micro-second minimum delay
+mean_dealy = 0.000020  # 20 micro-second delay
 
-    seed = os.urandom(4)
-    print "random.seed() = 0x{}".format(binascii.hexlify(seed))
-    random.seed(seed)
+# Set message printing level (e.g. Logger.set_level(Logger.TRACE, "node", "ALICE"))
+Logger.set_level(Logger.INFO)
 
-    # Set message printing level
-    Simulator.EXTRA_VERBOSE = False
-    Simulator.VERBOSE = False
-    Channel.VERBOSE = False
-    Node.EXTRA_VERBOSE = False
-    Node.EXTRA_VERBOSE = False
+
+def run_trial(seed):
+    # The sampler has already called random.seed(seed)
+    print("random.seed() = {}".format(seed))
 
     sim = Simulator()
-    loss_rate = 0.60       # loss rate (0.0 to 1.0)
-    min_delay = 0.000001   # 1 micro-second minimum delay
-    mean_dealy = 0.000020  # 20 micro-second delay
 
     delay_generator = ExponentialDelay(min_delay, mean_dealy)
 
@@ -66,14 +65,26 @@ for trial in range(0, repeat_count):
     alice.set_peer(bob)
     bob.set_peer(alice)
 
-    sim.run_count(1000)
+    sim.execute_steps(1000)
 
     alice.print_stats()
     bob.print_stats()
 
-    print "trail {:6} Alice is {}, Bob is {}".format(
-        trial + 1,
+    print("seed {} Alice is {}, Bob is {}".format(
+        seed,
         "OK" if alice.data_ready else "NOT OK",
         "OK" if bob.data_ready else "NOT OK",
-    )
-    if not alice.data_ready or not bob.data_ready: raise RuntimeError("Terminated in failure mode")
\ No newline at end of file
+    ))
+    return {
+        "alice_failed": 0.0 if alice.data_ready else 1.0,
+        "bob_failed": 0.0 if bob.data_ready else 1.0,
+    }
+
+
+# Set one manually to reproduce a run...
+# first_seed = 12345
+first_seed = int(binascii.hexlify(os.urandom(4)), 16)
+
+sampler = SequentialSampler(run_trial, {"alice_failed": half_width, "bob_failed": half_width},
+                            min_trials=min_trials, max_trials=max_trials, first_seed=first_seed)
+print(sampler.run())
@@ -29,24 +29,34 @@ import random
 import os
 import sys
 import binascii
-from simulator.simulator import Simulator
+import functools
+from netsimpy.Simulator import Simulator
+from netsimpy.DelayGenerator import ExponentialDelay
+from netsimpy.network.Channel_old import Channel
 from simulator.node import Node
-from simulator.delay import ExponentialDelay
-from simulator.channel import Channel
-
-# Set message printing level
-Simulator.EXTRA_VERBOSE = False
-Simulator.VERBOSE = False
-Channel.VERBOSE = False
-Node.VERBOSE = False
-Node.EXTRA_VERBOSE = Node.VERBOSE
-
-
-repeat_count = 5000
+from netsimpy.Logger import Logger
+from netsimpy.SequentialSampler import SequentialSampler
+from netsimpy.ResultStore import ResultStore
+
+# Set message printing level, by component and optionally by node:
+#   Logger.set_level(Logger.TRACE, "simulator")
+#   Logger.set_level(Logger.DEBUG, "channel")
+#   Logger.set_level(Logger.DEBUG, "node", "BOB  ")
+Logger.set_level(Logger.INFO)
+
+
+# Each scenario runs until the 95% confidence interval on its failure rate is within +/- half_width,
+# at least min_trials (so rare failures have a chance to show up) and up to max_trials.
+min_trials = 1000
+max_trials = 5000
+half_width = 0.005
 loss_rate = 0.60
 min_delay = 0.000001  # 1 micro-second minimum delay
 mean_dealy = 0.000020  # 20 micro-second delay
 
+# Per-trial outcomes, one row per seed, for analysis without scraping the printed lines
+results = ResultStore("reboot_results")
+
 def run_trial(trial, alice_reboot_at=0.0, bob_reboot_at=0.0):
     sim = Simulator()
 
@@ -68,52 +78,47 @@ def run_trial(trial, alice_reboot_at=0.0, bob_reboot_at=0.0):
     if bob_reboot_at > 0:
         bob.reboot_after(bob_reboot_at, 2.0)
 
-    sim.run_count(2000)
+    sim.execute_steps(2000)
 
     alice.print_stats()
     bob.print_stats()
 
-    print "trail {:6} Alice is {}, Bob is {}".format(
+    print("trail {:6} Alice is {}, Bob is {}".format(
         trial,
         "OK" if alice.data_ready else "NOT OK",
         "OK" if bob.data_ready else "NOT OK",
-    )
+    ))
 
     sys.stdout.flush()
-    print ""
-    if not alice.data_ready or not bob.data_ready: raise RuntimeError("Terminated in failure mode")
+    print()
+    return {"failed": 0.0 if alice.data_ready and bob.data_ready else 1.0}
 
 def run_failure():
     # Failing simulation
     t=0
-    seed = "\xe2\xbf\x20\x27"
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
+    seed = b"\xe2\xbf\x20\x27"
+    print("trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed).decode()))
     random.seed(seed)
     run_trial(t, alice_reboot_at=10.0, bob_reboot_at=10.1)
-    exit()
+    sys.exit()
 
 #run_failure()
 
+def run_scenario(name, alice_reboot_at, bob_reboot_at):
+    print("+++ {}".format(name))
+    first_seed = int(binascii.hexlify(os.urandom(4)), 16)
+    trial = functools.partial(run_trial, alice_reboot_at=alice_reboot_at, bob_reboot_at=bob_reboot_at)
+    params = {"alice_reboot_at": alice_reboot_at, "bob_reboot_at": bob_reboot_at}
+    with results.writer(params) as writer:
+        result = SequentialSampler(trial, {"failed": half_width}, min_trials=min_trials, max_trials=max_trials,
+                                   first_seed=first_seed, on_trial=writer).run()
+    print("+++ {} {}".format(name, result))
+
 # Simulations with only Alice rebooting
-print "+++ Alice Failures"
-for t in range(1, repeat_count + 1):
-    seed = os.urandom(4)
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
-    random.seed(seed)
-    run_trial(t, alice_reboot_at=10.0, bob_reboot_at=0.0)
+run_scenario("Alice Failures", alice_reboot_at=10.0, bob_reboot_at=0.0)
 
 # Simulations with only Bob rebooting
-print "+++ Bob Failures"
-for t in range(repeat_count, 2*repeat_count + 1):
-    seed = os.urandom(4)
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
-    random.seed(seed)
-    run_trial(t, alice_reboot_at=0.0, bob_reboot_at=10.0)
+run_scenario("Bob Failures", alice_reboot_at=0.0, bob_reboot_at=10.0)
 
 # Simulations with Alice rebooting, then Bob rebooting during Alice's reboot
-print "+++ Alice and Bob Failures"
-for t in range(2*repeat_count, 3*repeat_count + 1):
-    seed = os.urandom(4)
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
-    random.seed(seed)
-    run_trial(t, alice_reboot_at=10.0, bob_reboot_at=10.1)
+run_scenario("Alice and Bob Failures", alice_reboot_at=10.0, bob_reboot_at=10.1)
@@ -28,7 +28,7 @@ import collections
 import abc
 from netsimpy.DelayGenerator import DelayGenerator
 from netsimpy.Simulator import Simulator
-from Layer import Layer
+from netsimpy.network.Layer import Layer
 from netsimpy.network import SDU
 from netsimpy.Event import Event
 
@@ -45,6 +45,13 @@ class Channel(Layer):
         """
         self._attached_phys = []
         self._layer_delay = layer_delay
+        # phys waiting on carrier sense, in subscription order
+        self._sensing = collections.OrderedDict()
+        # the last state pushed to the sensing phys
+        self._notified_busy = False
+        # the pending state notification, [busy], and when it was scheduled
+        self._notify_state = None
+        self._notify_time = None
 
     @abc.abstractmethod
     def _receive_request(self, sdu):
@@ -54,10 +61,19 @@ class Channel(Layer):
     def _receive_indication(self, sdu):
         pass
 
+    @abc.abstractmethod
+    def is_busy(self):
+        """
+        Query the channel state on demand, instead of subscribing with `set_carrier_sense()`
+
+        :return: True if the channel is busy
+        """
+        pass
+
     def attach(self, phy_layer):
         """
-        Attach the given phy layer to the chanel.  After a short delay, the phy_layer should
-        receive a `BusyIndication` or `IdleIndication` SDU
+        Attach the given phy layer to the chanel.  The phy_layer may query `is_busy()` at any time, and
+        receives `BusyIndication` or `IdleIndication` SDUs only while it is waiting on carrier sense.
 
         :param phy_layer:
         :return: None
@@ -72,6 +88,52 @@ class Channel(Layer):
         :return: None
         """
         self._attached_phys.remove(phy_layer)
+        self._sensing.pop(phy_layer, None)
+
+    def set_carrier_sense(self, phy_layer, waiting):
+        """
+        Subscribe (or unsubscribe) a phy to channel state changes, e.g. while it has a frame waiting
+        for the channel to go idle.  Only waiting phys receive state SDUs.
+
+        :param phy_layer: An attached phy
+        :param waiting: True to receive state changes, False to stop
+        :return: None
+        """
+        if waiting:
+            self._sensing[phy_layer] = True
+        else:
+            self._sensing.pop(phy_layer, None)
+
+    def _state_changed(self, busy):
+        """
+        Called by subclasses on a state transition.  Waiting phys are told the new state after the
+        layer delay, with all transitions at the same timestamp coalesced into one notification
+        (none if they cancel out).
+
+        :param busy: The new state
+        :return: None
+        """
+        sim = Simulator.sim()
+        if self._notify_state is not None and self._notify_time == sim.time():
+            self._notify_state[0] = busy
+            return
+
+        self._notify_state = [busy]
+        self._notify_time = sim.time()
+        sim.schedule(Event(self._layer_delay, self._notify_callback, self._notify_state))
+
+    def _notify_callback(self, event):
+        busy = event.data()[0]
+        if event.data() is self._notify_state:
+            self._notify_state = None
+        if busy != self._notified_busy:
+            self._notified_busy = busy
+            self._broadcast_channel_state(busy)
+
+    def _broadcast_channel_state(self, busy):
+        sdu = SDU.BUSY if busy else SDU.IDLE
+        for phy in list(self._sensing):
+            phy.receive(sdu)
 
     def _broadcast(self, sdu):
         for phy in self._attached_phys:
@@ -92,11 +154,6 @@ class FifoChannel(Channel):
     _STATE_IDLE = 1
     _STATE_TRANSMITTING = 2
 
-    def attach(self, phy_layer):
-        # Overloaded method from Channel
-        super(FifoChannel, self).attach(phy_layer)
-        self._send_to_phy(phy_layer, self._channel_state_sdu())
-
     def __init__(self, layer_delay=_default_layer_delay, delay_generator=None, loss_generator=None):
         super(FifoChannel, self).__init__(layer_delay)
         self._busy = False
@@ -109,6 +166,7 @@ class FifoChannel(Channel):
         """
         if self._busy: raise RuntimeError("Channel busy")
         self._busy = True
+        self._state_changed(True)
         self._propagate(sdu)
 
     def _receive_indication(self, sdu):
@@ -124,11 +182,5 @@ class FifoChannel(Channel):
     def _timer_callback(self, event):
         pass
 
-    def _channel_state_sdu(self):
-        if self._busy:
-            return SDU.BusyIndication()
-        else:
-            return SDU.IdleIndication()
-
-    def _broadcast_channel_state(self):
-        self._broadcast(self._channel_state_sdu())
+    def is_busy(self):
+        return self._busy
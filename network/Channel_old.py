@@ -26,10 +26,11 @@
 from netsimpy.DelayGenerator import DelayGenerator
 from netsimpy.Simulator import Simulator
 from netsimpy.Event import Event
+from netsimpy.Logger import Logger
 import random
 import collections
 import abc
-from Layer import Layer
+from netsimpy.network.Layer import Layer
 
 
 class Channel(Layer):
@@ -38,8 +39,9 @@ class Channel(Layer):
      drawn from a delay function and a given drop rate (drops happen after the delay).
 
      The output queue will have at most 1 timer running for the head-of-line message.
+
+     Tracing goes through the "channel" `Logger` at DEBUG level.
     """
-    VERBOSE = False
 
     def __init__(self, sim, delay_generator, loss_rate):
         if not isinstance(sim, Simulator): raise TypeError("sim must be Simulator")
@@ -51,6 +53,7 @@ class Channel(Layer):
         self._loss_rate = loss_rate
         self._queue = collections.deque()
         self._pending_event = None
+        self._log = Logger.get("channel")
 
     def _receive_request(self, sdu):
         """
@@ -74,13 +77,13 @@ class Channel(Layer):
         """
         self._queue.clear()
         if self._pending_event is not None:
-            self._pending_event.set_inactive()
+            self._pending_event.invalidate()
             self._pending_event = None
 
     def _set_timer(self):
         delay = self._delay.next()
-        if Channel.VERBOSE:
-            print "{:>12.9f} CHANNEL start timer delay {}".format(self._sim.time(), delay)
+        if self._log.debug_on:
+            self._log.debug("start timer delay {}", delay)
 
         event = Event(delay, self._queue_timer, None)
         self._pending_event = event
@@ -90,7 +93,7 @@ class Channel(Layer):
         if len(self._queue) == 0: raise RuntimeError("Queue timer fired with zero events in queue")
         self._pending_event = None
 
-        peer, message = self._queue.pop()
+        peer, message = self._queue.popleft()
         self._send_with_loss(peer, message)
         if len(self._queue) > 0:
             self._set_timer()
@@ -100,5 +103,5 @@ class Channel(Layer):
         if r < (1.0 - self._loss_rate):
             peer.receive(message)
         else:
-            if Channel.VERBOSE:
-                print "{:>12.9f} CHANNEL message dropped to peer {} message {}".format(self._sim.time(), peer, message)
+            if self._log.debug_on:
+                self._log.debug("message dropped to peer {} message {}", peer, message)
@@ -25,11 +25,10 @@
 
 
 import abc
-import SDU
+from netsimpy.network import SDU
 
 
-class Layer(object):
-    __metaclass__ = abc.ABCMeta
+class Layer(metaclass=abc.ABCMeta):
 
     def receive(self, sdu):
         if isinstance(sdu, SDU.Request):
@@ -0,0 +1,310 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import collections
+import random
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+from netsimpy.network.Layer import Layer
+from netsimpy.network import SDU
+
+
+class DropTailQueue(object):
+    """
+    Admit frames while fewer than `capacity` are waiting or being transmitted.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1: raise ValueError("capacity must be positive")
+        self._capacity = capacity
+
+    def capacity(self):
+        return self._capacity
+
+    def admit(self, occupancy, idle_time):
+        """
+        :param occupancy: Frames queued or in transmission, not counting the new one
+        :param idle_time: Seconds the queue has been empty (0 if not empty)
+        :return: True to enqueue the frame, False to drop it
+        """
+        return occupancy < self._capacity
+
+
+class RedQueue(DropTailQueue):
+    """
+    Random Early Detection (Floyd & Jacobson 1993).  Tracks an exponentially weighted average
+    of the occupancy and drops early with a probability that grows linearly from 0 at
+    `min_threshold` to `max_probability` at `max_threshold`, above which every frame is dropped.
+    Frames are also dropped when the queue is full.
+    """
+
+    def __init__(self, capacity, min_threshold, max_threshold, max_probability=0.1, weight=0.002,
+                 frame_time=None, rng=None):
+        """
+        :param capacity: The hard limit on frames
+        :param min_threshold: Average occupancy at which early drops start
+        :param max_threshold: Average occupancy at which every frame is dropped
+        :param max_probability: Drop probability just below `max_threshold`
+        :param weight: EWMA weight of each new occupancy sample
+        :param frame_time: Typical transmission time, used to decay the average while idle (None to not decay)
+        :param rng: A random.Random (default one seeded from the global generator)
+        """
+        super(RedQueue, self).__init__(capacity)
+        if not (0 <= min_threshold < max_threshold): raise ValueError("0 <= min_threshold < max_threshold")
+        if not (0.0 < weight <= 1.0): raise ValueError("0.0 < weight <= 1.0")
+
+        self._min = min_threshold
+        self._max = max_threshold
+        self._max_probability = max_probability
+        self._weight = weight
+        self._frame_time = frame_time
+        # a generator of its own, so checkpoints can copy it and runs seeded with random.seed() repeat
+        self._rng = random.Random(random.getrandbits(64)) if rng is None else rng
+        self._average = 0.0
+        # frames admitted since the last drop, which spreads drops out evenly
+        self._count = -1
+
+    def average(self):
+        return self._average
+
+    def admit(self, occupancy, idle_time):
+        if occupancy == 0 and idle_time > 0.0 and self._frame_time:
+            # as if the average had been updated by the small frames that could have been sent
+            self._average *= (1.0 - self._weight) ** (idle_time / self._frame_time)
+        else:
+            self._average += self._weight * (occupancy - self._average)
+
+        if occupancy >= self._capacity or self._average >= self._max:
+            self._count = 0
+            return False
+        if self._average < self._min:
+            self._count = -1
+            return True
+
+        self._count += 1
+        probability = self._max_probability * (self._average - self._min) / (self._max - self._min)
+        if self._count * probability < 1.0:
+            probability /= 1.0 - self._count * probability
+        else:
+            probability = 1.0
+        if self._rng.random() < probability:
+            self._count = 0
+            return False
+        return True
+
+
+class PointToPointLink(Layer):
+    """
+    A simplex link with finite bandwidth, fixed propagation delay, and a bounded output queue.
+    Send a frame by passing a `Request` whose payload is a `Message`; the peer receives an
+    `Indication` with the same payload.
+
+    Because bandwidth and propagation delay are fixed, each frame's departure and arrival times
+    are known when it is enqueued, so the link computes them directly instead of running a
+    transmit timer.  Frames in flight wait in a FIFO pipe and the link keeps a single event in
+    the simulator for the head of the pipe, so a link with a large bandwidth-delay product adds
+    one event per delivered frame and one heap entry, not one per frame in flight.
+
+    Background cross-traffic can be modeled as fluid with `set_background_rate()`.  The link then
+    tracks its unfinished work in bits, which grows at the total background rate and drains at
+    the bandwidth, and updates it only when a rate changes or a frame is sent.  A frame (the
+    foreground traffic) waits behind all of that work in FIFO order, so it sees the queueing delay of the
+    background load without any background packets or events being simulated.  Queue admission
+    counts foreground frames only.
+
+    Drops go through the "link" `Logger` at DEBUG level.
+    """
+
+    def __init__(self, sim, bandwidth, propagation_delay, queue=None, peer=None):
+        """
+        :param sim: The simulator
+        :param bandwidth: bits per second
+        :param propagation_delay: seconds from the end of transmission to the end of reception
+        :param queue: A DropTailQueue or RedQueue (default unbounded)
+        :param peer: The receiving layer, may be set later with `connect()`
+        """
+        if not isinstance(sim, Simulator): raise TypeError("sim must be Simulator")
+        if bandwidth <= 0.0: raise ValueError("bandwidth must be positive")
+        if propagation_delay < 0.0: raise ValueError("propagation_delay must be non-negative")
+
+        self._sim = sim
+        self._bandwidth = float(bandwidth)
+        self._propagation_delay = propagation_delay
+        self._queue = queue
+        self._peer = peer
+        # departure times of frames still queued or transmitting, in order
+        self._backlog = collections.deque()
+        # the time the last foreground frame departs
+        self._free_at = 0.0
+        # unfinished work (bits) as of _work_time, and the fluid rates (bits per second) feeding it
+        self._work = 0.0
+        self._work_time = 0.0
+        self._background = {}
+        self._background_rate = 0.0
+        # (arrival time, payload) of frames not yet delivered, in order
+        self._pipe = collections.deque()
+        self._pending_event = None
+        self._sent = 0
+        self._dropped = 0
+        self._delivered = 0
+        self._log = Logger.get("link")
+
+    def __repr__(self):
+        return "{{PointToPointLink: bw {} delay {} queued {} in flight {}}}".format(
+            self._bandwidth, self._propagation_delay, len(self._backlog), len(self._pipe))
+
+    def connect(self, peer):
+        self._peer = peer
+
+    def occupancy(self):
+        """
+        :return: The number of frames queued or being transmitted
+        """
+        self._expire_backlog(self._sim.time())
+        return len(self._backlog)
+
+    def in_flight(self):
+        """
+        :return: The number of frames sent but not yet delivered (including queued frames)
+        """
+        return len(self._pipe)
+
+    def set_background_rate(self, flow, rate):
+        """
+        Set the fluid rate of a background flow from now on.  Call again whenever the flow's rate
+        changes; a rate of 0 removes the flow.
+
+        :param flow: Any hashable flow identifier
+        :param rate: bits per second
+        """
+        if rate < 0.0: raise ValueError("rate must be non-negative")
+        self._advance(self._sim.time())
+        if rate > 0.0:
+            self._background[flow] = rate
+        else:
+            self._background.pop(flow, None)
+        self._background_rate = sum(self._background.values())
+
+    def background_rate(self):
+        """
+        :return: The total fluid rate of all background flows (bits per second)
+        """
+        return self._background_rate
+
+    def backlog(self):
+        """
+        :return: The unfinished work (bits), background and foreground, that a new frame would wait behind
+        """
+        self._advance(self._sim.time())
+        return self._work
+
+    def sent(self):
+        return self._sent
+
+    def dropped(self):
+        return self._dropped
+
+    def delivered(self):
+        return self._delivered
+
+    def _receive_request(self, sdu):
+        self.send(sdu.payload)
+
+    def _receive_indication(self, sdu):
+        raise RuntimeError("Should never receive an indication at the link")
+
+    def send(self, message):
+        """
+        Enqueue a frame for transmission, or drop it if the queue refuses it.
+
+        :param message: A Message (its `message_length()` in octets sets the transmission time)
+        :return: True if queued, False if dropped
+        """
+        if self._peer is None: raise RuntimeError("link is not connected")
+        now = self._sim.time()
+        self._expire_backlog(now)
+
+        if self._queue is not None:
+            idle_time = now - self._free_at if not self._backlog else 0.0
+            if not self._queue.admit(len(self._backlog), idle_time):
+                self._dropped += 1
+                if self._log.debug_on:
+                    self._log.debug("drop occupancy {} message {}", len(self._backlog), message)
+                return False
+
+        self._advance(now)
+        self._work += message.message_length() * 8
+        departure = now + self._work / self._bandwidth
+        self._free_at = departure
+        self._backlog.append(departure)
+        self._pipe.append((departure + self._propagation_delay, message))
+        self._sent += 1
+        if self._pending_event is None:
+            self._arm(now)
+        return True
+
+    def clear(self):
+        """
+        Discard every queued and in-flight frame.
+        """
+        self._backlog.clear()
+        self._pipe.clear()
+        self._free_at = self._sim.time()
+        self._work = 0.0
+        self._work_time = self._free_at
+        if self._pending_event is not None:
+            self._pending_event.invalidate()
+            self._pending_event = None
+
+    def _advance(self, now):
+        # work grows at the background rate and drains at the bandwidth; between rate changes
+        # the slope is constant, so the only nonlinearity is the floor at an empty queue
+        if now != self._work_time:
+            work = self._work + (self._background_rate - self._bandwidth) * (now - self._work_time)
+            self._work = work if work > 0.0 else 0.0
+            self._work_time = now
+
+    def _expire_backlog(self, now):
+        backlog = self._backlog
+        while backlog and backlog[0] <= now:
+            backlog.popleft()
+
+    def _arm(self, now):
+        arrival = self._pipe[0][0]
+        event = Event(arrival - now, self._deliver, None)
+        self._pending_event = event
+        self._sim.schedule_at(arrival, event)
+
+    def _deliver(self, event):
+        self._pending_event = None
+        now = self._sim.time()
+        pipe = self._pipe
+        peer = self._peer
+        while pipe and pipe[0][0] <= now:
+            self._delivered += 1
+            peer.receive(SDU.Indication(pipe.popleft()[1]))
+        if pipe:
+            self._arm(now)
@@ -32,7 +32,6 @@ class MacLayer(Layer):
     """
     Abstract model of a MAC layer
     """
-    __metaclass__ = abc.ABCMeta
 
     def __init__(self, phy_layer):
         self._phy = phy_layer
@@ -0,0 +1,496 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Node mobility.  Requires NumPy.
+
+import abc
+import collections
+import math
+import random
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+
+
+def _now():
+    return Simulator.sim().time()
+
+
+class MobilityModel(metaclass=abc.ABCMeta):
+    """
+    Node movement as piecewise-linear legs, so a position is an analytic function of time and
+    nothing is scheduled to move the nodes.  The current leg of every node is held in arrays, and
+    `positions()` evaluates all nodes in one NumPy expression, cached for the current timestamp.
+    A subclass supplies the legs through `_initial_position()` and `_next_leg()`, which are asked
+    for only when a node's current leg has ended.
+
+    Each node draws from its own random.Random, so a node's path does not depend on when or in
+    what order the positions are read.  Times must not go backwards, but `upcoming_leg()` can look
+    ahead.
+    """
+
+    def __init__(self, count, seed=None):
+        """
+        :param count: The number of nodes
+        :param seed: Seed of the per-node generators (default drawn from `random`)
+        """
+        import numpy
+
+        if seed is None:
+            seed = random.getrandbits(32)
+        self._count = count
+        self._rngs = [random.Random((seed << 16) + node) for node in range(count)]
+        # the current leg of each node: it starts at _start at (_x, _y), moves at (_vx, _vy) and ends at _end
+        self._start = numpy.zeros(count)
+        self._x = numpy.zeros(count)
+        self._y = numpy.zeros(count)
+        self._vx = numpy.zeros(count)
+        self._vy = numpy.zeros(count)
+        self._end = numpy.zeros(count)
+        # legs generated ahead of the current one (see `upcoming_leg()`), as (start, x, y, vx, vy, end)
+        self._future = [collections.deque() for _ in range(count)]
+        self._time = 0.0
+        self._cache_time = None
+        self._cache = None
+
+    def _initialize(self):
+        # called at the end of a subclass __init__, once it can produce legs
+        for node in range(self._count):
+            x, y = self._initial_position(node)
+            self._set_leg(node, self._generate(node, 0.0, x, y))
+
+    @abc.abstractmethod
+    def _initial_position(self, node):
+        """
+        :return: (x, y) of the node at time 0
+        """
+        pass
+
+    @abc.abstractmethod
+    def _next_leg(self, node, start, x, y):
+        """
+        The node's next leg, starting at time `start` at (x, y).
+
+        :return: (duration, vx, vy); the duration may be inf
+        """
+        pass
+
+    def __len__(self):
+        return self._count
+
+    def _generate(self, node, start, x, y):
+        duration, vx, vy = self._next_leg(node, start, x, y)
+        return start, x, y, vx, vy, start + duration
+
+    def _following(self, node, leg):
+        # the leg after `leg`, drawn once and then remembered
+        start, x, y, vx, vy, end = leg
+        elapsed = end - start
+        return self._generate(node, end, x + vx * elapsed, y + vy * elapsed)
+
+    def _current(self, node):
+        return (float(self._start[node]), float(self._x[node]), float(self._y[node]),
+                float(self._vx[node]), float(self._vy[node]), float(self._end[node]))
+
+    def _set_leg(self, node, leg):
+        self._start[node], self._x[node], self._y[node], self._vx[node], self._vy[node], self._end[node] = leg
+
+    def upcoming_leg(self, node, start):
+        """
+        Look ahead at a node's path without moving it: the leg that begins at `start`, which must be
+        the end of the current leg or of one returned earlier.  The leg becomes current when
+        the time reaches it.
+
+        :return: (start, x, y, vx, vy, end)
+        """
+        if self._start[node] == start:
+            return self._current(node)
+        future = self._future[node]
+        for leg in future:
+            if leg[0] == start:
+                return leg
+        leg = future[-1] if future else self._current(node)
+        while leg[5] <= start:
+            leg = self._following(node, leg)
+            future.append(leg)
+        if leg[0] != start: raise ValueError("no leg of node {} starts at {}".format(node, start))
+        return leg
+
+    def advance(self, time):
+        """
+        Move every node whose leg has ended by `time` onto its current leg.
+
+        :return: The int array of nodes that changed legs
+        """
+        import numpy
+
+        if time < self._time: raise ValueError("time went backwards: {} < {}".format(time, self._time))
+        self._time = time
+        changed = numpy.flatnonzero(self._end <= time)
+        for node in changed.tolist():
+            future = self._future[node]
+            while self._end[node] <= time:
+                self._set_leg(node, future.popleft() if future else self._following(node, self._current(node)))
+        return changed
+
+    def legs(self):
+        """
+        :return: The current legs as arrays (start, x, y, vx, vy, end); read only
+        """
+        return self._start, self._x, self._y, self._vx, self._vy, self._end
+
+    def positions(self, time=None):
+        """
+        :param time: The time (default now)
+        :return: A read-only float64 array [node, 2] of positions
+        """
+        import numpy
+
+        if time is None:
+            time = _now()
+        if time == self._cache_time:
+            return self._cache
+
+        self.advance(time)
+        elapsed = time - self._start
+        positions = numpy.column_stack((self._x + self._vx * elapsed, self._y + self._vy * elapsed))
+        positions.flags.writeable = False
+        self._cache_time = time
+        self._cache = positions
+        return positions
+
+    def position(self, node, time=None):
+        """
+        :return: (x, y) of one node
+        """
+        x, y = self.positions(time)[node]
+        return float(x), float(y)
+
+
+def _area(size):
+    try:
+        width, height = size
+    except TypeError:
+        width = height = size
+    return float(width), float(height)
+
+
+class RandomWaypoint(MobilityModel):
+    """
+    Each node picks a uniformly random destination in the area and moves to it at a uniformly
+    random speed, then pauses.
+    """
+
+    def __init__(self, count, size, min_speed, max_speed, pause=0.0, seed=None):
+        """
+        :param size: The side of a square area, or (width, height)
+        :param min_speed: Minimum speed (units per second), must be positive
+        :param max_speed: Maximum speed
+        :param pause: Seconds to wait at each destination
+        """
+        super(RandomWaypoint, self).__init__(count, seed)
+        if not 0.0 < min_speed <= max_speed: raise ValueError("0.0 < min_speed <= max_speed")
+        self._width, self._height = _area(size)
+        self._min_speed = min_speed
+        self._max_speed = max_speed
+        self._pause = pause
+        self._moving = [False] * count
+        self._initialize()
+
+    def _initial_position(self, node):
+        rng = self._rngs[node]
+        return rng.uniform(0.0, self._width), rng.uniform(0.0, self._height)
+
+    def _next_leg(self, node, start, x, y):
+        if self._moving[node] and self._pause > 0.0:
+            self._moving[node] = False
+            return self._pause, 0.0, 0.0
+
+        rng = self._rngs[node]
+        dx = rng.uniform(0.0, self._width) - x
+        dy = rng.uniform(0.0, self._height) - y
+        speed = rng.uniform(self._min_speed, self._max_speed)
+        distance = math.hypot(dx, dy)
+        self._moving[node] = True
+        if distance == 0.0:
+            return 0.0, 0.0, 0.0
+        return distance / speed, dx * speed / distance, dy * speed / distance
+
+
+class GaussMarkov(MobilityModel):
+    """
+    Gauss-Markov mobility (Liang & Haas 1999): every `interval` the speed and direction are
+    updated as s = alpha s + (1 - alpha) mean + sqrt(1 - alpha^2) N(0, sigma).  Near an edge the
+    mean direction points to the center of the area (Camp et al. 2002), and a node that reaches an
+    edge reflects off it.
+    """
+
+    def __init__(self, count, size, mean_speed, alpha=0.75, interval=1.0, speed_sigma=None,
+                 direction_sigma=math.pi / 4, margin=None, seed=None):
+        """
+        :param size: The side of a square area, or (width, height)
+        :param mean_speed: The long-run mean speed
+        :param alpha: Memory, 0 (random) to 1 (constant velocity)
+        :param interval: Seconds between updates
+        :param speed_sigma: Speed standard deviation (default mean_speed / 4)
+        :param direction_sigma: Direction standard deviation (radians)
+        :param margin: Distance from an edge at which to turn toward the center (default 10% of the area)
+        """
+        super(GaussMarkov, self).__init__(count, seed)
+        if not 0.0 <= alpha <= 1.0: raise ValueError("0.0 <= alpha <= 1.0")
+        if interval <= 0.0: raise ValueError("interval must be positive")
+        self._width, self._height = _area(size)
+        self._mean_speed = mean_speed
+        self._alpha = alpha
+        self._interval = interval
+        self._speed_sigma = mean_speed / 4.0 if speed_sigma is None else speed_sigma
+        self._direction_sigma = direction_sigma
+        self._margin = 0.1 * min(self._width, self._height) if margin is None else margin
+        self._speed = [mean_speed] * count
+        self._direction = [self._rngs[node].uniform(-math.pi, math.pi) for node in range(count)]
+        # the time of the node's next speed and direction update
+        self._update = [0.0] * count
+        self._initialize()
+
+    def _initial_position(self, node):
+        rng = self._rngs[node]
+        return rng.uniform(0.0, self._width), rng.uniform(0.0, self._height)
+
+    def _next_leg(self, node, start, x, y):
+        if start >= self._update[node]:
+            self._update[node] = start + self._interval
+            self._draw(node, x, y)
+
+        speed = self._speed[node]
+        vx = speed * math.cos(self._direction[node])
+        vy = speed * math.sin(self._direction[node])
+        duration = self._update[node] - start
+
+        # reflect off an edge rather than leave the area
+        hit, wall_x = float("inf"), False
+        if vx > 0.0:
+            hit, wall_x = (self._width - x) / vx, True
+        elif vx < 0.0:
+            hit, wall_x = -x / vx, True
+        if vy > 0.0 and (self._height - y) / vy < hit:
+            hit, wall_x = (self._height - y) / vy, False
+        elif vy < 0.0 and -y / vy < hit:
+            hit, wall_x = -y / vy, False
+        if hit < duration:
+            direction = self._direction[node]
+            self._direction[node] = math.pi - direction if wall_x else -direction
+            return max(hit, 0.0), vx, vy
+        return duration, vx, vy
+
+    def _draw(self, node, x, y):
+        rng = self._rngs[node]
+        alpha = self._alpha
+        noise = math.sqrt(1.0 - alpha * alpha)
+
+        direction = self._direction[node]
+        mean_direction = direction
+        if (x < self._margin or x > self._width - self._margin or
+                y < self._margin or y > self._height - self._margin):
+            mean_direction = math.atan2(self._height / 2.0 - y, self._width / 2.0 - x)
+            # turn the short way round
+            mean_direction = direction + (mean_direction - direction + math.pi) % (2.0 * math.pi) - math.pi
+
+        speed = alpha * self._speed[node] + (1.0 - alpha) * self._mean_speed + noise * rng.gauss(0.0, self._speed_sigma)
+        self._speed[node] = max(speed, 0.0)
+        self._direction[node] = (alpha * direction + (1.0 - alpha) * mean_direction +
+                                 noise * rng.gauss(0.0, self._direction_sigma))
+
+
+class TraceMobility(MobilityModel):
+    """
+    Moves each node in a straight line between timed waypoints.  A node stays at its first
+    waypoint until that time and at its last one afterwards.
+    """
+
+    def __init__(self, waypoints):
+        """
+        :param waypoints: A list, one per node, of time-ordered (time, x, y)
+        """
+        super(TraceMobility, self).__init__(len(waypoints), seed=0)
+        self._waypoints = [list(points) for points in waypoints]
+        if not all(self._waypoints): raise ValueError("every node needs at least one waypoint")
+        self._cursor = [0] * self._count
+        self._initialize()
+
+    @staticmethod
+    def load(path):
+        """
+        Read a text trace of `node time x y` lines (nodes numbered from 0).
+
+        :return: A TraceMobility
+        """
+        waypoints = collections.defaultdict(list)
+        with open(path) as trace:
+            for line in trace:
+                fields = line.split()
+                if not fields or fields[0].startswith("#"):
+                    continue
+                waypoints[int(fields[0])].append((float(fields[1]), float(fields[2]), float(fields[3])))
+        count = max(waypoints) + 1 if waypoints else 0
+        return TraceMobility([sorted(waypoints[node]) for node in range(count)])
+
+    def _initial_position(self, node):
+        _, x, y = self._waypoints[node][0]
+        return x, y
+
+    def _next_leg(self, node, start, x, y):
+        points = self._waypoints[node]
+        cursor = self._cursor[node]
+        while cursor < len(points) and points[cursor][0] <= start:
+            cursor += 1
+        self._cursor[node] = cursor + 1
+        if cursor >= len(points):
+            return float("inf"), 0.0, 0.0
+        time, target_x, target_y = points[cursor]
+        duration = time - start
+        return duration, (target_x - x) / duration, (target_y - y) / duration
+
+
+class NeighborTracker(object):
+    """
+    Tracks which pairs of nodes are within `radius` of each other and calls
+    `callback(node_a, node_b, in_range)` when a pair crosses the boundary.
+
+    For every pair the next crossing time is solved from the current legs (a quadratic in time),
+    and only the earliest crossing is scheduled as an event.  The tracker follows the model's legs
+    ahead of time with `upcoming_leg()`, recomputing only the row of crossing times of a node that
+    changes legs, so velocity changes between crossings cost no events.  Memory is
+    O(nodes^2), which suits up to a few thousand nodes.
+    """
+
+    def __init__(self, model, radius, callback, sim=None):
+        self._model = model
+        self._radius = radius
+        self._callback = callback
+        self._sim = Simulator.sim() if sim is None else sim
+        self._legs = None
+        self._in_range = None
+        self._crossing = None
+        self._pending_event = None
+
+    def neighbors(self, node):
+        """
+        :return: The int array of nodes currently in range of `node`
+        """
+        import numpy
+
+        return numpy.flatnonzero(self._in_range[node])
+
+    def in_range(self, a, b):
+        return bool(self._in_range[a, b])
+
+    def start(self):
+        """
+        Compute the current neighbor sets (without callbacks) and schedule the first crossing.
+        """
+        import numpy
+
+        now = self._sim.time()
+        positions = self._model.positions(now)
+        # the tracker's own copy of the legs, which runs ahead of the model's
+        self._legs = [array.copy() for array in self._model.legs()]
+        difference = positions[:, None, :] - positions[None, :, :]
+        self._in_range = (difference * difference).sum(axis=2) < self._radius * self._radius
+        numpy.fill_diagonal(self._in_range, False)
+        self._crossing = numpy.full(self._in_range.shape, numpy.inf)
+        self._update_rows(numpy.arange(len(self._model)), now)
+        self._schedule(now)
+
+    def stop(self):
+        if self._pending_event is not None:
+            self._pending_event.invalidate()
+            self._pending_event = None
+
+    def _update_rows(self, rows, now):
+        # next crossing time of every pair involving `rows`, given the legs
+        import numpy
+
+        if not len(rows):
+            return
+        start, x, y, vx, vy, _ = self._legs
+        px = x + vx * (now - start)
+        py = y + vy * (now - start)
+        dx = px[rows, None] - px[None, :]
+        dy = py[rows, None] - py[None, :]
+        dvx = vx[rows, None] - vx[None, :]
+        dvy = vy[rows, None] - vy[None, :]
+
+        a = dvx * dvx + dvy * dvy
+        b = 2.0 * (dx * dvx + dy * dvy)
+        c = dx * dx + dy * dy - self._radius * self._radius
+        discriminant = b * b - 4.0 * a * c
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            root = numpy.sqrt(numpy.maximum(discriminant, 0.0))
+            leave = (-b + root) / (2.0 * a)
+            enter = (-b - root) / (2.0 * a)
+        # a pair in range leaves at the later root; one out of range and approaching enters at the earlier
+        # root (requiring approach keeps a pair that just left from re-entering on rounding)
+        delay = numpy.where(self._in_range[rows], numpy.maximum(leave, 0.0),
+                            numpy.where((discriminant > 0.0) & (b < 0.0), enter, numpy.inf))
+        crossing = numpy.where(a > 0.0, now + delay, numpy.inf)
+        crossing[numpy.arange(len(rows)), rows] = numpy.inf
+        self._crossing[rows, :] = crossing
+        self._crossing[:, rows] = crossing.T
+
+    def _schedule(self, now):
+        import numpy
+
+        end = self._legs[5]
+        while True:
+            index = int(numpy.argmin(self._crossing))
+            crossing = self._crossing.flat[index]
+            leg_end = end.min()
+            if crossing <= leg_end or leg_end == numpy.inf:
+                break
+            # velocities change before the next crossing: follow the model ahead
+            changed = numpy.flatnonzero(end == leg_end)
+            for node in changed.tolist():
+                leg = self._model.upcoming_leg(node, leg_end)
+                for array, value in zip(self._legs, leg):
+                    array[node] = value
+            self._update_rows(changed, leg_end)
+
+        if crossing == numpy.inf:
+            return
+        event = Event(crossing - now, self._cross, None)
+        self._pending_event = event
+        self._sim.schedule_at(crossing, event)
+
+    def _cross(self, event):
+        import numpy
+
+        self._pending_event = None
+        now = self._sim.time()
+        a, b = numpy.nonzero(numpy.triu(self._crossing <= now, 1))
+        self._in_range[a, b] = ~self._in_range[a, b]
+        self._in_range[b, a] = self._in_range[a, b]
+        self._update_rows(numpy.union1d(a, b), now)
+        for node_a, node_b in zip(a.tolist(), b.tolist()):
+            self._callback(node_a, node_b, bool(self._in_range[node_a, node_b]))
+        self._schedule(now)
@@ -0,0 +1,309 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Struct-of-arrays node state.  Requires NumPy.
+
+import abc
+import random
+from netsimpy.Simulator import Simulator
+from netsimpy.network.MacLayer import MacLayer
+from netsimpy.network.PhyLayer import PhyLayer
+
+
+class NodeArray(metaclass=abc.ABCMeta):
+    """
+    Per-node MAC and PHY state for a population of nodes, held as one NumPy array per field
+    instead of attributes spread across thousands of layer objects.  Population-wide updates
+    (advance every backoff counter, draw new backoffs for the nodes that collided) are then
+    single vectorized operations.
+
+    Nodes still plug into the layered model through `MacProxy` and `PhyProxy`, thin `Layer`
+    objects that forward SDUs to `mac_request()`, `mac_indication()`, `phy_request()` and
+    `phy_indication()` with the node index.  NodeArray is abstract; subclasses implement those.
+
+    Example:
+        nodes = CsmaNodes(1000)
+        for index in range(len(nodes)):
+            phy = PhyProxy(nodes, index, channel)
+            mac = MacProxy(nodes, index, phy)
+        expired = nodes.decrement_backoff()
+    """
+
+    # name: (dtype, initial value)
+    FIELDS = {
+        "backoff": ("int32", 0),
+        "contention_window": ("int32", 15),
+        "retries": ("int32", 0),
+        "queue_length": ("int32", 0),
+        "data_rate": ("float64", 0.0),
+        "radio_state": ("int8", PhyLayer.IDLE),
+        "state_since": ("float64", 0.0),
+    }
+
+    def __init__(self, count, fields=None, seed=None):
+        """
+        :param count: The number of nodes
+        :param fields: Optional {name: (dtype, initial value)} to add to or override FIELDS
+        :param seed: NumPy seed for backoff draws (default drawn from `random`)
+        """
+        import numpy
+
+        if count < 0: raise ValueError("count must be non-negative")
+        self._count = count
+        self._fields = {}
+        # each field's initial value, after `fields` overrides, for resets
+        self._initial = {}
+        definitions = dict(self.FIELDS)
+        if fields is not None:
+            definitions.update(fields)
+        for name, (dtype, initial) in definitions.items():
+            self.add_field(name, dtype, initial)
+
+        # seconds spent in each radio state and the watts drawn in each, [node, radio state]
+        states = len(PhyLayer.RADIO_STATES)
+        self._state_times = numpy.zeros((count, states), dtype=numpy.float64)
+        self._power = numpy.tile(numpy.array(PhyLayer.POWER, dtype=numpy.float64), (count, 1))
+        self._fields["state_since"][:] = self._now()
+        self._rng = numpy.random.default_rng(random.getrandbits(63) if seed is None else seed)
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return "{{NodeArray: count {} fields {}}}".format(self._count, sorted(self._fields))
+
+    def add_field(self, name, dtype, initial=0):
+        """
+        Add a per-node field, filled with `initial`.
+
+        :return: The new array
+        """
+        import numpy
+
+        array = numpy.full(self._count, initial, dtype=dtype)
+        self._fields[name] = array
+        self._initial[name] = initial
+        return array
+
+    def field(self, name):
+        """
+        :return: The array holding `name` for every node (not a copy, so writes update the nodes)
+        """
+        return self._fields[name]
+
+    def fields(self):
+        return sorted(self._fields)
+
+    def get(self, index, name):
+        return self._fields[name][index].item()
+
+    def set(self, index, name, value):
+        self._fields[name][index] = value
+
+    def decrement_backoff(self, active=None, amount=1):
+        """
+        Count down the backoff of every node with a positive backoff (restricted to `active`, a
+        boolean mask or index array, if given).
+
+        :return: The indices of the nodes whose backoff reached 0
+        """
+        import numpy
+
+        backoff = self._fields["backoff"]
+        counting = backoff > 0
+        if active is not None:
+            mask = numpy.zeros(self._count, dtype=bool)
+            mask[active] = True
+            counting &= mask
+        backoff[counting] -= amount
+        expired = counting & (backoff <= 0)
+        backoff[expired] = 0
+        return numpy.flatnonzero(expired)
+
+    def draw_backoff(self, indices):
+        """
+        Draw a new backoff uniformly from [0, contention_window] for each node in `indices`.
+        """
+        window = self._fields["contention_window"][indices]
+        self._fields["backoff"][indices] = self._rng.integers(0, window + 1)
+
+    def double_window(self, indices, maximum=1023):
+        """
+        Binary exponential backoff after a failure: the window becomes 2 * window + 1, capped.
+        """
+        import numpy
+
+        window = self._fields["contention_window"]
+        window[indices] = numpy.minimum(2 * window[indices] + 1, maximum)
+        self._fields["retries"][indices] += 1
+
+    def reset_window(self, indices, minimum=None):
+        """
+        Restore the initial window (or `minimum`) and clear the retries after a success.
+        """
+        self._fields["contention_window"][indices] = self._initial["contention_window"] if minimum is None else minimum
+        self._fields["retries"][indices] = 0
+
+    @staticmethod
+    def _now():
+        sim = Simulator.sim()
+        return sim.time() if sim is not None else 0.0
+
+    def power(self):
+        """
+        :return: The array [node, radio state] of watts drawn, which may be written
+        """
+        return self._power
+
+    def set_radio_state(self, indices, state):
+        """
+        Move the nodes in `indices` to a radio state, closing the interval each spent in its old state.
+
+        :param indices: Node indices (or a boolean mask)
+        :param state: PhyLayer.SLEEP, IDLE, RX or TX
+        """
+        import numpy
+
+        if not 0 <= state < len(PhyLayer.RADIO_STATES): raise ValueError("Unknown radio state {}".format(state))
+        indices = numpy.unique(numpy.arange(self._count)[indices])
+        now = self._now()
+        radio_state = self._fields["radio_state"]
+        since = self._fields["state_since"]
+        self._state_times[indices, radio_state[indices]] += now - since[indices]
+        since[indices] = now
+        radio_state[indices] = state
+
+    def time_in_state(self, time=None):
+        """
+        :param time: The time to measure up to (default now)
+        :return: A float64 array [node, radio state] of seconds
+        """
+        import numpy
+
+        times = self._state_times.copy()
+        elapsed = (self._now() if time is None else time) - self._fields["state_since"]
+        times[numpy.arange(self._count), self._fields["radio_state"]] += elapsed
+        return times
+
+    def energy(self, time=None):
+        """
+        :param time: The time to measure up to (default now)
+        :return: A float64 array [node, radio state] of joules
+        """
+        return self.time_in_state(time) * self._power
+
+    @abc.abstractmethod
+    def mac_request(self, index, sdu):
+        pass
+
+    @abc.abstractmethod
+    def mac_indication(self, index, sdu):
+        pass
+
+    @abc.abstractmethod
+    def phy_request(self, index, sdu):
+        pass
+
+    @abc.abstractmethod
+    def phy_indication(self, index, sdu):
+        pass
+
+
+class _NodeProxy(object):
+    """
+    State access for the layer proxies, which hold only the array and the node index
+    """
+
+    def index(self):
+        return self._index
+
+    def get(self, name):
+        return self._nodes.get(self._index, name)
+
+    def set(self, name, value):
+        self._nodes.set(self._index, name, value)
+
+
+class MacProxy(_NodeProxy, MacLayer):
+    """
+    The MacLayer of one node in a NodeArray.
+    """
+
+    def __init__(self, nodes, index, phy_layer):
+        super(MacProxy, self).__init__(phy_layer)
+        self._nodes = nodes
+        self._index = index
+
+    def __repr__(self):
+        return "{{MacProxy: node {}}}".format(self._index)
+
+    def _receive_request(self, sdu):
+        self._nodes.mac_request(self._index, sdu)
+
+    def _receive_indication(self, sdu):
+        self._nodes.mac_indication(self._index, sdu)
+
+
+class PhyProxy(_NodeProxy, PhyLayer):
+    """
+    The PhyLayer of one node in a NodeArray, attached to `channel`.  Its radio state and energy
+    are kept in the NodeArray.
+    """
+
+    def __init__(self, nodes, index, channel):
+        # PhyLayer.__init__ would create per-object radio state; the proxy only attaches to the channel
+        self._nodes = nodes
+        self._index = index
+        self._channel = channel
+        self._channel.attach(self)
+
+    def __repr__(self):
+        return "{{PhyProxy: node {}}}".format(self._index)
+
+    def set_power(self, power):
+        if len(power) != len(PhyLayer.RADIO_STATES): raise ValueError("need a power for each radio state")
+        self._nodes.power()[self._index] = power
+
+    def power(self):
+        return tuple(self._nodes.power()[self._index].tolist())
+
+    def radio_state(self):
+        return self.get("radio_state")
+
+    def set_radio_state(self, state):
+        if state != self.get("radio_state"):
+            self._nodes.set_radio_state([self._index], state)
+
+    def time_in_state(self, time=None):
+        times = self._nodes._state_times[self._index].tolist()
+        elapsed = (self._nodes._now() if time is None else time) - self.get("state_since")
+        times[self.get("radio_state")] += elapsed
+        return times
+
+    def _receive_request(self, sdu):
+        self._nodes.phy_request(self._index, sdu)
+
+    def _receive_indication(self, sdu):
+        self._nodes.phy_indication(self._index, sdu)
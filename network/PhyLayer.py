@@ -25,19 +25,102 @@
 
 
 import abc
+from netsimpy.Simulator import Simulator
 from netsimpy.network.Layer import Layer
 
 
+def _now():
+    sim = Simulator.sim()
+    return sim.time() if sim is not None else 0.0
+
+
 class PhyLayer(Layer):
     """
     Abstract model of a PHY layer
+
+    The PHY tracks its radio state (`SLEEP`, `IDLE`, `RX`, `TX`) for energy accounting.  Only the
+    time of each state change is recorded and the time spent in the old state is added up then,
+    so no events are needed to measure energy; `energy()` adds the current open interval when
+    it is read.  Use `PhyLayer.energies()` for all nodes at the end of a run.
     """
-    __metaclass__ = abc.ABCMeta
+
+    SLEEP = 0
+    IDLE = 1
+    RX = 2
+    TX = 3
+    RADIO_STATES = ("sleep", "idle", "rx", "tx")
+
+    # power draw (watts) by radio state, those of a CC2420 at 3V
+    POWER = (6E-5, 1.28E-3, 5.64E-2, 5.22E-2)
 
     def __init__(self, channel):
         self._channel = channel
+        self._power = self.POWER
+        self._radio_state = PhyLayer.IDLE
+        self._state_since = _now()
+        self._state_times = [0.0] * len(PhyLayer.RADIO_STATES)
         self._channel.attach(self)
 
+    def set_power(self, power):
+        """
+        :param power: Watts drawn in each radio state, indexed by SLEEP, IDLE, RX, TX
+        """
+        if len(power) != len(PhyLayer.RADIO_STATES): raise ValueError("need a power for each radio state")
+        self._power = tuple(power)
+
+    def power(self):
+        return self._power
+
+    def radio_state(self):
+        return self._radio_state
+
+    def set_radio_state(self, state):
+        """
+        Change the radio state, closing the interval spent in the old one.
+
+        :param state: SLEEP, IDLE, RX or TX
+        """
+        if state == self._radio_state:
+            return
+        if not 0 <= state < len(PhyLayer.RADIO_STATES): raise ValueError("Unknown radio state {}".format(state))
+        now = _now()
+        self._state_times[self._radio_state] += now - self._state_since
+        self._state_since = now
+        self._radio_state = state
+
+    def time_in_state(self, time=None):
+        """
+        :param time: The time to measure up to (default now)
+        :return: A list of seconds spent in each radio state
+        """
+        times = list(self._state_times)
+        times[self._radio_state] += (_now() if time is None else time) - self._state_since
+        return times
+
+    def energy(self, time=None):
+        """
+        :param time: The time to measure up to (default now)
+        :return: Joules used so far
+        """
+        return sum(seconds * watts for seconds, watts in zip(self.time_in_state(time), self.power()))
+
+    @staticmethod
+    def energies(phys, time=None):
+        """
+        Energy of many PHYs, computed in one NumPy pass.  Requires NumPy.
+
+        :param phys: A sequence of PhyLayer
+        :param time: The time to measure up to (default now)
+        :return: A float64 array [phy, radio state] of joules
+        """
+        import numpy
+
+        if time is None:
+            time = _now()
+        times = numpy.array([phy.time_in_state(time) for phy in phys], dtype=numpy.float64)
+        power = numpy.array([phy.power() for phy in phys], dtype=numpy.float64)
+        return (times * power).reshape(len(phys), len(PhyLayer.RADIO_STATES))
+
     @abc.abstractmethod
     def _receive_request(self, sdu):
         pass
@@ -25,25 +25,57 @@
 
 
 class SDU(object):
+    """
+    Service data unit passed between layers.  SDUs are slotted and the subclasses inherit
+    `__init__` rather than chaining through `super()`, since a busy channel creates a great many.
+    """
+    __slots__ = ("payload",)
+
     def __init__(self, payload=None):
         self.payload = payload
 
 
 class Request(SDU):
-    def __init__(self, payload=None):
-        super(Request, self).__init__(payload)
+    __slots__ = ()
 
 
 class Indication(SDU):
-    def __init__(self, payload=None):
-        super(Indication, self).__init__(payload)
+    __slots__ = ()
+
 
+class _StateIndication(Indication):
+    """
+    Channel state carries no data, so the channel shares the immutable `BUSY` and `IDLE` instances
+    """
+    __slots__ = ()
 
-class BusyIndication(Indication):
     def __init__(self, payload=None):
-        super(BusyIndication, self).__init__(payload)
+        object.__setattr__(self, "payload", payload)
 
+    def __setattr__(self, name, value):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
 
-class IdleIndication(Indication):
-    def __init__(self, payload=None):
-        super(IdleIndication, self).__init__(payload)
+    def __reduce__(self):
+        # the shared instances pickle by name, so unpickling (e.g. in a Parallel worker) resolves to them
+        for name in ("BUSY", "IDLE"):
+            if self is globals().get(name):
+                return name
+        return type(self), (self.payload,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class BusyIndication(_StateIndication):
+    __slots__ = ()
+
+
+class IdleIndication(_StateIndication):
+    __slots__ = ()
+
+
+BUSY = BusyIndication()
+IDLE = IdleIndication()
@@ -0,0 +1,390 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Topology construction with precomputed routing tables.  Requires NumPy; uses SciPy if available.
+
+import collections
+import heapq
+
+
+class RoutingTable(object):
+    """
+    Shortest-path (by propagation delay) next hops toward a set of destinations, stored as
+    compact arrays so a forwarding decision is two array lookups.
+    """
+
+    def __init__(self, destinations, next_hop, distance, node_count):
+        """
+        :param destinations: int array of destination node indices
+        :param next_hop: int32 array [destination row, node] of the next hop (-1 if unreachable or at the destination)
+        :param distance: float64 array [destination row, node] of the path delay (inf if unreachable)
+        :param node_count: The number of nodes
+        """
+        import numpy
+
+        self._destinations = destinations
+        self._next_hop = next_hop
+        self._distance = distance
+        self._row = numpy.full(node_count, -1, dtype=numpy.int32)
+        self._row[destinations] = numpy.arange(len(destinations), dtype=numpy.int32)
+
+    def __repr__(self):
+        return "{{RoutingTable: destinations {} nodes {}}}".format(len(self._destinations), self._next_hop.shape[1])
+
+    def destinations(self):
+        return self._destinations
+
+    def next_hop(self, node, destination):
+        """
+        :return: The neighbor of `node` on the shortest path to `destination`, or -1 if none
+        """
+        row = self._row[destination]
+        if row < 0: raise KeyError("{} is not a routed destination".format(destination))
+        return int(self._next_hop[row, node])
+
+    def distance(self, node, destination):
+        """
+        :return: The total propagation delay of the shortest path (inf if unreachable)
+        """
+        row = self._row[destination]
+        if row < 0: raise KeyError("{} is not a routed destination".format(destination))
+        return float(self._distance[row, node])
+
+    def next_hops(self, destination):
+        """
+        :return: The int32 array of next hops of every node toward `destination`
+        """
+        return self._next_hop[self._row[destination]]
+
+
+class Topology(object):
+    """
+    A network graph of `node_count` nodes and links with per-link propagation delays, held as
+    NumPy arrays in compressed sparse row (CSR) form.
+
+    Build one from an edge list or a generator (`grid()`, `random_geometric()`,
+    `barabasi_albert()`), compute routing tables once with `routes()`, and instantiate the model
+    objects with `build()`.
+
+    Example:
+        topology = Topology.grid(10, 10, delay=1E-6)
+        routes = topology.routes()
+        nodes, links, channels = topology.build(make_node, make_link)
+        hop = routes.next_hop(source, destination)
+    """
+
+    def __init__(self, node_count, sources, targets, delays, directed=False, positions=None):
+        """
+        :param node_count: The number of nodes, indexed 0 .. node_count - 1
+        :param sources: int array-like of link sources
+        :param targets: int array-like of link targets
+        :param delays: float array-like of link propagation delays (seconds), or a scalar
+        :param directed: If False, every link carries traffic both ways
+        :param positions: Optional float array [node, 2] of coordinates
+        """
+        import numpy
+
+        sources = numpy.asarray(sources, dtype=numpy.int32)
+        targets = numpy.asarray(targets, dtype=numpy.int32)
+        delays = numpy.broadcast_to(numpy.asarray(delays, dtype=numpy.float64), sources.shape).copy()
+        if sources.shape != targets.shape: raise ValueError("sources and targets must be the same length")
+        if len(sources) and (min(sources.min(), targets.min()) < 0 or max(sources.max(), targets.max()) >= node_count):
+            raise ValueError("link endpoints must be in [0, {})".format(node_count))
+        if len(delays) and delays.min() < 0.0: raise ValueError("delays must be non-negative")
+
+        self._node_count = node_count
+        self._directed = directed
+        self._sources = sources
+        self._targets = targets
+        self._delays = delays
+        self.positions = positions
+
+        # CSR adjacency over directed arcs (both directions for an undirected topology)
+        if directed:
+            tails, heads, weights = sources, targets, delays
+        else:
+            tails = numpy.concatenate((sources, targets))
+            heads = numpy.concatenate((targets, sources))
+            weights = numpy.concatenate((delays, delays))
+        order = numpy.argsort(tails, kind="stable")
+        self._heads = heads[order]
+        self._weights = weights[order]
+        self._indptr = numpy.zeros(node_count + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(tails, minlength=node_count), out=self._indptr[1:])
+
+    def __repr__(self):
+        return "{{Topology: nodes {} links {} directed {}}}".format(self._node_count, len(self._sources), self._directed)
+
+    @staticmethod
+    def from_edges(node_count, edges, delay=0.0, directed=False):
+        """
+        :param node_count: The number of nodes
+        :param edges: An iterable of (u, v) or (u, v, delay)
+        :param delay: The delay of edges given without one
+        :param directed: If False, links carry traffic both ways
+        :return: A Topology
+        """
+        sources = []
+        targets = []
+        delays = []
+        for edge in edges:
+            sources.append(edge[0])
+            targets.append(edge[1])
+            delays.append(edge[2] if len(edge) > 2 else delay)
+        return Topology(node_count, sources, targets, delays, directed)
+
+    @staticmethod
+    def grid(rows, cols, delay):
+        """
+        A rows x cols lattice; node (r, c) has index r * cols + c.
+
+        :return: A Topology
+        """
+        import numpy
+
+        index = numpy.arange(rows * cols, dtype=numpy.int32).reshape(rows, cols)
+        sources = numpy.concatenate((index[:, :-1].ravel(), index[:-1, :].ravel()))
+        targets = numpy.concatenate((index[:, 1:].ravel(), index[1:, :].ravel()))
+        columns, lines = numpy.meshgrid(numpy.arange(cols), numpy.arange(rows))
+        positions = numpy.column_stack((columns.ravel(), lines.ravel())).astype(numpy.float64)
+        return Topology(rows * cols, sources, targets, delay, positions=positions)
+
+    @staticmethod
+    def random_geometric(node_count, radius, seed=None, size=1.0, propagation_speed=None, delay=0.0):
+        """
+        Nodes placed uniformly in a size x size square, linked when closer than `radius`.
+        Neighbors are found by bucketing nodes into radius-sized cells, so the cost is linear
+        in the number of nodes and links.
+
+        :param propagation_speed: If given, each link's delay is distance / speed
+        :param delay: Otherwise, the fixed delay of every link
+        :return: A Topology
+        """
+        import numpy
+
+        rng = numpy.random.default_rng(seed)
+        positions = rng.uniform(0.0, size, (node_count, 2))
+        cells = numpy.floor(positions / radius).astype(numpy.int64)
+        width = int(numpy.ceil(size / radius)) + 1
+        cell_ids = cells[:, 0] * width + cells[:, 1]
+        order = numpy.argsort(cell_ids, kind="stable")
+        sorted_ids = cell_ids[order]
+        unique_ids, starts = numpy.unique(sorted_ids, return_index=True)
+        ends = numpy.append(starts[1:], len(order))
+        members = dict((int(cell), order[start:end]) for cell, start, end in zip(unique_ids, starts, ends))
+
+        sources = []
+        targets = []
+        # each cell against itself and four of its neighbors covers every adjacent pair once
+        for cell, here in members.items():
+            for offset in (0, 1, width - 1, width, width + 1):
+                there = members.get(cell + offset)
+                if there is None:
+                    continue
+                difference = positions[here][:, None, :] - positions[there][None, :, :]
+                close = (difference * difference).sum(axis=2) < radius * radius
+                if offset == 0:
+                    close = numpy.triu(close, 1)
+                i, j = numpy.nonzero(close)
+                sources.append(here[i])
+                targets.append(there[j])
+
+        sources = numpy.concatenate(sources) if sources else numpy.zeros(0, dtype=numpy.int32)
+        targets = numpy.concatenate(targets) if targets else numpy.zeros(0, dtype=numpy.int32)
+        if propagation_speed is not None:
+            delay = numpy.sqrt(((positions[sources] - positions[targets]) ** 2).sum(axis=1)) / propagation_speed
+        return Topology(node_count, sources, targets, delay, positions=positions)
+
+    @staticmethod
+    def barabasi_albert(node_count, links_per_node, seed=None, delay=0.0):
+        """
+        Preferential attachment: each new node links to `links_per_node` existing nodes chosen
+        with probability proportional to their degree.
+
+        :return: A Topology
+        """
+        import numpy
+
+        m = links_per_node
+        if not 1 <= m < node_count: raise ValueError("links_per_node must be in [1, node_count)")
+        rng = numpy.random.default_rng(seed)
+
+        link_count = (node_count - m) * m
+        sources = numpy.empty(link_count, dtype=numpy.int32)
+        targets = numpy.empty(link_count, dtype=numpy.int32)
+        # every link endpoint appears once, so sampling it uniformly is sampling by degree
+        endpoints = numpy.empty(2 * link_count, dtype=numpy.int32)
+        filled = 0
+        chosen = list(range(m))
+        for node in range(m, node_count):
+            start = filled // 2
+            sources[start:start + m] = node
+            targets[start:start + m] = chosen
+            endpoints[filled:filled + 2 * m:2] = node
+            endpoints[filled + 1:filled + 2 * m:2] = chosen
+            filled += 2 * m
+
+            picks = set()
+            while len(picks) < m:
+                for index in rng.integers(0, filled, m - len(picks)):
+                    picks.add(int(endpoints[index]))
+            chosen = list(picks)
+        return Topology(node_count, sources, targets, delay)
+
+    def node_count(self):
+        return self._node_count
+
+    def link_count(self):
+        return len(self._sources)
+
+    def links(self):
+        """
+        :return: (sources, targets, delays) arrays, one entry per link as given
+        """
+        return self._sources, self._targets, self._delays
+
+    def neighbors(self, node):
+        """
+        :return: int array of the nodes reachable from `node` in one hop
+        """
+        return self._heads[self._indptr[node]:self._indptr[node + 1]]
+
+    def link_delay(self, u, v):
+        """
+        :return: The smallest delay of a link from u to v
+        """
+        start, end = self._indptr[u], self._indptr[u + 1]
+        matches = self._weights[start:end][self._heads[start:end] == v]
+        if not len(matches): raise KeyError("no link from {} to {}".format(u, v))
+        return float(matches.min())
+
+    def routes(self, destinations=None):
+        """
+        Compute shortest-path next hops from every node toward each destination.  The table is
+        destinations x nodes, so for large topologies route only to the destinations in use.
+        Uses SciPy's Dijkstra if installed, otherwise a pure Python one.
+
+        :param destinations: int array-like of destination nodes (default all)
+        :return: A RoutingTable
+        """
+        import numpy
+
+        if destinations is None:
+            destinations = numpy.arange(self._node_count, dtype=numpy.int32)
+        destinations = numpy.asarray(destinations, dtype=numpy.int32)
+
+        # shortest-path trees rooted at each destination over the reversed arcs; a node's
+        # predecessor in the tree is its next hop toward the root
+        try:
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.csgraph import dijkstra
+        except ImportError:
+            next_hop, distance = self._dijkstra_python(destinations)
+        else:
+            tails = numpy.repeat(numpy.arange(self._node_count), numpy.diff(self._indptr))
+            # csr_matrix drops explicit zeros; a tiny positive weight keeps zero-delay links
+            weights = numpy.where(self._weights > 0.0, self._weights, numpy.finfo(numpy.float64).tiny)
+            reverse = csr_matrix((weights, (self._heads, tails)), shape=(self._node_count, self._node_count))
+            distance, predecessors = dijkstra(reverse, directed=True, indices=destinations, return_predecessors=True)
+            next_hop = numpy.where(predecessors < 0, -1, predecessors).astype(numpy.int32)
+            distance = self._path_delays(destinations, next_hop, distance)
+        return RoutingTable(destinations, next_hop, distance, self._node_count)
+
+    def _path_delays(self, destinations, next_hop, distance):
+        # recompute with the true link delays in case zero-delay links were nudged for SciPy; the nudge
+        # makes ties, so walk each shortest-path tree outward from its root rather than sorting by distance
+        if (self._weights > 0.0).all():
+            return distance
+        import numpy
+        exact = numpy.full(distance.shape, numpy.inf)
+        for row, destination in enumerate(destinations):
+            hops = next_hop[row]
+            children = [[] for _ in range(self._node_count)]
+            for node in numpy.flatnonzero(hops >= 0).tolist():
+                children[int(hops[node])].append(node)
+            exact[row, destination] = 0.0
+            pending = collections.deque([int(destination)])
+            while pending:
+                hop = pending.popleft()
+                for node in children[hop]:
+                    exact[row, node] = self.link_delay(node, hop) + exact[row, hop]
+                    pending.append(node)
+        return exact
+
+    def _dijkstra_python(self, destinations):
+        import numpy
+
+        count = self._node_count
+        # reverse adjacency as Python lists for the inner loop
+        reverse = [[] for _ in range(count)]
+        for tail in range(count):
+            for index in range(self._indptr[tail], self._indptr[tail + 1]):
+                reverse[int(self._heads[index])].append((tail, float(self._weights[index])))
+
+        next_hop = numpy.full((len(destinations), count), -1, dtype=numpy.int32)
+        distance = numpy.full((len(destinations), count), numpy.inf)
+        for row, destination in enumerate(destinations):
+            best = [float("inf")] * count
+            hops = next_hop[row]
+            best[destination] = 0.0
+            heap = [(0.0, int(destination))]
+            while heap:
+                d, node = heapq.heappop(heap)
+                if d > best[node]:
+                    continue
+                for tail, weight in reverse[node]:
+                    candidate = d + weight
+                    if candidate < best[tail]:
+                        best[tail] = candidate
+                        hops[tail] = node
+                        heapq.heappush(heap, (candidate, tail))
+            distance[row] = best
+        return next_hop, distance
+
+    def build(self, node_factory, link_factory=None, channel_groups=None, channel_factory=None):
+        """
+        Instantiate the model objects.
+
+        :param node_factory: `node_factory(index)` returns the object for a node
+        :param link_factory: `link_factory(u, v, delay, node_u, node_v)` returns the object for a link (called
+                             once per link as given; an undirected link should carry both directions)
+        :param channel_groups: Optional iterable of node index lists sharing one broadcast channel
+        :param channel_factory: `channel_factory(index, members)` returns the channel for a group
+        :return: (list of nodes, dict {(u, v): link}, list of channels)
+        """
+        nodes = [node_factory(index) for index in range(self._node_count)]
+
+        links = {}
+        if link_factory is not None:
+            for u, v, delay in zip(self._sources.tolist(), self._targets.tolist(), self._delays.tolist()):
+                links[(u, v)] = link_factory(u, v, delay, nodes[u], nodes[v])
+
+        channels = []
+        if channel_groups is not None:
+            if channel_factory is None: raise ValueError("channel_groups requires a channel_factory")
+            for index, members in enumerate(channel_groups):
+                channels.append(channel_factory(index, [nodes[member] for member in members]))
+
+        return nodes, links, channels
@@ -0,0 +1,300 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Traffic sources.  Requires NumPy.
+
+import abc
+import random
+from netsimpy.Event import Event
+from netsimpy.network.Message import Message
+
+
+def _rng(seed):
+    import numpy
+
+    # without a seed, draw one from the global generator so replications seeded through
+    # `random.seed()` (e.g. by SequentialSampler) are reproducible
+    return numpy.random.default_rng(random.getrandbits(63) if seed is None else seed)
+
+
+class TrafficSource(metaclass=abc.ABCMeta):
+    """
+    Generates messages at arrival times drawn in blocks by a subclass's `_generate()`.  Each
+    block is computed with NumPy in one call, but only the next arrival is scheduled, so a
+    source holds exactly one event in the simulator however long it runs.
+
+    Each arrival calls `callback(message)` with a new `Message` of the source's length, so e.g.
+    `PointToPointLink.send` can be passed directly.
+
+    Example:
+        source = PoissonSource(sim, link.send, rate=1000.0, length=1500)
+        source.start()
+        sim.execute_until(10.0)
+    """
+
+    def __init__(self, sim, callback, length=1000, block_size=4096):
+        """
+        :param sim: The simulator
+        :param callback: `callback(message)` for each arrival
+        :param length: The message length (octets) when the source has no per-arrival lengths
+        :param block_size: The number of arrivals to draw at a time
+        """
+        if block_size < 1: raise ValueError("block_size must be positive")
+
+        self._sim = sim
+        self._callback = callback
+        self._length = length
+        self._block_size = block_size
+        self._times = None
+        self._lengths = None
+        self._index = 0
+        self._count = 0
+        self._stop_time = None
+        self._stopped = False
+        self._pending_event = None
+
+    @abc.abstractmethod
+    def _generate(self, start):
+        """
+        Draw the next block of arrivals.
+
+        :param start: The time of the previous arrival (or the start time)
+        :return: (float64 array of non-decreasing absolute times, array of lengths or None); an empty
+                 array ends the source
+        """
+        pass
+
+    def count(self):
+        """
+        :return: The number of arrivals so far
+        """
+        return self._count
+
+    def start(self, at=None, stop_time=None):
+        """
+        Begin generating arrivals.
+
+        :param at: The absolute start time (default now)
+        :param stop_time: If not None, no arrivals after this absolute time
+        """
+        if self._pending_event is not None: raise RuntimeError("source already started")
+        self._stop_time = stop_time
+        self._stopped = False
+        self._times, self._lengths = self._generate(self._sim.time() if at is None else at)
+        self._index = 0
+        self._schedule()
+
+    def stop(self):
+        # may be called from the callback, while no arrival is pending
+        self._stopped = True
+        if self._pending_event is not None:
+            self._pending_event.invalidate()
+            self._pending_event = None
+
+    def _schedule(self):
+        if self._index >= len(self._times):
+            if not len(self._times):
+                return
+            self._times, self._lengths = self._generate(float(self._times[-1]))
+            self._index = 0
+            if not len(self._times):
+                return
+
+        time = float(self._times[self._index])
+        if self._stop_time is not None and time > self._stop_time:
+            return
+        now = self._sim.time()
+        event = Event(time - now if time > now else 0.0, self._arrival, None)
+        self._pending_event = event
+        self._sim.schedule_at(time, event)
+
+    def _arrival(self, event):
+        self._pending_event = None
+        length = self._length if self._lengths is None else int(self._lengths[self._index])
+        self._index += 1
+        self._count += 1
+        self._callback(Message(virtual_length=length))
+        if self._pending_event is None and not self._stopped:
+            self._schedule()
+
+
+class PoissonSource(TrafficSource):
+    """
+    Exponentially distributed inter-arrival times.
+    """
+
+    def __init__(self, sim, callback, rate, length=1000, seed=None, block_size=4096):
+        """
+        :param rate: Mean arrivals per second
+        :param seed: NumPy seed (default drawn from `random`)
+        """
+        super(PoissonSource, self).__init__(sim, callback, length, block_size)
+        if rate <= 0.0: raise ValueError("rate must be positive")
+        self._mean = 1.0 / rate
+        self._rng = _rng(seed)
+
+    def _generate(self, start):
+        times = self._rng.exponential(self._mean, self._block_size).cumsum()
+        times += start
+        return times, None
+
+
+class CbrSource(TrafficSource):
+    """
+    Constant bit rate: arrivals every `interval` seconds, the first one at the start time.
+    """
+
+    def __init__(self, sim, callback, interval, length=1000, block_size=4096):
+        super(CbrSource, self).__init__(sim, callback, length, block_size)
+        if interval <= 0.0: raise ValueError("interval must be positive")
+        self._interval = interval
+        self._origin = None
+        self._next = 0
+
+    def _generate(self, start):
+        import numpy
+
+        if self._origin is None:
+            self._origin = start
+        # times from the index rather than by accumulation, so they do not drift
+        index = numpy.arange(self._next, self._next + self._block_size, dtype=numpy.float64)
+        self._next += self._block_size
+        return self._origin + index * self._interval, None
+
+
+class OnOffParetoSource(TrafficSource):
+    """
+    Alternating on and off periods with Pareto distributed lengths (heavy tailed for shape < 2),
+    sending at a constant `interval` while on.  Every on period sends at least one message.
+    """
+
+    def __init__(self, sim, callback, interval, mean_on, mean_off, shape=1.5, length=1000, seed=None,
+                 block_size=4096):
+        """
+        :param interval: Seconds between messages while on
+        :param mean_on: Mean on period (seconds)
+        :param mean_off: Mean off period (seconds)
+        :param shape: Pareto shape, must be > 1 for the means to exist
+        :param seed: NumPy seed (default drawn from `random`)
+        """
+        super(OnOffParetoSource, self).__init__(sim, callback, length, block_size)
+        if shape <= 1.0: raise ValueError("shape must be > 1")
+        if interval <= 0.0: raise ValueError("interval must be positive")
+
+        self._interval = interval
+        self._shape = shape
+        # the Pareto minimum that gives the requested mean
+        self._on_scale = mean_on * (shape - 1.0) / shape
+        self._off_scale = mean_off * (shape - 1.0) / shape
+        self._rng = _rng(seed)
+        self._cycle_start = None
+        # enough cycles for about a block of messages
+        self._cycles = max(1, int(block_size * interval / max(mean_on, interval)))
+
+    def _generate(self, start):
+        import numpy
+
+        if self._cycle_start is None:
+            self._cycle_start = start
+        on = (self._rng.pareto(self._shape, self._cycles) + 1.0) * self._on_scale
+        off = (self._rng.pareto(self._shape, self._cycles) + 1.0) * self._off_scale
+        counts = numpy.ceil(on / self._interval).astype(numpy.int64)
+
+        cycle_starts = self._cycle_start + numpy.concatenate(([0.0], numpy.cumsum(on + off)[:-1]))
+        self._cycle_start = cycle_starts[-1] + on[-1] + off[-1]
+        # position of each message within its burst
+        firsts = numpy.cumsum(counts) - counts
+        offsets = numpy.arange(counts.sum()) - numpy.repeat(firsts, counts)
+        return numpy.repeat(cycle_starts, counts) + offsets * self._interval, None
+
+
+class TraceSource(TrafficSource):
+    """
+    Replays arrival times (and optionally lengths) from files.  The files are memory mapped and
+    read one block at a time, so traces larger than memory can be replayed.
+
+    A `.npy` file is opened with `numpy.load(mmap_mode="r")`; any other file is raw native-endian
+    float64 timestamps (int32 lengths).  Use `convert()` to turn a text trace, e.g. the
+    timestamps exported from a pcap, into the raw format.  Trace times are shifted so the first
+    arrival is at the start time.
+    """
+
+    def __init__(self, sim, callback, times_path, lengths_path=None, length=1000, block_size=65536):
+        super(TraceSource, self).__init__(sim, callback, length, block_size)
+        self._trace_times = self._open(times_path, "float64")
+        self._trace_lengths = None if lengths_path is None else self._open(lengths_path, "int32")
+        if self._trace_lengths is not None and len(self._trace_lengths) != len(self._trace_times):
+            raise ValueError("times and lengths must have the same number of entries")
+        self._offset = None
+        self._position = 0
+
+    @staticmethod
+    def _open(path, dtype):
+        import numpy
+
+        if path.endswith(".npy"):
+            return numpy.load(path, mmap_mode="r")
+        return numpy.memmap(path, dtype=dtype, mode="r")
+
+    @staticmethod
+    def convert(text_path, out_path, column=0, chunk_lines=1 << 20):
+        """
+        Convert a whitespace separated text trace to raw float64 timestamps, a chunk at a time.
+
+        :param column: The column holding the timestamp
+        :return: The number of timestamps written
+        """
+        import numpy
+
+        written = 0
+        with open(text_path) as text, open(out_path, "wb") as out:
+            chunk = []
+            for line in text:
+                fields = line.split()
+                if not fields or fields[0].startswith("#"):
+                    continue
+                chunk.append(float(fields[column]))
+                if len(chunk) >= chunk_lines:
+                    numpy.asarray(chunk, dtype=numpy.float64).tofile(out)
+                    written += len(chunk)
+                    chunk = []
+            numpy.asarray(chunk, dtype=numpy.float64).tofile(out)
+            written += len(chunk)
+        return written
+
+    def _generate(self, start):
+        import numpy
+
+        begin = self._position
+        end = min(begin + self._block_size, len(self._trace_times))
+        self._position = end
+        # copying the slice pages in just this block
+        times = numpy.array(self._trace_times[begin:end], dtype=numpy.float64)
+        if self._offset is None and len(times):
+            self._offset = start - times[0]
+        if len(times):
+            times += self._offset
+        lengths = None if self._trace_lengths is None else numpy.array(self._trace_lengths[begin:end])
+        return times, lengths
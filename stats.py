@@ -0,0 +1,510 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Streaming statistics collectors with bounded memory
+
+import abc
+import copy
+import math
+from netsimpy.Simulator import Simulator
+
+
+class Collector(metaclass=abc.ABCMeta):
+    """
+    Abstract base class for statistics collectors.  A collector has a name, can be reset
+    (e.g. at the end of a warm-up period) and can be merged with a collector of the same type
+    from another replication.
+
+    Register a collector with the simulator so `Simulator.reset_collectors()` resets it:
+
+        latency = sim.register_collector(RunningStats("latency"))
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+
+    @abc.abstractmethod
+    def add(self, value):
+        pass
+
+    @abc.abstractmethod
+    def reset(self):
+        pass
+
+    @abc.abstractmethod
+    def merge(self, other):
+        """
+        Fold the observations of `other` into this collector.
+
+        :param other: A collector of the same type
+        :return: self
+        """
+        pass
+
+    def _check_merge(self, other):
+        if type(other) is not type(self):
+            raise TypeError("Cannot merge {} into {}".format(type(other).__name__, type(self).__name__))
+
+
+def merge_collectors(replications):
+    """
+    Merge the collectors of several replications by name.  The inputs are not modified.
+
+    :param replications: An iterable of dicts {name: collector}, e.g. from `Simulator.collectors()`
+    :return: A dict {name: merged collector}
+    """
+    result = {}
+    for collectors in replications:
+        for name, collector in collectors.items():
+            if name in result:
+                result[name].merge(collector)
+            else:
+                result[name] = copy.deepcopy(collector)
+    return result
+
+
+def normal_quantile(p):
+    """
+    The inverse of the standard normal CDF (Acklam's rational approximation, relative error < 1.2e-9)
+
+    :param p: probability (0, 1)
+    :return: z such that P(Z <= z) = p
+    """
+    if not 0.0 < p < 1.0: raise ValueError("p must be in (0, 1), got {}".format(p))
+
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+
+    p_low = 0.02425
+    if p < p_low:
+        q = math.sqrt(-2 * math.log(p))
+        return (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+               ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    if p > 1 - p_low:
+        return -normal_quantile(1 - p)
+
+    q = p - 0.5
+    r = q * q
+    return (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+           (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
+
+
+def student_t_quantile(p, df):
+    """
+    The inverse CDF of Student's t distribution.  Exact for 1 and 2 degrees of freedom, otherwise
+    the Cornish-Fisher expansion (Abramowitz & Stegun 26.7.5), which is within 1% for df >= 3.
+
+    :param p: probability (0, 1)
+    :param df: degrees of freedom (positive)
+    :return: t such that P(T <= t) = p
+    """
+    if df < 1: raise ValueError("df must be positive, got {}".format(df))
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+
+    z = normal_quantile(p)
+    z2 = z * z
+    g1 = (z2 + 1) * z / 4
+    g2 = ((5 * z2 + 16) * z2 + 3) * z / 96
+    g3 = (((3 * z2 + 19) * z2 + 17) * z2 - 15) * z / 384
+    g4 = ((((79 * z2 + 776) * z2 + 1482) * z2 - 1920) * z2 - 945) * z / 92160
+    return z + (g1 + (g2 + (g3 + g4 / df) / df) / df) / df
+
+
+class RunningStats(Collector):
+    """
+    Count, mean, variance, min and max using Welford's online algorithm.  Merging uses
+    Chan et al.'s pairwise update, so replications can be combined without loss.
+    """
+
+    def __init__(self, name=None):
+        super(RunningStats, self).__init__(name)
+        self.reset()
+
+    def __repr__(self):
+        return "{{RunningStats: name {} count {} mean {} stddev {}}}".format(
+            self.name, self._count, self.mean(), self.stddev())
+
+    def add(self, value):
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def reset(self):
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = float("inf")
+        self._max = float("-inf")
+
+    def merge(self, other):
+        self._check_merge(other)
+        if other._count == 0:
+            return self
+
+        count = self._count + other._count
+        delta = other._mean - self._mean
+        self._mean += delta * other._count / count
+        self._m2 += other._m2 + delta * delta * self._count * other._count / count
+        self._count = count
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        return self
+
+    def to_dict(self):
+        """
+        :return: A JSON-serializable dict of the accumulator state (see `from_dict()`)
+        """
+        return {"name": self.name, "count": self._count, "mean": self._mean, "m2": self._m2,
+                "min": self._min, "max": self._max}
+
+    @staticmethod
+    def from_dict(state):
+        stats = RunningStats(state["name"])
+        stats._count = state["count"]
+        stats._mean = state["mean"]
+        stats._m2 = state["m2"]
+        stats._min = state["min"]
+        stats._max = state["max"]
+        return stats
+
+    def count(self):
+        return self._count
+
+    def mean(self):
+        """
+        :return: The sample mean (NaN if empty)
+        """
+        return self._mean if self._count > 0 else float("nan")
+
+    def variance(self):
+        """
+        :return: The unbiased sample variance (NaN with fewer than 2 samples)
+        """
+        return self._m2 / (self._count - 1) if self._count > 1 else float("nan")
+
+    def stddev(self):
+        return math.sqrt(self.variance())
+
+    def min(self):
+        return self._min
+
+    def max(self):
+        return self._max
+
+    def half_width(self, confidence=0.95):
+        """
+        The half-width of the Student t confidence interval for the mean.
+
+        :param confidence: The two-sided confidence level (0, 1)
+        :return: half-width (infinite with fewer than 2 samples)
+        """
+        if self._count < 2:
+            return float("inf")
+        t = student_t_quantile(0.5 + confidence / 2.0, self._count - 1)
+        return t * math.sqrt(self.variance() / self._count)
+
+
+class TDigest(Collector):
+    """
+    Approximate quantiles using a merging t-digest (Dunning).  Memory is bounded by roughly
+    `compression` centroids plus the insert buffer.  Accuracy is best at the tails, which is
+    where latency percentiles live.  Digests merge by re-clustering their centroids.
+    """
+
+    def __init__(self, name=None, compression=100, buffer_size=500):
+        super(TDigest, self).__init__(name)
+        if compression < 10: raise ValueError("compression must be at least 10, got {}".format(compression))
+        self._compression = compression
+        self._buffer_size = buffer_size
+        self.reset()
+
+    def __repr__(self):
+        return "{{TDigest: name {} count {} centroids {}}}".format(self.name, self._count, len(self._means))
+
+    def add(self, value, weight=1):
+        self._buffer.append((value, weight))
+        self._count += weight
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def reset(self):
+        self._means = []
+        self._weights = []
+        self._buffer = []
+        self._count = 0
+        self._min = float("inf")
+        self._max = float("-inf")
+
+    def merge(self, other):
+        self._check_merge(other)
+        self._buffer.extend(zip(other._means, other._weights))
+        self._buffer.extend(other._buffer)
+        self._count += other._count
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        self._compress()
+        return self
+
+    def count(self):
+        return self._count
+
+    def centroids(self):
+        """
+        :return: A list of (mean, weight) tuples
+        """
+        self._compress()
+        return list(zip(self._means, self._weights))
+
+    def quantile(self, q):
+        """
+        :param q: The quantile [0, 1]
+        :return: The approximate value at quantile q (NaN if empty)
+        """
+        if not 0.0 <= q <= 1.0: raise ValueError("q must be [0, 1], got {}".format(q))
+        self._compress()
+        if self._count == 0:
+            return float("nan")
+
+        target = q * self._count
+        previous_center = 0.0
+        previous_mean = self._min
+        cumulative = 0.0
+        for mean, weight in zip(self._means, self._weights):
+            center = cumulative + weight / 2.0
+            if target < center:
+                return self._interpolate(target, previous_center, previous_mean, center, mean)
+            previous_center = center
+            previous_mean = mean
+            cumulative += weight
+
+        return self._interpolate(target, previous_center, previous_mean, self._count, self._max)
+
+    @staticmethod
+    def _interpolate(x, x0, y0, x1, y1):
+        if x1 <= x0:
+            return y1
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+    def _weight_limit(self, q, total):
+        # the cumulative weight at which the centroid starting at quantile q is full
+        k = self._compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self._compression / 4.0:
+            return total
+        return total * (math.sin(2 * math.pi * k / self._compression) + 1) / 2.0
+
+    def _compress(self):
+        if not self._buffer:
+            return
+
+        items = list(zip(self._means, self._weights))
+        items.extend(self._buffer)
+        items.sort()
+        del self._buffer[:]
+
+        # Uses the k1 scale function k(q) = compression / (2 pi) * asin(2q - 1).  A centroid may
+        # grow while it spans at most one unit of k, which bounds the digest to compression / 2 centroids.
+        total = float(self._count)
+        means = []
+        weights = []
+        cumulative = 0.0
+        mean, weight = items[0]
+        limit = self._weight_limit(0.0, total)
+        for value, w in items[1:]:
+            if cumulative + weight + w <= limit:
+                weight += w
+                mean += (value - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                cumulative += weight
+                limit = self._weight_limit(cumulative / total, total)
+                mean, weight = value, w
+
+        means.append(mean)
+        weights.append(weight)
+        self._means = means
+        self._weights = weights
+
+
+class LogHistogram(Collector):
+    """
+    A histogram with logarithmically sized buckets, so every positive value is represented
+    within a fixed relative error regardless of scale (as in DDSketch).  Values <= 0 are counted
+    in a separate zero bucket.  Histograms with the same relative error merge exactly.
+    """
+
+    def __init__(self, name=None, relative_error=0.01):
+        super(LogHistogram, self).__init__(name)
+        if not 0.0 < relative_error < 1.0:
+            raise ValueError("relative_error must be (0, 1), got {}".format(relative_error))
+        self._relative_error = relative_error
+        self._gamma = (1.0 + relative_error) / (1.0 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self.reset()
+
+    def __repr__(self):
+        return "{{LogHistogram: name {} count {} buckets {}}}".format(self.name, self._count, len(self._buckets))
+
+    def add(self, value, count=1):
+        self._count += count
+        if value <= 0.0:
+            self._zero_count += count
+        else:
+            index = int(math.ceil(math.log(value) / self._log_gamma))
+            self._buckets[index] = self._buckets.get(index, 0) + count
+
+    def reset(self):
+        self._buckets = {}
+        self._zero_count = 0
+        self._count = 0
+
+    def merge(self, other):
+        self._check_merge(other)
+        if other._gamma != self._gamma: raise ValueError("Cannot merge histograms with different relative error")
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self._count += other._count
+        return self
+
+    def count(self):
+        return self._count
+
+    def buckets(self):
+        """
+        :return: A sorted list of (lower, upper, count) for the non-empty positive buckets
+        """
+        return [(self._gamma ** (index - 1), self._gamma ** index, self._buckets[index])
+                for index in sorted(self._buckets)]
+
+    def quantile(self, q):
+        """
+        :param q: The quantile [0, 1]
+        :return: A value within the relative error of the true quantile (NaN if empty)
+        """
+        if not 0.0 <= q <= 1.0: raise ValueError("q must be [0, 1], got {}".format(q))
+        if self._count == 0:
+            return float("nan")
+
+        rank = q * (self._count - 1)
+        cumulative = self._zero_count
+        if rank < cumulative:
+            return 0.0
+        for index in sorted(self._buckets):
+            cumulative += self._buckets[index]
+            if rank < cumulative:
+                return 2.0 * self._gamma ** index / (self._gamma + 1.0)
+        return 2.0 * self._gamma ** max(self._buckets) / (self._gamma + 1.0)
+
+
+class TimeWeightedAverage(Collector):
+    """
+    The time average of a piecewise-constant value, such as a queue length.  Call `add()` (or
+    `update()`) whenever the value changes; the time defaults to the current simulation time.
+
+    `reset()` restarts the averaging window at the current time, keeping the current value.
+    When merging replications, each contributes its area up to its last update.
+    """
+
+    def __init__(self, name=None, value=0.0, time=None):
+        super(TimeWeightedAverage, self).__init__(name)
+        self._value = value
+        self._merged_area = 0.0
+        self._merged_duration = 0.0
+        self.reset(time)
+
+    def __repr__(self):
+        return "{{TimeWeightedAverage: name {} value {} mean {}}}".format(self.name, self._value, self.mean())
+
+    @staticmethod
+    def _now(time):
+        if time is not None:
+            return time
+        return Simulator.sim().time()
+
+    def add(self, value, time=None):
+        self.update(value, time)
+
+    def update(self, value, time=None):
+        t = self._now(time)
+        if t < self._last: raise ValueError("time went backwards: {} < {}".format(t, self._last))
+        self._area += self._value * (t - self._last)
+        self._last = t
+        self._value = value
+        if value > self._max:
+            self._max = value
+
+    def reset(self, time=None):
+        t = self._now(time) if time is not None or Simulator.sim() is not None else 0.0
+        self._start = t
+        self._last = t
+        self._area = 0.0
+        self._max = self._value
+        self._merged_area = 0.0
+        self._merged_duration = 0.0
+
+    def merge(self, other):
+        self._check_merge(other)
+        self._merged_area += other._merged_area + other._area
+        self._merged_duration += other._merged_duration + other._last - other._start
+        self._max = max(self._max, other._max)
+        return self
+
+    def value(self):
+        return self._value
+
+    def max(self):
+        return self._max
+
+    def mean(self, time=None):
+        """
+        :param time: The end of the averaging window (default: current simulation time, or the last update)
+        :return: The time-weighted mean
+        """
+        if time is None:
+            time = Simulator.sim().time() if Simulator.sim() is not None else self._last
+        time = max(time, self._last)
+        area = self._merged_area + self._area + self._value * (time - self._last)
+        duration = self._merged_duration + time - self._start
+        if duration <= 0.0:
+            return self._value
+        return area / duration
@@ -25,23 +25,34 @@
 
 
 import unittest
-from netsimpy import Event
+from netsimpy.Event import Event
 
 
 class TestEvent(unittest.TestCase):
 
     def test_event_time(self):
-        event = Event()
-        pass
+        event = Event(0.25, lambda e: None, None)
+        self.assertEqual(event.delay(), 0.25)
+        self.assertRaises(ValueError, Event, -1.0, lambda e: None, None)
+        self.assertRaises(ValueError, Event, 1.0, None, None)
 
     def test_valid_true(self):
-        pass
+        event = Event(0.0, lambda e: None, None)
+        self.assertTrue(event.is_valid())
 
     def test_valid_false(self):
-        pass
+        event = Event(0.0, lambda e: None, None)
+        event.invalidate()
+        self.assertFalse(event.is_valid())
 
     def test_data(self):
-        pass
+        data = {"key": "value"}
+        event = Event(0.0, lambda e: None, data)
+        self.assertIs(event.data(), data)
 
     def test_callback(self):
-        pass
+        fired = []
+        event = Event(0.0, fired.append, "data")
+        event.fire_callback()
+        self.assertEqual(fired, [event])
+        self.assertEqual(event.callback(), fired.append)
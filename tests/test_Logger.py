@@ -0,0 +1,107 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import unittest
+from netsimpy.Logger import Logger, LogSink
+
+
+class ListStream(object):
+    def __init__(self):
+        self.text = ""
+
+    def write(self, text):
+        self.text += text
+
+    def flush(self):
+        pass
+
+    def lines(self):
+        return self.text.splitlines()
+
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        Logger.reset()
+        Logger.set_clock(None)
+        self.stream = ListStream()
+        Logger.set_sink(LogSink(self.stream))
+
+    def tearDown(self):
+        Logger.reset()
+
+    def test_default_level(self):
+        log = Logger.get("test")
+        self.assertTrue(log.info_on)
+        self.assertFalse(log.debug_on)
+        self.assertFalse(log.trace_on)
+        log.info("hello {}", 1)
+        log.debug("not shown")
+        self.assertEqual(self.stream.lines(), ["test hello 1"])
+
+    def test_registry(self):
+        self.assertIs(Logger.get("test", "A"), Logger.get("test", "A"))
+        self.assertIsNot(Logger.get("test", "A"), Logger.get("test", "B"))
+
+    def test_component_and_node_filter(self):
+        alice = Logger.get("node", "ALICE")
+        bob = Logger.get("node", "BOB")
+        Logger.set_level(Logger.TRACE, "node", "ALICE")
+        self.assertTrue(alice.trace_on)
+        self.assertFalse(bob.trace_on)
+
+        Logger.set_level(Logger.DEBUG, "node")
+        self.assertTrue(alice.trace_on, "node-specific setting should win")
+        self.assertTrue(bob.debug_on)
+        self.assertFalse(bob.trace_on)
+
+    def test_lazy_format(self):
+        class Exploding(object):
+            def __format__(self, spec):
+                raise AssertionError("should not be formatted")
+
+        log = Logger.get("test")
+        log.trace("value {}", Exploding())
+        self.assertEqual(self.stream.text, "")
+
+    def test_buffered_sink(self):
+        stream = ListStream()
+        Logger.set_sink(LogSink(stream, buffer_lines=3), "channel")
+        log = Logger.get("channel")
+        log.info("one")
+        log.info("two")
+        self.assertEqual(stream.text, "")
+        log.info("three")
+        self.assertEqual(stream.lines(), ["channel one", "channel two", "channel three"])
+        log.info("four")
+        Logger.flush_all()
+        self.assertEqual(stream.lines()[-1], "channel four")
+        self.assertEqual(self.stream.text, "", "default sink should not receive channel output")
+
+    def test_clock_prefix(self):
+        Logger.set_clock(lambda: 1.5)
+        Logger.get("test", "N1").info("x")
+        self.assertEqual(self.stream.lines(), [" 1.500000000 test N1 x"])
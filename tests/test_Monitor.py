@@ -0,0 +1,123 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import socket
+import tempfile
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+from netsimpy.Monitor import Monitor, MetricsServer
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        # one millisecond of wall time per reading
+        self.now += 1E-3
+        return self.now
+
+
+class TestMonitor(unittest.TestCase):
+
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        Logger.set_level(Logger.ERROR, "simulator")
+        self.sim = Simulator()
+
+    def tearDown(self):
+        self.sim.release()
+        Logger.reset()
+
+    def _load(self, count):
+        # `count` events one second apart, every other one invalidated
+        for i in range(count):
+            event = Event(float(i + 1), lambda e: None, None)
+            self.sim.schedule(event)
+            if i % 2:
+                event.invalidate()
+
+    def test_counters(self):
+        self._load(10)
+        self.sim.execute()
+        self.assertEqual(self.sim.event_count(), 5)
+        self.assertEqual(self.sim.invalid_count(), 5)
+        self.assertEqual(self.sim.queue_peak(), 10)
+
+    def test_samples(self):
+        samples = []
+        monitor = Monitor(interval=10, callback=samples.append, clock=FakeClock())
+        self.sim.set_monitor(monitor)
+        self._load(100)
+        self.sim.execute()
+
+        # at events 1, 11, 21, 31, 41 and at the end
+        self.assertEqual([sample["events"] for sample in samples], [1, 11, 21, 31, 41, 50])
+        self.assertIs(monitor.latest(), samples[-1])
+        last = samples[-1]
+        self.assertEqual(last["invalidated"], 50)
+        self.assertEqual(last["queue"], 0)
+        self.assertEqual(last["queue_peak"], 100)
+        self.assertEqual(last["time"], 100.0)
+        # 10 events and 20 simulated seconds per millisecond between samples
+        self.assertAlmostEqual(samples[2]["events_per_second"], 10000.0)
+        self.assertAlmostEqual(samples[2]["time_ratio"], 20000.0)
+        self.assertGreater(last["mean_events_per_second"], 0.0)
+
+    def test_http(self):
+        monitor = Monitor(interval=1)
+        self.sim.set_monitor(monitor)
+        self._load(4)
+        self.sim.execute()
+        server = MetricsServer(monitor, port=0)
+        try:
+            from urllib.request import urlopen
+            host, port = server.address()
+            body = urlopen("http://{}:{}/".format(host, port), timeout=5).read()
+        finally:
+            server.close()
+        self.assertEqual(json.loads(body.decode("utf-8"))["events"], 2)
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix-domain sockets")
+    def test_unix_socket(self):
+        monitor = Monitor(interval=1)
+        self.sim.set_monitor(monitor)
+        self._load(4)
+        self.sim.execute()
+        path = os.path.join(tempfile.mkdtemp(), "metrics.sock")
+        server = MetricsServer(monitor, path=path)
+        try:
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(path)
+            body = client.makefile("rb").readline()
+            client.close()
+        finally:
+            server.close()
+            os.rmdir(os.path.dirname(path))
+        self.assertEqual(json.loads(body.decode("utf-8"))["invalidated"], 2)
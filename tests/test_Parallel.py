@@ -0,0 +1,109 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+from netsimpy.Parallel import ParallelSimulation, RingBuffer
+
+LOOKAHEAD = 0.001
+
+
+class TokenNode(object):
+    """
+    Holds tokens for a random time, then passes them to a random partition.  Also runs a
+    local timer so partitions have internal events between messages.
+    """
+
+    def __init__(self, lp):
+        self._lp = lp
+        self.log = []
+        lp.register_handler("token", self._receive)
+        sim = Simulator.sim()
+        sim.schedule(Event(lp.rng.expovariate(100.0), self._timer, None))
+        for token in range(2):
+            self._forward((lp.index(), token, 0))
+
+    def _timer(self, event):
+        self.log.append(("timer", Simulator.sim().time()))
+        Simulator.sim().schedule(Event(self._lp.rng.expovariate(100.0), self._timer, None))
+
+    def _receive(self, event):
+        origin, token, hops = event.data()
+        self.log.append(("token", Simulator.sim().time(), origin, token, hops))
+        self._forward((origin, token, hops + 1))
+
+    def _forward(self, token):
+        destination = self._lp.rng.randrange(self._lp.count())
+        self._lp.send(destination, LOOKAHEAD + self._lp.rng.expovariate(1000.0), "token", token)
+
+
+nodes = {}
+
+
+def build(lp):
+    nodes[lp.index()] = TokenNode(lp)
+
+
+def result(lp):
+    return nodes[lp.index()].log
+
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        Logger.set_level(Logger.ERROR)
+
+    def tearDown(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        Logger.reset()
+
+    def test_ring_buffer(self):
+        ring = RingBuffer(64)
+        for round in range(10):
+            messages = [bytes(bytearray([round, i] * (i + 1))) for i in range(4)]
+            for m in messages:
+                ring.put(m)
+            self.assertEqual(ring.get_all(), messages)
+            self.assertEqual(len(ring), 0)
+        self.assertRaises(RuntimeError, ring.put, b"x" * 61)
+
+    def test_matches_sequential(self):
+        simulation = ParallelSimulation(3, build, LOOKAHEAD, result_fn=result, seed=7)
+        parallel = simulation.run(end_time=0.5)
+        self.assertGreater(simulation.windows(), 10)
+        sequential = simulation.run_sequential(end_time=0.5)
+        self.assertEqual(parallel, sequential)
+        self.assertGreater(sum(1 for entry in sequential[0] if entry[0] == "token"), 10)
+
+    def test_lookahead_enforced(self):
+        def bad_build(lp):
+            Simulator.sim().schedule(Event(0.0, lambda e: lp.send(0, LOOKAHEAD / 2, "x", None), None))
+
+        simulation = ParallelSimulation(2, bad_build, LOOKAHEAD)
+        self.assertRaises(RuntimeError, simulation.run)
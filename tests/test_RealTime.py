@@ -0,0 +1,103 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import asyncio
+import threading
+import time
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+from netsimpy.RealTime import RealTimeExecutor
+
+
+class TestRealTime(unittest.TestCase):
+
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        Logger.set_level(Logger.ERROR)
+        self.sim = Simulator()
+        self.fired = []
+
+    def tearDown(self):
+        self.sim.release()
+        Logger.reset()
+
+    def _record(self, event):
+        self.fired.append((event.data(), time.time()))
+
+    def test_paced(self):
+        for delay in [0.1, 0.2, 0.3]:
+            self.sim.schedule(Event(delay, self._record, delay))
+        executor = RealTimeExecutor(scale=10.0)
+        start = time.time()
+        executor.run()
+        self.assertEqual([d for d, _ in self.fired], [0.1, 0.2, 0.3])
+        for delay, wall in self.fired:
+            self.assertGreaterEqual(wall - start, delay / 10.0 - 0.002)
+        self.assertLess(executor.lateness().max() if executor.lateness().count() else 0.0, 0.05)
+
+    def test_inject_from_thread(self):
+        executor = RealTimeExecutor(scale=1.0)
+        timer = threading.Timer(0.02, executor.inject, [Event(0.0, self._record, "injected")])
+        stopper = threading.Timer(0.05, executor.stop)
+        timer.start()
+        stopper.start()
+        executor.run(idle_exit=False)
+        self.assertEqual([d for d, _ in self.fired], ["injected"])
+        self.assertGreater(self.sim.time(), 0.0)
+
+    def test_duration(self):
+        self.sim.schedule(Event(0.01, self._record, "early"))
+        self.sim.schedule(Event(100.0, self._record, "late"))
+        RealTimeExecutor(scale=1.0).run(duration=0.03)
+        self.assertEqual([d for d, _ in self.fired], ["early"])
+
+    def test_asyncio(self):
+        loop = asyncio.new_event_loop()
+        try:
+            self.sim.schedule(Event(0.02, self._record, "scheduled"))
+            executor = RealTimeExecutor(scale=1.0)
+            done = executor.attach(loop, idle_exit=False)
+            loop.call_later(0.01, executor.inject, Event(0.0, self._record, "injected"))
+            loop.call_later(0.04, executor.stop)
+            loop.run_until_complete(done)
+        finally:
+            loop.close()
+        self.assertEqual([d for d, _ in self.fired], ["injected", "scheduled"])
+
+
+    def test_asyncio_running_loop(self):
+        async def main():
+            executor = RealTimeExecutor(scale=1.0)
+            await executor.attach(duration=0.03)
+
+        self.sim.schedule(Event(0.01, self._record, "early"))
+        self.sim.schedule(Event(100.0, self._record, "late"))
+        asyncio.run(main())
+        self.assertEqual([d for d, _ in self.fired], ["early"])
+
@@ -0,0 +1,113 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import random
+import tempfile
+import unittest
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+from netsimpy.Replay import Replay, EventRecorder, first_difference
+
+
+class Ticker(object):
+    """
+    Ticks at random intervals; from tick `change_at` on, a changed version draws its delay differently
+    """
+
+    def __init__(self, sim, count, change_at=None):
+        self._sim = sim
+        self._count = count
+        self._change_at = change_at
+        self._ticks = 0
+        self._log = Logger.get("ticker")
+        sim.schedule(Event(random.expovariate(1.0), self._tick, None))
+
+    def _tick(self, event):
+        self._ticks += 1
+        if self._log.trace_on:
+            self._log.trace("tick {}", self._ticks)
+        if self._ticks < self._count:
+            delay = random.expovariate(1.0)
+            if self._change_at is not None and self._ticks >= self._change_at:
+                delay = random.expovariate(2.0)
+            self._sim.schedule(Event(delay, self._tick, None))
+
+
+def build(change_at=None):
+    return lambda sim: [Ticker(sim, 2000, change_at), Ticker(sim, 2000)]
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        Logger.set_level(Logger.ERROR, "simulator")
+
+    def tearDown(self):
+        Logger.reset()
+
+    def test_reproducible(self):
+        a = Replay(build(), 5).record(interval=100)
+        b = Replay(build(), 5).record(interval=100)
+        self.assertEqual(a.event_count(), 4000)
+        self.assertEqual(len(a.checkpoints()), 40)
+        self.assertEqual(a.checkpoints(), b.checkpoints())
+        self.assertIsNone(first_difference(a, b))
+        self.assertIsNotNone(first_difference(a, Replay(build(), 6).record(interval=100)))
+
+    def test_save_load(self):
+        recorder = Replay(build(), 5, max_events=250).record(interval=100)
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            recorder.save(path)
+            loaded = EventRecorder.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(loaded.checkpoints(), recorder.checkpoints())
+        self.assertEqual(loaded.event_count(), 250)
+
+    def test_bisect(self):
+        before = Replay(build(), 9)
+        after = Replay(build(change_at=700), 9)
+        self.assertIsNone(Replay.bisect(before, Replay(build(), 9), interval=256))
+
+        divergence = Replay.bisect(before, after, interval=256, context=5)
+        self.assertIsNotNone(divergence)
+        keys_a = dict(divergence.keys_a)
+        keys_b = dict(divergence.keys_b)
+        number = divergence.event_number
+        self.assertNotEqual(keys_a[number], keys_b[number])
+        for earlier in range(number - 5, number):
+            self.assertEqual(keys_a[earlier], keys_b[earlier])
+        # the trace covers the events up to the divergence, and logging is restored afterwards
+        self.assertIn("ticker", divergence.trace_b)
+        self.assertIn("Executing event", divergence.trace_b)
+        self.assertFalse(Logger.get("ticker").trace_on)
+        self.assertFalse(Logger.get("simulator").info_on)
+
+    def test_shorter_run(self):
+        divergence = Replay.bisect(Replay(build(), 3, max_events=1000), Replay(build(), 3, max_events=900),
+                                   interval=64)
+        self.assertEqual(divergence.event_number, 901)
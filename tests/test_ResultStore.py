@@ -0,0 +1,176 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from netsimpy.SequentialSampler import SequentialSampler
+from netsimpy.Sweep import Sweep
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+if numpy is not None:
+    from netsimpy.ResultStore import ResultStore, Schema
+
+
+def trial(seed, loss_rate=0.5):
+    return {"failed": 1.0 if random.random() < loss_rate else 0.0, "latency": random.expovariate(1.0)}
+
+
+def write_rows(args):
+    directory, worker, count = args
+    with ResultStore(directory).writer({"worker": worker}, batch_size=7) as writer:
+        for seed in range(count):
+            writer(worker * 1000 + seed, {"failed": 0.0, "latency": float(seed)})
+    return count
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_schema(self):
+        schema = Schema.infer({"latency": 1.5, "seed": 3, "ok": True})
+        self.assertEqual(schema.names(), ["seed", "latency", "ok"])
+        self.assertEqual(schema.dtype("seed"), numpy.dtype(numpy.int64).str)
+        self.assertEqual(Schema.infer({"x": 0}).dtype("x"), numpy.dtype(numpy.float64).str)
+        self.assertEqual(schema.dtype("ok"), "|b1")
+        self.assertEqual(Schema.from_dict(schema.to_dict()), schema)
+        self.assertRaises(ValueError, Schema, [("name", object)])
+        self.assertRaises(ValueError, Schema, [("a/b", "f8")])
+        self.assertRaises(ValueError, Schema, [("a", "f8"), ("a", "i8")])
+        self.assertRaises(KeyError, schema.dtype, "missing")
+
+    def test_batches(self):
+        store = ResultStore(self.directory)
+        writer = store.writer({"loss_rate": 0.25}, batch_size=10)
+        for seed in range(25):
+            writer(seed, {"failed": float(seed % 2), "latency": seed * 0.5})
+        self.assertEqual(len(store.chunk_names()), 2)
+        self.assertEqual(writer.pending(), 5)
+        writer.close()
+        self.assertEqual(len(store.chunk_names()), 3)
+
+        self.assertEqual(store.schema().names(), ["seed", "failed", "latency", "loss_rate"])
+        self.assertEqual(store.rows(), 25)
+        numpy.testing.assert_array_equal(store.column("seed"), numpy.arange(25))
+        numpy.testing.assert_array_equal(store.column("loss_rate"), numpy.full(25, 0.25))
+
+        chunks = list(store.chunks(["latency"]))
+        self.assertEqual(list(chunks[0]), ["latency"])
+        self.assertIsInstance(chunks[0]["latency"], numpy.memmap)
+        self.assertEqual(sum(len(chunk["latency"]) for chunk in chunks), 25)
+
+        reopened = ResultStore(self.directory)
+        self.assertEqual(reopened.schema(), store.schema())
+        self.assertAlmostEqual(reopened.column("latency").sum(), 0.5 * sum(range(25)))
+
+        reopened.clear()
+        self.assertEqual(reopened.rows(), 0)
+        self.assertEqual(len(reopened.column("seed")), 0)
+
+    def test_schema_mismatch(self):
+        store = ResultStore(self.directory, Schema([("seed", "i8"), ("failed", "f8")]))
+        writer = store.writer()
+        self.assertRaises(KeyError, writer.append, {"seed": 1})
+        self.assertRaises(KeyError, writer.append, {"seed": 1, "failed": 0.0, "extra": 1.0})
+        self.assertRaises(ValueError, ResultStore, self.directory, Schema([("seed", "i4")]))
+        self.assertRaises(KeyError, store.column, "missing")
+
+    def test_mixed_numbers(self):
+        store = ResultStore(self.directory)
+        with store.writer() as writer:
+            writer.append({"x": 0})
+            writer.append({"x": 0.75})
+            writer.append({"x": True})
+        self.assertEqual(store.column("x").tolist(), [0.0, 0.75, 1.0])
+
+        with ResultStore(tempfile.mkdtemp(dir=self.directory), Schema([("seed", "i8")])).writer() as writer:
+            writer.append({"seed": 3})
+            self.assertRaises(ValueError, writer.append, {"seed": 3.5})
+            self.assertEqual(writer.pending(), 1)
+
+    def test_sweep_int_then_float(self):
+        store = ResultStore(self.directory)
+        Sweep(trial, {"loss_rate": [0, 0.5]}, {"failed": 0.5}, results=store, min_trials=5, max_trials=5).run()
+        self.assertEqual(sorted(set(store.column("loss_rate").tolist())), [0.0, 0.5])
+
+    def test_sampler(self):
+        store = ResultStore(self.directory)
+        with store.writer(batch_size=16) as writer:
+            result = SequentialSampler(trial, {"failed": 0.2}, min_trials=40, first_seed=100, on_trial=writer).run()
+        columns = store.read(["seed", "failed"])
+        numpy.testing.assert_array_equal(columns["seed"], numpy.array(list(result.seeds())))
+        self.assertAlmostEqual(columns["failed"].mean(), result.mean("failed"))
+
+    def test_sweep(self):
+        store = ResultStore(self.directory)
+        Sweep(trial, {"loss_rate": [0.1, 0.9]}, {"failed": 0.5}, results=store, min_trials=10, max_trials=10).run()
+        columns = store.read(["loss_rate", "failed"])
+        self.assertEqual(len(columns["loss_rate"]), 20)
+        self.assertEqual(sorted(set(columns["loss_rate"])), [0.1, 0.9])
+
+    def test_processes(self):
+        store = ResultStore(self.directory, Schema([("seed", "i8"), ("failed", "f8"), ("latency", "f8"),
+                                                   ("worker", "i8")]))
+        pool = multiprocessing.Pool(3)
+        try:
+            pool.map(write_rows, [(self.directory, worker, 20) for worker in range(3)])
+        finally:
+            pool.close()
+            pool.join()
+        columns = store.read(["seed", "worker"])
+        self.assertEqual(sorted(columns["seed"]), sorted(w * 1000 + s for w in range(3) for s in range(20)))
+        numpy.testing.assert_array_equal(numpy.bincount(columns["worker"]), [20, 20, 20])
+        self.assertFalse([entry for entry in os.listdir(self.directory) if entry.startswith(".")])
+
+    @unittest.skipIf(pyarrow is None, "requires pyarrow")
+    def test_parquet(self):
+        store = ResultStore(self.directory, format="parquet")
+        with store.writer(batch_size=4) as writer:
+            for seed in range(10):
+                writer(seed, {"failed": 0.0})
+        self.assertEqual(len(store.chunk_names()), 3)
+        self.assertEqual(ResultStore(self.directory).format(), "parquet")
+        numpy.testing.assert_array_equal(store.column("seed"), numpy.arange(10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import concurrent.futures
+import random
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.SequentialSampler import SequentialSampler
+
+
+def noisy_trial(seed):
+    # creating a Simulator checks that each replication releases the singleton
+    Simulator()
+    return {"x": random.gauss(5.0, 1.0)}
+
+
+def never_fails(seed):
+    return {"failed": 0.0}
+
+
+class ListPool(object):
+    def map(self, fn, iterable):
+        return [fn(x) for x in iterable]
+
+
+class TestSequentialSampler(unittest.TestCase):
+
+    def test_converges(self):
+        result = SequentialSampler(noisy_trial, {"x": 0.1}, min_trials=10).run()
+        self.assertTrue(result.converged)
+        self.assertLessEqual(result.half_width("x"), 0.1)
+        self.assertAlmostEqual(result.mean("x"), 5.0, delta=0.3)
+        # a 0.1 half-width at sigma 1 needs about 400 trials; should not overshoot by much
+        self.assertLess(result.trials, 1000)
+
+    def test_stops_early(self):
+        result = SequentialSampler(noisy_trial, {"x": 10.0}, min_trials=5).run()
+        self.assertTrue(result.converged)
+        self.assertEqual(result.trials, 5)
+
+    def test_max_trials(self):
+        result = SequentialSampler(noisy_trial, {"x": 0.001}, min_trials=5, max_trials=50).run()
+        self.assertFalse(result.converged)
+        self.assertEqual(result.trials, 50)
+
+    def test_reproducible_with_pool(self):
+        seen = []
+        a = SequentialSampler(noisy_trial, {"x": 0.2}, first_seed=100).run()
+        b = SequentialSampler(noisy_trial, {"x": 0.2}, first_seed=100, pool=ListPool(),
+                              on_trial=lambda seed, metrics: seen.append(seed)).run()
+        self.assertEqual(a.trials, b.trials)
+        self.assertEqual(a.mean("x"), b.mean("x"))
+        self.assertEqual(seen, list(b.seeds()))
+
+    def test_executor(self):
+        a = SequentialSampler(noisy_trial, {"x": 0.2}, first_seed=100).run()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            b = SequentialSampler(noisy_trial, {"x": 0.2}, first_seed=100, pool=executor).run()
+        self.assertEqual(a.trials, b.trials)
+        self.assertEqual(a.mean("x"), b.mean("x"))
+
+    def test_relative(self):
+        result = SequentialSampler(noisy_trial, {"x": 0.05}, relative=True, min_trials=10).run()
+        self.assertTrue(result.converged)
+        self.assertLessEqual(result.half_width("x"), 0.05 * result.mean("x"))
+
+    def test_no_failures_not_converged(self):
+        # with no failures the variance is zero; stopping needs the no-failure bound to be within target
+        result = SequentialSampler(never_fails, {"failed": 0.01}, min_trials=30).run()
+        self.assertTrue(result.converged)
+        self.assertEqual(result.mean("failed"), 0.0)
+        self.assertGreater(result.trials, 300)
+        self.assertGreater(result.half_width("failed"), 0.0)
+        self.assertLessEqual(result.half_width("failed"), 0.01)
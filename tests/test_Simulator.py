@@ -0,0 +1,183 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import random
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+
+
+class RandomTicker(object):
+    """
+    A model that records a random draw at exponentially distributed times
+    """
+
+    def __init__(self, sim, count=None):
+        self._sim = sim
+        self._count = count
+        self.values = []
+        self._sim.schedule(Event(random.expovariate(1.0), self._tick, None))
+
+    def _tick(self, event):
+        self.values.append(random.random())
+        if self._count is None or len(self.values) < self._count:
+            self._sim.schedule(Event(random.expovariate(1.0), self._tick, None))
+
+
+class TestSimulator(unittest.TestCase):
+
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        Logger.set_level(Logger.ERROR, "simulator")
+        self.sim = Simulator()
+
+    def tearDown(self):
+        self.sim.release()
+        Logger.reset()
+
+    def test_singleton(self):
+        self.assertIs(Simulator.sim(), self.sim)
+        self.assertRaises(RuntimeError, Simulator)
+
+    def test_event_order(self):
+        fired = []
+        for delay in [0.3, 0.1, 0.2]:
+            self.sim.schedule(Event(delay, lambda e: fired.append(e.data()), delay))
+        self.sim.execute()
+        self.assertEqual(fired, [0.1, 0.2, 0.3])
+        self.assertEqual(self.sim.time(), 0.3)
+
+    def test_release_clears_log_clock(self):
+        self.assertEqual(Logger.clock(), self.sim.time)
+        self.sim.release()
+        self.assertIsNone(Logger.clock())
+        Logger.set_clock(lambda: 1.5)
+        self.sim.release()
+        self.assertIsNotNone(Logger.clock())
+        Logger.set_clock(None)
+        self.sim = Simulator()
+
+    def test_invalid_event_skipped(self):
+        fired = []
+        event = Event(0.1, lambda e: fired.append(e), None)
+        self.sim.schedule(event)
+        event.invalidate()
+        self.sim.execute()
+        self.assertEqual(fired, [])
+
+    def test_next_event_time_counts_invalid(self):
+        for i in range(5):
+            event = Event(0.1 * (i + 1), lambda e: None, None)
+            self.sim.schedule(event)
+            event.invalidate()
+        self.sim.schedule(Event(1.0, lambda e: None, None))
+        self.assertEqual(self.sim.next_event_time(), 1.0)
+        self.sim.execute()
+        self.assertEqual(self.sim.invalid_count(), 5)
+        self.assertEqual(self.sim.event_count(), 1)
+
+    def test_checkpoint_restore(self):
+        random.seed(1)
+        ticker = self.sim.register(RandomTicker(self.sim))
+        self.sim.execute_steps(50)
+        checkpoint = self.sim.checkpoint()
+        prefix = list(ticker.values)
+
+        self.sim.execute_steps(50)
+        expected = list(ticker.values)
+        expected_time = self.sim.time()
+
+        for _ in range(2):
+            restored, = self.sim.restore(checkpoint)
+            self.assertIsNot(restored, ticker)
+            self.assertIs(restored._sim, self.sim)
+            self.assertEqual(restored.values, prefix)
+            self.sim.execute_steps(50)
+            self.assertEqual(restored.values, expected)
+            self.assertEqual(self.sim.time(), expected_time)
+
+    def test_checkpoint_counters(self):
+        for i in range(3):
+            self.sim.schedule(Event(1.0 + i, lambda e: None, None))
+        checkpoint = self.sim.checkpoint()
+        for i in range(5):
+            event = Event(0.5, lambda e: None, None)
+            self.sim.schedule(event)
+            event.invalidate()
+        self.sim.execute()
+        self.assertEqual(self.sim.invalid_count(), 5)
+        self.assertEqual(self.sim.queue_peak(), 8)
+
+        self.sim.restore(checkpoint)
+        self.assertEqual(self.sim.event_count(), 0)
+        self.assertEqual(self.sim.invalid_count(), 0)
+        self.assertEqual(self.sim.queue_peak(), 3)
+
+    def test_branch(self):
+        random.seed(2)
+        ticker = self.sim.register(RandomTicker(self.sim, count=30))
+        self.sim.execute_steps(10)
+        prefix = list(ticker.values)
+
+        def mutate(sim, i):
+            sim.models()[0].values.append(float(i))
+
+        def result(sim, i):
+            return list(sim.models()[0].values)
+
+        results = self.sim.branch(3, mutate, result, seed=100, max_processes=2)
+        for i, values in enumerate(results):
+            self.assertEqual(values[:len(prefix) + 1], prefix + [float(i)])
+            self.assertEqual(len(values), 30)
+        self.assertNotEqual(results[0][-1], results[1][-1], "branches should be reseeded")
+        self.assertEqual(ticker.values, prefix, "parent state should not change")
+
+    def test_branch_error(self):
+        def mutate(sim, i):
+            if i == 1:
+                raise ValueError("boom")
+
+        self.assertRaises(RuntimeError, self.sim.branch, 2, mutate)
+
+    def test_profiler(self):
+        from netsimpy.Profiler import Profiler
+
+        random.seed(3)
+        ticker = RandomTicker(self.sim, count=100)
+        profiler = Profiler(sample_interval=10)
+        self.sim.set_profiler(profiler)
+        self.sim.execute()
+
+        rows = profiler.callbacks()
+        self.assertEqual(len(rows), 1)
+        name, calls, elapsed = rows[0]
+        self.assertTrue(name.endswith("RandomTicker._tick"), name)
+        self.assertEqual(calls, 100)
+        self.assertEqual(len(profiler.samples()), 10)
+        self.assertIn("RandomTicker._tick", profiler.report())
+        self.assertEqual(len(ticker.values), 100)
@@ -0,0 +1,138 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import random
+import unittest
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+from netsimpy.Simulator import Simulator
+from netsimpy.Splitting import MultilevelSplitting
+
+
+class Walk(object):
+    """
+    A gambler's-ruin walk from 1: up with probability `up`, absorbed at 0 and at `top`
+    """
+
+    def __init__(self, sim, up, top):
+        self._sim = sim
+        self._up = up
+        self._top = top
+        self.position = 1
+        sim.schedule(Event(1.0, self._step, None))
+
+    def _step(self, event):
+        self.position += 1 if random.random() < self._up else -1
+        if 0 < self.position < self._top:
+            self._sim.schedule(Event(1.0, self._step, None))
+
+
+def ruin_probability(up, top):
+    """
+    :return: The probability that the walk reaches `top` before 0
+    """
+    r = (1.0 - up) / up
+    return (r - 1.0) / (r ** top - 1.0)
+
+
+def build(up, top):
+    return lambda sim: sim.register(Walk(sim, up, top))
+
+
+def position(sim):
+    return sim.models()[0].position
+
+
+class TestMultilevelSplitting(unittest.TestCase):
+
+    def setUp(self):
+        Logger.set_level(Logger.ERROR, "simulator")
+
+    def tearDown(self):
+        Logger.reset()
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+
+    def test_rare(self):
+        exact = ruin_probability(0.3, 10)
+        splitting = MultilevelSplitting(build(0.3, 10), position, levels=range(2, 11), splits=3)
+        result = splitting.run(300)
+
+        self.assertLess(abs(result.probability() - exact), 3 * result.half_width())
+        self.assertLess(result.relative_error(), 0.5)
+        # plain Monte Carlo needs (1.96 / relative error)^2 / exact trials of about 2.5 events each
+        plain = 2.5 * (1.96 / result.relative_error()) ** 2 / exact
+        self.assertLess(result.events, 0.25 * plain)
+        self.assertEqual(result.started[0], 300)
+        self.assertEqual(result.started[1], 3 * result.crossings[0])
+        product = 1.0
+        for p in result.level_probabilities():
+            product *= p
+        self.assertAlmostEqual(product * result.started[0] / result.trials, result.probability())
+
+    def test_unbiased(self):
+        exact = ruin_probability(0.45, 4)
+        result = MultilevelSplitting(build(0.45, 4), position, levels=[2, 3, 4], splits=2).run(2000)
+        self.assertLess(abs(result.probability() - exact), 3 * result.half_width())
+
+    def test_reproducible(self):
+        a = MultilevelSplitting(build(0.3, 6), position, levels=[3, 6], splits=4, first_seed=7).run(50)
+        b = MultilevelSplitting(build(0.3, 6), position, levels=[3, 6], splits=4, first_seed=7).run(50)
+        self.assertEqual(a.probability(), b.probability())
+        self.assertEqual(a.events, b.events)
+        self.assertIsNone(Simulator.sim())
+
+    def test_max_events(self):
+        # an unbiased coin needs many steps to climb to 20; a 5-event budget never gets there
+        splitting = MultilevelSplitting(build(0.5, 20), position, levels=[3, 20], splits=2, max_events=5)
+        result = splitting.run(50)
+        self.assertEqual(result.probability(), 0.0)
+        self.assertLessEqual(result.events, 50 * 5 + 2 * 5 * result.crossings[0])
+
+    def test_levels(self):
+        self.assertRaises(ValueError, MultilevelSplitting, build(0.3, 6), position, [])
+        self.assertRaises(ValueError, MultilevelSplitting, build(0.3, 6), position, [3, 2])
+        self.assertRaises(ValueError, MultilevelSplitting, build(0.3, 6), position, [2, 3], splits=[2, 2])
+        self.assertRaises(ValueError, MultilevelSplitting, build(0.3, 6), position, [2, 3], splits=0)
+
+    def test_stop(self):
+        sim = Simulator()
+        fired = []
+
+        def fire(event):
+            fired.append(event.data())
+            if event.data() == 2:
+                sim.stop()
+
+        for i in range(5):
+            sim.schedule(Event(i + 1.0, fire, i))
+        sim.execute()
+        self.assertEqual(fired, [0, 1, 2])
+        self.assertEqual(sim.queue_size(), 2)
+        sim.execute()
+        self.assertEqual(fired, [0, 1, 2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import functools
+import random
+import shutil
+import tempfile
+import unittest
+from netsimpy.Sweep import Sweep, expand_grid, trial_name
+
+calls = []
+
+
+def trial(seed, loss_rate, delay):
+    calls.append((loss_rate, delay))
+    return {"x": loss_rate + delay + random.gauss(0.0, 0.01)}
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        del calls[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_expand_grid(self):
+        points = expand_grid({"b": [1, 2], "a": ["x", "y", "z"]})
+        self.assertEqual(len(points), 6)
+        self.assertEqual(points[0], {"a": "x", "b": 1})
+        self.assertEqual(points[1], {"a": "x", "b": 2})
+
+    def test_cache_only_new_points(self):
+        args = dict(targets={"x": 0.01}, cache_dir=self.cache_dir, min_trials=5, max_trials=20)
+        first = Sweep(trial, {"loss_rate": [0.1, 0.2], "delay": [1.0]}, **args).run()
+        self.assertEqual(set(c for c in calls), set([(0.1, 1.0), (0.2, 1.0)]))
+
+        del calls[:]
+        second = Sweep(trial, {"loss_rate": [0.1, 0.2, 0.3], "delay": [1.0]}, **args).run()
+        self.assertEqual(set(c for c in calls), set([(0.3, 1.0)]))
+        self.assertEqual(len(second), 3)
+        for (params_a, a), (params_b, b) in zip(first, second):
+            self.assertEqual(params_a, params_b)
+            self.assertEqual(a.trials, b.trials)
+            self.assertEqual(a.mean("x"), b.mean("x"))
+            self.assertEqual(a.half_width("x"), b.half_width("x"))
+
+    def test_key_depends_on_seeds(self):
+        grid = {"loss_rate": [0.1], "delay": [1.0]}
+        a = Sweep(trial, grid, {"x": 0.01}, cache_dir=self.cache_dir, first_seed=0)
+        b = Sweep(trial, grid, {"x": 0.01}, cache_dir=self.cache_dir, first_seed=1000)
+        point = a.points()[0]
+        self.assertNotEqual(a.cache_key(point), b.cache_key(point))
+
+    def test_key_depends_on_trial(self):
+        grid = {"loss_rate": [0.1]}
+        a = Sweep(functools.partial(trial, delay=1.0), grid, {"x": 0.01}, cache_dir=self.cache_dir)
+        b = Sweep(functools.partial(trial, delay=2.0), grid, {"x": 0.01}, cache_dir=self.cache_dir)
+        point = a.points()[0]
+        self.assertNotEqual(a.cache_key(point), b.cache_key(point))
+        self.assertEqual(trial_name(functools.partial(trial, delay=1.0)),
+                         {"function": __name__ + ".trial", "args": [], "keywords": {"delay": 1.0}})
+
+    def test_lambda_needs_name(self):
+        grid = {"loss_rate": [0.1], "delay": [1.0]}
+        self.assertIsNone(trial_name(lambda seed: {}))
+        self.assertRaises(ValueError, Sweep, lambda seed, **params: {"x": 1.0}, grid, {"x": 0.01},
+                          cache_dir=self.cache_dir)
+        a = Sweep(lambda seed, **params: {"x": 1.0}, grid, {"x": 0.01}, cache_dir=self.cache_dir, name="one")
+        b = Sweep(lambda seed, **params: {"x": 2.0}, grid, {"x": 0.01}, cache_dir=self.cache_dir, name="two")
+        point = a.points()[0]
+        self.assertNotEqual(a.cache_key(point), b.cache_key(point))
+
+    def test_uncached_partial(self):
+        # arguments need not be JSON-serializable when nothing is cached
+        model = object()
+        partial = functools.partial(lambda seed, model, loss_rate: {"x": loss_rate}, model=model)
+        self.assertRaises(ValueError, Sweep, functools.partial(trial, model=model), {"loss_rate": [0.1]},
+                          {"x": 0.01}, cache_dir=self.cache_dir)
+        results = Sweep(partial, {"loss_rate": [0.1]}, {"x": 0.01}, min_trials=5).run()
+        self.assertEqual(results[0][1].mean("x"), 0.1)
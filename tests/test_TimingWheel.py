@@ -0,0 +1,146 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import random
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.Logger import Logger
+from netsimpy.Profiler import Profiler
+from netsimpy.TimingWheel import TimingWheel
+
+
+class TimerModel(object):
+    """
+    Starts timers of random duration at random times and cancels most of them
+    """
+
+    def __init__(self, sim, seed, count):
+        self._sim = sim
+        self._rng = random.Random(seed)
+        self._remaining = count
+        self._pending = []
+        self.fired = []
+        sim.schedule(Event(0.0, self._start, None))
+
+    def _start(self, event):
+        # durations span level 0, level 1, and beyond the horizon of the test wheel
+        duration = self._rng.choice([self._rng.uniform(0.0, 0.01), self._rng.uniform(0.0, 1.0), 5.0])
+        timer = Event(duration, self._timeout, len(self.fired) + self._remaining)
+        self._sim.schedule_timer(timer)
+        self._pending.append(timer)
+        if self._rng.random() < 0.7:
+            self._sim.cancel_timer(self._pending.pop(self._rng.randrange(len(self._pending))))
+
+        self._remaining -= 1
+        if self._remaining > 0:
+            self._sim.schedule(Event(self._rng.expovariate(1000.0), self._start, None))
+
+    def _timeout(self, event):
+        self.fired.append((self._sim.time(), event.data()))
+
+
+class TestTimingWheel(unittest.TestCase):
+
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        Logger.set_level(Logger.ERROR)
+
+    def tearDown(self):
+        Simulator.sim().release()
+        Logger.reset()
+
+    def _run(self, use_wheel):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        sim = Simulator()
+        wheel = None
+        if use_wheel:
+            wheel = TimingWheel(sim, resolution=1E-3, slots=16, levels=2)
+            sim.set_timing_wheel(wheel)
+        model = TimerModel(sim, 5, 3000)
+        sim.execute()
+        return model.fired, wheel
+
+    def test_same_times_as_heap(self):
+        expected, _ = self._run(False)
+        actual, wheel = self._run(True)
+        self.assertGreater(len(expected), 500)
+        self.assertEqual(sorted(actual), sorted(expected))
+        self.assertEqual(len(wheel), 0)
+
+    def test_cancel_removes_from_wheel(self):
+        sim = Simulator()
+        wheel = TimingWheel(sim, resolution=1E-3, slots=16, levels=2)
+        sim.set_timing_wheel(wheel)
+        timers = [Event(0.005 * (i + 1), lambda e: self.fail("cancelled timer fired"), None) for i in range(20)]
+        for timer in timers:
+            sim.schedule_timer(timer)
+        self.assertEqual(len(wheel), 20)
+        self.assertLessEqual(sim.queue_size(), 1, "only the sentinel should be in the heap")
+        for timer in timers:
+            sim.cancel_timer(timer)
+        self.assertEqual(len(wheel), 0)
+        sim.execute()
+
+    def test_sentinels_not_counted(self):
+        sim = Simulator()
+        sim.set_timing_wheel(TimingWheel(sim, resolution=1E-3, slots=16, levels=2))
+        fired = []
+        for i in range(10):
+            sim.schedule_timer(Event(0.0015 * (i + 1), lambda e: fired.append(e.data()), i))
+        sim.execute_steps(4)
+        self.assertEqual(fired, [0, 1, 2, 3])
+        self.assertEqual(sim.event_count(), 4)
+        sim.execute()
+        self.assertEqual(sim.event_count(), 10)
+
+
+    def test_sentinels_not_hooked_or_profiled(self):
+        sim = Simulator()
+        sim.set_timing_wheel(TimingWheel(sim, resolution=1E-3, slots=16, levels=2))
+        profiler = Profiler()
+        sim.set_profiler(profiler)
+        hooked = []
+        sim.set_event_hook(hooked.append)
+        for i in range(10):
+            sim.schedule_timer(Event(0.02 * (i + 1), lambda e: None, i))
+        sim.execute()
+        self.assertEqual([event.data() for event in hooked], list(range(10)))
+        self.assertEqual(sum(calls for _, calls, _ in profiler.callbacks()), 10)
+
+    def test_earlier_timer_stays_in_wheel(self):
+        sim = Simulator()
+        wheel = TimingWheel(sim, resolution=1E-3, slots=16, levels=2)
+        sim.set_timing_wheel(wheel)
+        fired = []
+        sim.schedule_timer(Event(0.012, lambda e: fired.append(sim.time()), None))
+        # the cursor has run ahead to the first timer; an earlier one moves it back
+        sim.schedule_timer(Event(0.003, lambda e: fired.append(sim.time()), None))
+        self.assertEqual(len(wheel), 2)
+        sim.execute()
+        self.assertEqual(fired, [0.003, 0.012])
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.network.Channel import FifoChannel
+from netsimpy.network.PhyLayer import PhyLayer
+from netsimpy.network import SDU
+
+
+class RecordingPhy(PhyLayer):
+    def __init__(self, channel):
+        super(RecordingPhy, self).__init__(channel)
+        self.states = []
+
+    def _receive_request(self, sdu):
+        pass
+
+    def _receive_indication(self, sdu):
+        self.states.append((Simulator.sim().time(), sdu))
+
+
+class FifoChannelTest(unittest.TestCase):
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        self.sim = Simulator()
+        self.channel = FifoChannel(layer_delay=0.5)
+        self.waiting = RecordingPhy(self.channel)
+        self.other = RecordingPhy(self.channel)
+        self.channel.set_carrier_sense(self.waiting, True)
+
+    def tearDown(self):
+        self.sim.release()
+
+    def _transition(self, busy):
+        def callback(event):
+            self.channel._busy = busy
+            self.channel._state_changed(busy)
+        return callback
+
+    def test_attach_is_silent(self):
+        self.assertEqual(self.sim.queue_size(), 0)
+        self.assertFalse(self.channel.is_busy())
+
+    def test_pull(self):
+        self.channel.receive(SDU.Request("frame"))
+        self.assertTrue(self.channel.is_busy())
+        self.assertRaises(RuntimeError, self.channel.receive, SDU.Request("frame"))
+
+    def test_coalesce(self):
+        # busy and idle at 1.0 cancel out, busy, idle, busy at 2.0 is one busy notification
+        for time, busy in [(1.0, True), (1.0, False), (2.0, True), (2.0, False), (2.0, True), (3.0, False)]:
+            self.sim.schedule(Event(time, self._transition(busy), None))
+        self.sim.execute()
+
+        self.assertEqual(self.waiting.states, [(2.5, SDU.BUSY), (3.5, SDU.IDLE)])
+        self.assertEqual(self.other.states, [])
+        self.assertEqual(self.sim.event_count(), 6 + 3)
+
+    def test_unsubscribe(self):
+        self.channel.set_carrier_sense(self.waiting, False)
+        self.channel.set_carrier_sense(self.other, True)
+        self.channel.detach(self.other)
+        self.sim.schedule(Event(1.0, self._transition(True), None))
+        self.sim.execute()
+        self.assertEqual(self.waiting.states, [])
+        self.assertEqual(self.other.states, [])
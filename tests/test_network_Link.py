@@ -0,0 +1,159 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import random
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.network.Layer import Layer
+from netsimpy.network.Link import PointToPointLink, DropTailQueue, RedQueue
+from netsimpy.network.Message import Message
+from netsimpy.network import SDU
+
+
+class Sink(Layer):
+    def __init__(self, sim):
+        self._sim = sim
+        self.arrivals = []
+
+    def _receive_request(self, sdu):
+        raise RuntimeError("unexpected request")
+
+    def _receive_indication(self, sdu):
+        self.arrivals.append((self._sim.time(), sdu.payload))
+
+
+class PointToPointLinkTest(unittest.TestCase):
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        self.sim = Simulator()
+        self.sink = Sink(self.sim)
+
+    def tearDown(self):
+        self.sim.release()
+
+    def test_pipelining(self):
+        # 1000 octets at 8 Mbps is 1 ms per frame, with 100 ms of propagation
+        link = PointToPointLink(self.sim, 8E6, 0.1, peer=self.sink)
+        messages = [Message(virtual_length=1000) for _ in range(50)]
+        for message in messages:
+            link.receive(SDU.Request(message))
+        self.assertEqual(link.occupancy(), 50)
+        # one event for the head of the pipe
+        self.assertEqual(self.sim.queue_size(), 1)
+        self.sim.execute()
+
+        self.assertEqual([m for _, m in self.sink.arrivals], messages)
+        for index, (time, _) in enumerate(self.sink.arrivals):
+            self.assertAlmostEqual(time, 0.1 + (index + 1) * 1E-3)
+        self.assertEqual(link.delivered(), 50)
+        self.assertEqual(link.in_flight(), 0)
+
+    def test_idle_gap(self):
+        link = PointToPointLink(self.sim, 8E3, 0.5, peer=self.sink)
+        link.send(Message(virtual_length=1))
+        self.sim.schedule(Event(2.0, lambda event: link.send(Message(virtual_length=1)), None))
+        self.sim.execute()
+        self.assertAlmostEqual(self.sink.arrivals[0][0], 0.501)
+        self.assertAlmostEqual(self.sink.arrivals[1][0], 2.501)
+
+    def test_drop_tail(self):
+        link = PointToPointLink(self.sim, 8E6, 0.01, queue=DropTailQueue(10), peer=self.sink)
+        results = [link.send(Message(virtual_length=1000)) for _ in range(15)]
+        self.assertEqual(results, [True] * 10 + [False] * 5)
+        self.assertEqual(link.dropped(), 5)
+
+        # after 3 departures there is room for 3 more
+        def refill(event):
+            results[:] = [link.send(Message(virtual_length=1000)) for _ in range(4)]
+        self.sim.schedule(Event(0.0035, refill, None))
+        self.sim.execute()
+        self.assertEqual(results, [True] * 3 + [False])
+        self.assertEqual(len(self.sink.arrivals), 13)
+
+    def test_red(self):
+        queue = RedQueue(100, 5, 15, max_probability=0.2, weight=0.2, rng=random.Random(1))
+        link = PointToPointLink(self.sim, 8E6, 0.01, queue=queue, peer=self.sink)
+        results = [link.send(Message(virtual_length=1000)) for _ in range(100)]
+        # never drops while the average is low, always drops above the max threshold
+        self.assertTrue(all(results[:5]))
+        self.assertFalse(any(results[-20:]))
+        self.assertLess(link.occupancy(), 30)
+        self.assertGreater(queue.average(), 15)
+
+    def test_red_checkpoint(self):
+        random.seed(3)
+        queue = RedQueue(20, 2, 5, max_probability=0.5, weight=0.5)
+        link = self.sim.register(PointToPointLink(self.sim, 1E6, 1E-3, queue=queue, peer=self.sink))
+        for _ in range(4):
+            link.send(Message(virtual_length=1000))
+        checkpoint = self.sim.checkpoint()
+
+        runs = []
+        for _ in range(2):
+            restored, = self.sim.restore(checkpoint)
+            runs.append([restored.send(Message(virtual_length=1000)) for _ in range(10)])
+        self.assertEqual(runs[0], runs[1])
+        self.assertIn(False, runs[0])
+
+    def test_clear(self):
+        link = PointToPointLink(self.sim, 8E6, 0.01, peer=self.sink)
+        link.send(Message(virtual_length=1000))
+        link.clear()
+        self.sim.execute()
+        self.assertEqual(self.sink.arrivals, [])
+
+    def test_fluid_background(self):
+        # 8 Mbps, 1000 octet frames take 1 ms
+        link = PointToPointLink(self.sim, 8E6, 0.0, peer=self.sink)
+        link.set_background_rate("cross", 4E6)
+
+        def overload(event):
+            # twice the bandwidth for 1 second leaves 8 Mbits of work
+            link.set_background_rate("cross", 12E6)
+            link.set_background_rate("burst", 4E6)
+
+        def underload(event):
+            self.assertAlmostEqual(link.backlog(), 8E6)
+            link.set_background_rate("burst", 0.0)
+            link.set_background_rate("cross", 0.0)
+
+        def send(event):
+            link.send(Message(virtual_length=1000))
+
+        self.sim.schedule(Event(0.5, send, None))
+        self.sim.schedule(Event(1.0, overload, None))
+        self.sim.schedule(Event(2.0, underload, None))
+        # half of the work has drained
+        self.sim.schedule(Event(2.5, send, None))
+        self.sim.schedule(Event(4.0, send, None))
+        self.sim.execute()
+
+        times = [time for time, _ in self.sink.arrivals]
+        # an underloaded fluid never queues
+        self.assertAlmostEqual(times[0], 0.501)
+        self.assertAlmostEqual(times[1], 2.5 + 0.5 + 0.001)
+        self.assertAlmostEqual(times[2], 4.001)
+        self.assertEqual(link.background_rate(), 0.0)
@@ -0,0 +1,140 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import math
+import os
+import tempfile
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from netsimpy.network.Mobility import RandomWaypoint, GaussMarkov, TraceMobility, NeighborTracker
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class MobilityTest(unittest.TestCase):
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        self.sim = Simulator()
+
+    def tearDown(self):
+        self.sim.release()
+
+    def test_trace(self):
+        model = TraceMobility([[(1.0, 0.0, 0.0), (3.0, 4.0, 0.0)], [(0.0, 5.0, 5.0)]])
+        self.assertEqual(model.position(0, 0.5), (0.0, 0.0))
+        self.assertEqual(model.position(0, 2.0), (2.0, 0.0))
+        self.assertEqual(model.position(0, 10.0), (4.0, 0.0))
+        self.assertEqual(model.position(1, 10.0), (5.0, 5.0))
+        self.assertRaises(ValueError, model.positions, 5.0)
+
+    def test_trace_load(self):
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, "w") as trace:
+                trace.write("# node time x y\n1 2.0 1 1\n0 0.0 0 0\n0 1.0 1 0\n1 0.0 0 0\n")
+            model = TraceMobility.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(len(model), 2)
+        self.assertEqual(model.position(1, 1.0), (0.5, 0.5))
+
+    def test_cache(self):
+        model = RandomWaypoint(10, 100.0, 1.0, 5.0, pause=2.0, seed=1)
+        first = model.positions(3.0)
+        self.assertIs(model.positions(3.0), first)
+        self.assertFalse(first.flags.writeable)
+
+    def test_order_independent(self):
+        # the path does not depend on how often positions are read
+        coarse = RandomWaypoint(5, 100.0, 1.0, 5.0, pause=1.0, seed=7)
+        fine = RandomWaypoint(5, 100.0, 1.0, 5.0, pause=1.0, seed=7)
+        for time in numpy.arange(0.0, 500.0, 0.37):
+            fine.positions(time)
+        numpy.testing.assert_allclose(coarse.positions(500.0), fine.positions(500.0))
+
+    def test_waypoint_in_area(self):
+        model = RandomWaypoint(20, (100.0, 50.0), 1.0, 10.0, seed=3)
+        for time in range(0, 1000, 7):
+            positions = model.positions(float(time))
+            self.assertTrue((positions >= -1E-9).all())
+            self.assertTrue((positions[:, 0] <= 100.0 + 1E-9).all())
+            self.assertTrue((positions[:, 1] <= 50.0 + 1E-9).all())
+
+    def test_gauss_markov_in_area(self):
+        model = GaussMarkov(20, 100.0, 5.0, alpha=0.5, interval=1.0, seed=3)
+        previous = model.positions(0.0)
+        for time in numpy.arange(0.5, 500.0, 0.5):
+            positions = model.positions(time)
+            self.assertTrue((positions >= -1E-6).all())
+            self.assertTrue((positions <= 100.0 + 1E-6).all())
+            # bounded speed, so no jumps
+            self.assertLess(numpy.abs(positions - previous).max(), 20.0)
+            previous = positions
+
+    def test_neighbor_crossings(self):
+        # node 1 passes node 0 at unit speed, in range (radius 2) from t = 8 to t = 12
+        model = TraceMobility([[(0.0, 0.0, 0.0)], [(0.0, -10.0, 0.0), (20.0, 10.0, 0.0)]])
+        changes = []
+        tracker = NeighborTracker(model, 2.0, lambda a, b, near: changes.append((self.sim.time(), a, b, near)))
+        tracker.start()
+        self.sim.execute()
+        self.assertEqual(len(changes), 2)
+        self.assertAlmostEqual(changes[0][0], 8.0)
+        self.assertEqual(changes[0][1:], (0, 1, True))
+        self.assertAlmostEqual(changes[1][0], 12.0)
+        self.assertEqual(changes[1][1:], (0, 1, False))
+        self.assertEqual(self.sim.event_count(), 2)
+
+    def test_neighbor_tracker_matches_distances(self):
+        model = RandomWaypoint(30, 100.0, 1.0, 5.0, pause=3.0, seed=11)
+        tracker = NeighborTracker(model, 20.0, lambda a, b, near: None)
+        tracker.start()
+        checks = []
+
+        def check(event):
+            positions = model.positions()
+            difference = positions[:, None, :] - positions[None, :, :]
+            distance = numpy.sqrt((difference ** 2).sum(axis=2))
+            # ignore pairs right at the boundary
+            clear = numpy.abs(distance - 20.0) > 1E-6
+            numpy.fill_diagonal(clear, False)
+            expected = distance < 20.0
+            tracked = numpy.zeros(expected.shape, dtype=bool)
+            for node in range(len(model)):
+                tracked[node, tracker.neighbors(node)] = True
+            checks.append(bool((tracked[clear] == expected[clear]).all()))
+
+        for time in range(1, 300, 13):
+            self.sim.schedule(Event(float(time) + 0.5, check, None))
+        self.sim.execute_until(300.0)
+        self.assertEqual(len(checks), 23)
+        self.assertTrue(all(checks))
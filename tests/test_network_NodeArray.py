@@ -0,0 +1,146 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.network.Channel import FifoChannel
+from netsimpy.network.PhyLayer import PhyLayer
+from netsimpy.network import SDU
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from netsimpy.network.NodeArray import NodeArray, MacProxy, PhyProxy
+
+    class CountingNodes(NodeArray):
+        FIELDS = dict(NodeArray.FIELDS, received=("int64", 0))
+
+        def mac_request(self, index, sdu):
+            self.field("queue_length")[index] += 1
+
+        def mac_indication(self, index, sdu):
+            pass
+
+        def phy_request(self, index, sdu):
+            pass
+
+        def phy_indication(self, index, sdu):
+            self.field("received")[index] += 1
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class NodeArrayTest(unittest.TestCase):
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        self.sim = Simulator()
+
+    def tearDown(self):
+        self.sim.release()
+
+    def test_fields(self):
+        nodes = CountingNodes(5, fields={"energy": ("float64", 1.5)})
+        self.assertEqual(len(nodes), 5)
+        self.assertIn("energy", nodes.fields())
+        self.assertEqual(nodes.get(2, "energy"), 1.5)
+        nodes.set(2, "contention_window", 31)
+        self.assertEqual(nodes.field("contention_window").tolist(), [15, 15, 31, 15, 15])
+
+    def test_backoff(self):
+        nodes = CountingNodes(6, seed=1)
+        nodes.field("backoff")[:] = [0, 1, 2, 3, 1, 5]
+        self.assertEqual(nodes.decrement_backoff().tolist(), [1, 4])
+        self.assertEqual(nodes.field("backoff").tolist(), [0, 0, 1, 2, 0, 4])
+        self.assertEqual(nodes.decrement_backoff(active=[2, 5]).tolist(), [2])
+        self.assertEqual(nodes.field("backoff").tolist(), [0, 0, 0, 2, 0, 3])
+
+        nodes.double_window([1, 4])
+        nodes.double_window([1])
+        self.assertEqual(nodes.field("contention_window").tolist(), [15, 63, 15, 15, 31, 15])
+        self.assertEqual(nodes.field("retries").tolist(), [0, 2, 0, 0, 1, 0])
+        nodes.draw_backoff(numpy.arange(6))
+        self.assertTrue((nodes.field("backoff") <= nodes.field("contention_window")).all())
+        nodes.reset_window([1])
+        self.assertEqual(nodes.get(1, "contention_window"), 15)
+        self.assertEqual(nodes.get(1, "retries"), 0)
+
+    def test_reset_window_override(self):
+        nodes = CountingNodes(3, fields={"contention_window": ("int32", 31)})
+        nodes.double_window([0, 1])
+        self.assertEqual(nodes.field("contention_window").tolist(), [63, 63, 31])
+        nodes.reset_window([0])
+        self.assertEqual(nodes.field("contention_window").tolist(), [31, 63, 31])
+
+    def test_proxies(self):
+        nodes = CountingNodes(3)
+        channel = FifoChannel()
+        phys = [PhyProxy(nodes, index, channel) for index in range(3)]
+        macs = [MacProxy(nodes, index, phys[index]) for index in range(3)]
+        channel.set_carrier_sense(phys[1], True)
+
+        macs[2].receive(SDU.Request("frame"))
+        self.assertEqual(macs[2].get("queue_length"), 1)
+        phys[1].receive(SDU.IDLE)
+        self.assertEqual(nodes.field("received").tolist(), [0, 1, 0])
+        macs[0].set("retries", 4)
+        self.assertEqual(phys[0].get("retries"), 4)
+        self.assertRaises(TypeError, NodeArray, 3)
+
+    def test_energy(self):
+        nodes = CountingNodes(4)
+        channel = FifoChannel()
+        phys = [PhyProxy(nodes, index, channel) for index in range(4)]
+        self.sim.schedule(Event(1.0, lambda event: nodes.set_radio_state([0, 1, 1], PhyLayer.TX), None))
+        self.sim.schedule(Event(3.0, lambda event: phys[1].set_radio_state(PhyLayer.RX), None))
+        self.sim.schedule(Event(4.0, lambda event: nodes.set_radio_state(numpy.arange(4) >= 2, PhyLayer.SLEEP), None))
+        self.sim.execute()
+
+        times = nodes.time_in_state(10.0)
+        self.assertEqual(times[1].tolist(), [0.0, 1.0, 7.0, 2.0])
+        self.assertEqual(times[3].tolist(), [6.0, 4.0, 0.0, 0.0])
+        self.assertEqual(phys[1].time_in_state(10.0), times[1].tolist())
+        self.assertEqual(phys[3].radio_state(), PhyLayer.SLEEP)
+        numpy.testing.assert_allclose(nodes.energy(10.0).sum(axis=1),
+                                      [phy.energy(10.0) for phy in phys])
+        numpy.testing.assert_allclose(PhyLayer.energies(phys, 10.0), nodes.energy(10.0))
+
+    def test_proxy_power(self):
+        nodes = CountingNodes(2)
+        phys = [PhyProxy(nodes, index, FifoChannel()) for index in range(2)]
+        nodes.power()[:] = (1.0, 1.0, 1.0, 1.0)
+        phys[1].set_power((2.0, 2.0, 2.0, 2.0))
+        self.sim.schedule(Event(4.0, lambda event: phys[0].set_radio_state(PhyLayer.TX), None))
+        self.sim.schedule(Event(10.0, lambda event: None, None))
+        self.sim.execute()
+
+        self.assertFalse(hasattr(phys[0], "_state_times"))
+        self.assertEqual(phys[0].radio_state(), PhyLayer.TX)
+        self.assertAlmostEqual(phys[0].energy(), 10.0)
+        self.assertAlmostEqual(phys[0].energy(), nodes.energy()[0].sum())
+        self.assertAlmostEqual(phys[1].energy(), nodes.energy()[1].sum())
+        self.assertAlmostEqual(phys[1].energy(), 20.0)
@@ -0,0 +1,77 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from netsimpy.Simulator import Simulator
+from netsimpy.Event import Event
+from netsimpy.network.Channel import FifoChannel
+from netsimpy.network.PhyLayer import PhyLayer, SimplexSingleRate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class EnergyTest(unittest.TestCase):
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        self.sim = Simulator()
+        self.channel = FifoChannel()
+
+    def tearDown(self):
+        self.sim.release()
+
+    def _at(self, time, phy, state):
+        self.sim.schedule(Event(time, lambda event: phy.set_radio_state(state), None))
+
+    def test_time_in_state(self):
+        phy = SimplexSingleRate(self.channel, 1E6)
+        phy.set_power((0.0, 1.0, 2.0, 3.0))
+        self._at(1.0, phy, PhyLayer.TX)
+        self._at(1.5, phy, PhyLayer.RX)
+        self._at(3.5, phy, PhyLayer.SLEEP)
+        self._at(10.0, phy, PhyLayer.SLEEP)
+        self.sim.execute()
+
+        self.assertEqual(phy.radio_state(), PhyLayer.SLEEP)
+        self.assertEqual(phy.time_in_state(), [6.5, 1.0, 2.0, 0.5])
+        self.assertAlmostEqual(phy.energy(), 1.0 + 4.0 + 1.5)
+        # the open interval is included up to the given time
+        self.assertEqual(phy.time_in_state(20.0)[PhyLayer.SLEEP], 16.5)
+        self.assertRaises(ValueError, phy.set_radio_state, 7)
+
+    @unittest.skipIf(numpy is None, "requires numpy")
+    def test_energies(self):
+        phys = [SimplexSingleRate(self.channel, 1E6) for _ in range(3)]
+        self._at(2.0, phys[1], PhyLayer.TX)
+        self._at(4.0, phys[2], PhyLayer.SLEEP)
+        self.sim.execute()
+
+        energies = PhyLayer.energies(phys, time=10.0)
+        self.assertEqual(energies.shape, (3, 4))
+        expected = [phy.energy(10.0) for phy in phys]
+        numpy.testing.assert_allclose(energies.sum(axis=1), expected)
+        self.assertAlmostEqual(energies[1, PhyLayer.TX], 8.0 * PhyLayer.POWER[PhyLayer.TX])
@@ -0,0 +1,56 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import copy
+import pickle
+import unittest
+from netsimpy.network import SDU
+
+
+class SDUTest(unittest.TestCase):
+    def test_slots(self):
+        sdu = SDU.Request("data")
+        self.assertEqual(sdu.payload, "data")
+        self.assertFalse(hasattr(sdu, "__dict__"))
+        self.assertRaises(AttributeError, setattr, sdu, "other", 1)
+        self.assertIsInstance(SDU.Indication(), SDU.SDU)
+
+    def test_state_singletons(self):
+        self.assertIsInstance(SDU.BUSY, SDU.BusyIndication)
+        self.assertIsInstance(SDU.IDLE, SDU.IdleIndication)
+        self.assertIsInstance(SDU.BUSY, SDU.Indication)
+        self.assertIsNone(SDU.BUSY.payload)
+        self.assertRaises(AttributeError, setattr, SDU.BUSY, "payload", 1)
+        self.assertEqual(SDU.BusyIndication("x").payload, "x")
+
+    def test_state_copy_pickle(self):
+        self.assertIs(copy.deepcopy(SDU.BUSY), SDU.BUSY)
+        self.assertIs(copy.copy(SDU.IDLE), SDU.IDLE)
+        self.assertIs(pickle.loads(pickle.dumps(SDU.IDLE)), SDU.IDLE)
+        self.assertIs(pickle.loads(pickle.dumps(SDU.BUSY)), SDU.BUSY)
+        state = copy.deepcopy({"last": SDU.BUSY})
+        self.assertIs(state["last"], SDU.BUSY)
+        other = pickle.loads(pickle.dumps(SDU.BusyIndication("x")))
+        self.assertIsInstance(other, SDU.BusyIndication)
+        self.assertEqual(other.payload, "x")
@@ -0,0 +1,114 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from netsimpy.network.Topology import Topology
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TopologyTest(unittest.TestCase):
+    def test_from_edges(self):
+        topology = Topology.from_edges(4, [(0, 1, 1.0), (1, 2), (2, 3, 3.0)], delay=2.0)
+        self.assertEqual(topology.node_count(), 4)
+        self.assertEqual(topology.link_count(), 3)
+        self.assertEqual(sorted(topology.neighbors(1).tolist()), [0, 2])
+        self.assertEqual(topology.link_delay(2, 1), 2.0)
+        self.assertRaises(KeyError, topology.link_delay, 0, 3)
+
+    def test_directed(self):
+        topology = Topology.from_edges(3, [(0, 1), (1, 2)], delay=1.0, directed=True)
+        routes = topology.routes()
+        self.assertEqual(routes.next_hop(0, 2), 1)
+        self.assertEqual(routes.next_hop(2, 0), -1)
+        self.assertEqual(routes.distance(2, 0), float("inf"))
+
+    def test_grid_routes(self):
+        topology = Topology.grid(3, 4, delay=0.5)
+        self.assertEqual(topology.link_count(), 3 * 3 + 2 * 4)
+        routes = topology.routes([11])
+        # walk from the opposite corner, 5 hops of 0.5
+        node = 0
+        hops = 0
+        while node != 11:
+            node = routes.next_hop(node, 11)
+            hops += 1
+        self.assertEqual(hops, 5)
+        self.assertAlmostEqual(routes.distance(0, 11), 2.5)
+        self.assertRaises(KeyError, routes.next_hop, 0, 1)
+
+    def test_shorter_by_delay(self):
+        # the two-hop path is faster than the direct link
+        topology = Topology.from_edges(3, [(0, 2, 10.0), (0, 1, 1.0), (1, 2, 1.0)])
+        routes = topology.routes()
+        self.assertEqual(routes.next_hop(0, 2), 1)
+        self.assertAlmostEqual(routes.distance(0, 2), 2.0)
+
+    def test_zero_delay_links(self):
+        topology = Topology.from_edges(3, [(2, 0, 1e-6), (1, 2, 0.0)])
+        routes = topology.routes()
+        self.assertEqual(routes.next_hop(1, 0), 2)
+        self.assertAlmostEqual(routes.distance(1, 0), 1e-6)
+        self.assertAlmostEqual(routes.distance(2, 0), 1e-6)
+        next_hop, distance = topology._dijkstra_python(routes.destinations())
+        numpy.testing.assert_allclose(distance, routes._distance)
+
+    def test_python_matches(self):
+        topology = Topology.random_geometric(200, 0.15, seed=3, propagation_speed=1.0)
+        routes = topology.routes()
+        next_hop, distance = topology._dijkstra_python(routes.destinations())
+        numpy.testing.assert_allclose(distance, routes._distance)
+
+    def test_random_geometric(self):
+        topology = Topology.random_geometric(300, 0.1, seed=1)
+        sources, targets, _ = topology.links()
+        difference = topology.positions[sources] - topology.positions[targets]
+        self.assertTrue(((difference ** 2).sum(axis=1) < 0.01).all())
+        # brute force count of close pairs
+        all_pairs = topology.positions[:, None, :] - topology.positions[None, :, :]
+        close = ((all_pairs ** 2).sum(axis=2) < 0.01).sum() - 300
+        self.assertEqual(topology.link_count(), close // 2)
+
+    def test_barabasi_albert(self):
+        topology = Topology.barabasi_albert(500, 2, seed=7)
+        self.assertEqual(topology.link_count(), 498 * 2)
+        sources, targets, _ = topology.links()
+        self.assertFalse((sources == targets).any())
+        degree = numpy.bincount(numpy.concatenate((sources, targets)))
+        self.assertGreater(degree.max(), 10)
+
+    def test_build(self):
+        topology = Topology.from_edges(3, [(0, 1), (1, 2)], delay=1.0)
+        nodes, links, channels = topology.build(lambda i: "n{}".format(i),
+                                                lambda u, v, delay, a, b: (a, b, delay),
+                                                channel_groups=[[0, 1, 2]],
+                                                channel_factory=lambda i, members: members)
+        self.assertEqual(nodes, ["n0", "n1", "n2"])
+        self.assertEqual(links[(1, 2)], ("n1", "n2", 1.0))
+        self.assertEqual(channels, [["n0", "n1", "n2"]])
@@ -0,0 +1,133 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import tempfile
+import unittest
+from netsimpy.Simulator import Simulator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from netsimpy.network.Traffic import PoissonSource, CbrSource, OnOffParetoSource, TraceSource
+
+
+class Recorder(object):
+    def __init__(self, sim):
+        self._sim = sim
+        self.times = []
+        self.lengths = []
+
+    def __call__(self, message):
+        self.times.append(self._sim.time())
+        self.lengths.append(message.message_length())
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TrafficTest(unittest.TestCase):
+    def setUp(self):
+        if Simulator.sim() is not None:
+            Simulator.sim().release()
+        self.sim = Simulator()
+        self.recorder = Recorder(self.sim)
+
+    def tearDown(self):
+        self.sim.release()
+
+    def test_cbr(self):
+        source = CbrSource(self.sim, self.recorder, 0.1, length=100, block_size=7)
+        source.start(at=1.0, stop_time=2.95)
+        self.assertEqual(self.sim.queue_size(), 1)
+        self.sim.execute()
+        self.assertEqual(len(self.recorder.times), 20)
+        numpy.testing.assert_allclose(self.recorder.times, 1.0 + 0.1 * numpy.arange(20))
+        self.assertEqual(set(self.recorder.lengths), {100})
+
+    def test_poisson(self):
+        source = PoissonSource(self.sim, self.recorder, 100.0, seed=5, block_size=64)
+        source.start(stop_time=100.0)
+        self.sim.execute()
+        # 10000 expected, stddev 100
+        self.assertLess(abs(source.count() - 10000), 500)
+        self.assertTrue(numpy.all(numpy.diff(self.recorder.times) >= 0.0))
+
+    def test_stop(self):
+        source = PoissonSource(self.sim, self.recorder, 100.0, seed=5)
+        source.start()
+        self.sim.execute_steps(10)
+        source.stop()
+        self.sim.execute()
+        self.assertEqual(source.count(), 10)
+
+    def test_stop_from_callback(self):
+        def arrival(message):
+            self.recorder(message)
+            if source.count() == 3:
+                source.stop()
+
+        source = CbrSource(self.sim, arrival, 0.1)
+        source.start(stop_time=2.0)
+        self.sim.execute()
+        self.assertEqual(source.count(), 3)
+        self.assertEqual(self.sim.queue_size(), 0)
+
+    def test_on_off(self):
+        source = OnOffParetoSource(self.sim, self.recorder, 0.001, mean_on=0.05, mean_off=0.2, seed=3,
+                                   block_size=256)
+        source.start(stop_time=500.0)
+        self.sim.execute()
+        # on 20% of the time at 1000 per second
+        rate = source.count() / 500.0
+        self.assertGreater(rate, 120.0)
+        self.assertLess(rate, 300.0)
+        gaps = numpy.diff(self.recorder.times)
+        self.assertAlmostEqual(gaps.min(), 0.001)
+        self.assertTrue(numpy.all(gaps >= 0.001 - 1E-9))
+
+    def test_trace(self):
+        directory = tempfile.mkdtemp()
+        try:
+            text_path = os.path.join(directory, "trace.txt")
+            with open(text_path, "w") as text:
+                text.write("# time size\n")
+                for index in range(100):
+                    text.write("{} {}\n".format(1000.0 + index * 0.01, 64 + index))
+            times_path = os.path.join(directory, "trace.bin")
+            self.assertEqual(TraceSource.convert(text_path, times_path, chunk_lines=30), 100)
+            lengths_path = os.path.join(directory, "lengths.npy")
+            numpy.save(lengths_path, numpy.arange(64, 164, dtype=numpy.int32))
+
+            source = TraceSource(self.sim, self.recorder, times_path, lengths_path, block_size=16)
+            source.start(at=5.0)
+            self.sim.execute()
+            self.assertEqual(source.count(), 100)
+            numpy.testing.assert_allclose(self.recorder.times, 5.0 + 0.01 * numpy.arange(100))
+            self.assertEqual(self.recorder.lengths, list(range(64, 164)))
+            del source
+        finally:
+            shutil.rmtree(directory)
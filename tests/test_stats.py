@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2016-2018, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import random
+import unittest
+from netsimpy import stats
+
+
+class TestRunningStats(unittest.TestCase):
+
+    def test_mean_variance(self):
+        s = stats.RunningStats("x")
+        for x in [2, 4, 4, 4, 5, 5, 7, 9]:
+            s.add(x)
+        self.assertEqual(s.count(), 8)
+        self.assertAlmostEqual(s.mean(), 5.0)
+        self.assertAlmostEqual(s.variance(), 32.0 / 7)
+        self.assertEqual(s.min(), 2)
+        self.assertEqual(s.max(), 9)
+
+    def test_merge(self):
+        rng = random.Random(1)
+        data = [rng.gauss(10, 3) for _ in range(1000)]
+        whole = stats.RunningStats("x")
+        a = stats.RunningStats("x")
+        b = stats.RunningStats("x")
+        for i, x in enumerate(data):
+            whole.add(x)
+            (a if i < 300 else b).add(x)
+        a.merge(b)
+        self.assertEqual(a.count(), whole.count())
+        self.assertAlmostEqual(a.mean(), whole.mean())
+        self.assertAlmostEqual(a.variance(), whole.variance())
+
+    def test_half_width(self):
+        self.assertAlmostEqual(stats.student_t_quantile(0.975, 1), 12.706, places=3)
+        self.assertAlmostEqual(stats.student_t_quantile(0.975, 10), 2.228, places=2)
+        self.assertAlmostEqual(stats.normal_quantile(0.975), 1.959964, places=5)
+        s = stats.RunningStats("x")
+        self.assertEqual(s.half_width(), float("inf"))
+        for x in [1.0, 2.0, 3.0, 4.0]:
+            s.add(x)
+        self.assertAlmostEqual(s.half_width(0.95), 3.182 * s.stddev() / 2.0, places=2)
+
+
+class TestQuantiles(unittest.TestCase):
+
+    def test_tdigest(self):
+        rng = random.Random(2)
+        data = [rng.expovariate(1.0) for _ in range(20000)]
+        digest = stats.TDigest("latency")
+        for x in data:
+            digest.add(x)
+        data.sort()
+        for q in [0.5, 0.9, 0.99]:
+            exact = data[int(q * len(data))]
+            self.assertAlmostEqual(digest.quantile(q), exact, delta=0.02 * exact)
+        self.assertLess(len(digest.centroids()), 200)
+
+    def test_tdigest_merge(self):
+        rng = random.Random(3)
+        a = stats.TDigest("latency")
+        b = stats.TDigest("latency")
+        for _ in range(5000):
+            a.add(rng.uniform(0, 1))
+            b.add(rng.uniform(1, 2))
+        a.merge(b)
+        self.assertEqual(a.count(), 10000)
+        self.assertAlmostEqual(a.quantile(0.5), 1.0, delta=0.02)
+
+    def test_log_histogram(self):
+        h = stats.LogHistogram("latency", relative_error=0.01)
+        values = [1e-6 * (i + 1) for i in range(1000)]
+        for x in values:
+            h.add(x)
+        h.add(0.0)
+        self.assertEqual(h.count(), 1001)
+        median = h.quantile(0.5)
+        self.assertAlmostEqual(median, 500e-6, delta=0.02 * 500e-6)
+        self.assertEqual(h.quantile(0.0), 0.0)
+
+        other = stats.LogHistogram("latency", relative_error=0.01)
+        other.add(1.0)
+        h.merge(other)
+        self.assertEqual(h.count(), 1002)
+        self.assertEqual(sum(c for _, _, c in h.buckets()), 1001)
+
+
+class TestTimeWeightedAverage(unittest.TestCase):
+
+    def test_queue_length(self):
+        q = stats.TimeWeightedAverage("queue", value=0, time=0.0)
+        q.update(2, time=1.0)
+        q.update(0, time=3.0)
+        self.assertAlmostEqual(q.mean(time=4.0), 1.0)
+        self.assertEqual(q.max(), 2)
+
+        q.reset(time=4.0)
+        q.update(4, time=5.0)
+        self.assertAlmostEqual(q.mean(time=6.0), 2.0)
+
+    def test_merge(self):
+        a = stats.TimeWeightedAverage("queue", value=1, time=0.0)
+        a.update(1, time=2.0)
+        b = stats.TimeWeightedAverage("queue", value=4, time=0.0)
+        b.update(4, time=2.0)
+        merged = stats.merge_collectors([{"queue": a}, {"queue": b}])
+        self.assertAlmostEqual(merged["queue"].mean(time=2.0), 2.5)
+        self.assertEqual(a.mean(time=2.0), 1.0, "inputs should not be modified")